@@ -0,0 +1,140 @@
+"""
+Desc: importable process-wide boto3 client registry - creates one client per (service, region, credentials) and hands
+the same client to every caller and thread, instead of building a new client (endpoint resolution, service model
+loading, new connection pool) on every helper call.
+
+The STS caller identity (account id) is cached the same way, once per credential set.
+
+Clients use the 'adaptive' retry mode (client side rate limiting on throttling) and a connection pool sized for the
+worker pools of the execution scripts.
+
+Usage Ex:
+    import aws_clients
+    logs_client = aws_clients.get_client('logs')
+    ec2_client = aws_clients.get_client('ec2', region_name="us-east-2")
+    org_client = aws_clients.get_client('organizations', session=assumed_role_session)
+    account_id = aws_clients.get_caller_identity()['Account']
+"""
+import threading
+import boto3
+from botocore.config import Config
+
+RETRY_MODE = "adaptive"
+MAX_ATTEMPTS = 10
+# Room for the largest worker pools sharing a client (rds_executor, log group lookups) plus the main thread
+DEFAULT_MAX_POOL_CONNECTIONS = 32
+
+# (service_name, region_name, credentials key) -> client
+_clients = {}
+_clients_lock = threading.Lock()
+# credentials key -> sts get_caller_identity response
+_caller_identities = {}
+
+
+def get_session():
+    """Returns the default boto3 session the registry creates its clients from."""
+    return boto3._get_default_session()
+
+
+def _get_credentials_key(session):
+    """Identifies the credentials of a session without keeping the secret in the key."""
+    credentials = session.get_credentials()
+    return (session.profile_name, credentials.access_key if credentials else None)
+
+
+def get_client_key(client):
+    """
+    Identifies the credentials and region of a client, for caches of account data read with it: data read with one
+    credential set (e.g. an assumed role) is never served to another one in the same region.
+
+    Args:
+    client: Boto3 client, LazyClient or a client stand-in without credentials.
+
+    Returns:
+    tuple: (access key id or None, region name).
+    """
+    credentials = getattr(getattr(client, '_request_signer', None), '_credentials', None)
+    return (credentials.access_key if credentials else None, client.meta.region_name)
+
+
+def get_client(service_name, region_name=None, session=None, max_pool_connections=DEFAULT_MAX_POOL_CONNECTIONS):
+    """
+    Returns the shared client of a service, creating it on first use. Boto3 clients are thread safe, the creation is
+    serialized since boto3 sessions are not.
+
+    Args:
+    service_name (str): AWS service, e.g. 'logs', 'ec2', 'cloudwatch'.
+    region_name (str): Region of the client. Default is the region of the session.
+    session (boto3.Session): Session with the credentials to use, e.g. of an assumed role. Default is the default session.
+    max_pool_connections (int): Connection pool size, used when the client is created. Default is DEFAULT_MAX_POOL_CONNECTIONS.
+
+    Returns:
+    Boto3 client.
+    """
+    session = session or get_session()
+    region_name = region_name or session.region_name
+    with _clients_lock:
+        key = (service_name, region_name, _get_credentials_key(session))
+        client = _clients.get(key)
+        if client is None:
+            config = Config(retries={'mode': RETRY_MODE, 'max_attempts': MAX_ATTEMPTS},
+                            max_pool_connections=max_pool_connections)
+            client = session.client(service_name, region_name=region_name, config=config)
+            _clients[key] = client
+        return client
+
+
+def clear_clients():
+    """Drops all shared clients and caller identities, e.g. after the credentials of the default session changed."""
+    with _clients_lock:
+        _clients.clear()
+        _caller_identities.clear()
+
+
+def get_caller_identity(session=None):
+    """
+    Returns the STS caller identity of the session credentials, calling STS only once per credential set.
+
+    Args:
+    session (boto3.Session): Session with the credentials to use, e.g. of an assumed role. Default is the default session.
+
+    Returns:
+    dict: get_caller_identity response with 'Account', 'Arn' and 'UserId' keys.
+    """
+    session = session or get_session()
+    with _clients_lock:
+        key = _get_credentials_key(session)
+        identity = _caller_identities.get(key)
+    if identity is None:
+        identity = get_client('sts', session=session).get_caller_identity()
+        with _clients_lock:
+            _caller_identities[key] = identity
+    return identity
+
+
+def invalidate_caller_identity(session=None):
+    """
+    Drops the cached caller identity, e.g. when an assumed role session was refreshed with other credentials.
+
+    Args:
+    session (boto3.Session): Session whose identity is dropped. All identities are dropped when not passed.
+    """
+    with _clients_lock:
+        if session:
+            _caller_identities.pop(_get_credentials_key(session), None)
+        else:
+            _caller_identities.clear()
+
+
+class LazyClient:
+    """
+    Module level stand-in of a shared client, e.g. `rds_client = aws_clients.LazyClient('rds')` in a script: nothing is
+    created at import, every attribute access is served by the client get_client returns at that time.
+    """
+
+    def __init__(self, service_name, region_name=None):
+        self._service_name = service_name
+        self._region_name = region_name
+
+    def __getattr__(self, name):
+        return getattr(get_client(self._service_name, region_name=self._region_name), name)
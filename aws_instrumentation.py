@@ -0,0 +1,257 @@
+"""
+Desc: importable opt-in AWS API instrumentation - hooks into the botocore events of boto3 sessions and records per
+service and operation the call count, latency histogram, retries and throttling errors, so a slow monthly run shows which
+AWS API it spent its time in.
+
+The summary is written to the run log (e.g. the log file of mpe_utils.setup_logging) at exit, and optionally to a JSON
+file for trending. Instrumentation is off unless enabled in code or with the FINOPS_AWS_INSTRUMENTATION environment
+variable ("Y", or the path of the JSON file to write). Clients created before a session is instrumented are not
+recorded, use instrument_client for them.
+
+Usage Ex:
+    import aws_instrumentation
+    aws_instrumentation.enable(json_file="./cache/aws_calls.json")   # instruments the default boto3 session
+    session = aws_instrumentation.instrument_session(boto3.Session())
+    ...
+    aws_instrumentation.log_summary()
+
+    FINOPS_AWS_INSTRUMENTATION=./cache/aws_calls.json python update_rds.py -i T -t Y
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+import boto3
+
+ENV_VAR = "FINOPS_AWS_INSTRUMENTATION"
+# Upper bounds of the latency histogram buckets in milliseconds, the last bucket is unbounded
+LATENCY_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+# Error codes of throttled requests, same as the throttling codes of botocore's retry handlers
+THROTTLING_ERROR_CODES = {
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottledException', 'TooManyRequestsException',
+    'ProvisionedThroughputExceededException', 'TransactionInProgressException', 'RequestLimitExceeded',
+    'BandwidthLimitExceeded', 'LimitExceededException', 'RequestThrottled', 'SlowDown', 'PriorRequestNotComplete',
+    'EC2ThrottledException'
+}
+# request context keys of the call in flight
+_START_KEY = 'aws_instrumentation_start'
+_OPERATION_KEY = 'aws_instrumentation_operation'
+
+# "service.Operation" -> stats dict, see _new_stats
+_stats = {}
+_stats_lock = threading.Lock()
+_state = {'enabled': False, 'json_file': None, 'started_at': None}
+
+
+def _new_stats():
+    return {'calls': 0, 'errors': 0, 'retries': 0, 'throttles': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            'histogram': [0] * (len(LATENCY_BUCKETS_MS) + 1)}
+
+
+def _get_key(model):
+    return f"{model.service_model.service_name}.{model.name}"
+
+
+def _before_call(model, context, **kwargs):
+    context[_OPERATION_KEY] = _get_key(model)
+    context[_START_KEY] = time.perf_counter()
+
+
+def _record_call(context, error_code=None, retries=0):
+    start = context.pop(_START_KEY, None)
+    if start is None:
+        return
+    latency_ms = (time.perf_counter() - start) * 1000
+    bucket = next((index for index, bound in enumerate(LATENCY_BUCKETS_MS) if latency_ms <= bound), len(LATENCY_BUCKETS_MS))
+    with _stats_lock:
+        stats = _stats.setdefault(context[_OPERATION_KEY], _new_stats())
+        stats['calls'] += 1
+        stats['retries'] += retries
+        stats['total_ms'] += latency_ms
+        stats['max_ms'] = max(stats['max_ms'], latency_ms)
+        stats['histogram'][bucket] += 1
+        if error_code:
+            stats['errors'] += 1
+
+
+def _after_call(model, context, parsed=None, http_response=None, **kwargs):
+    parsed = parsed or {}
+    retries = parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+    error_code = parsed.get('Error', {}).get('Code') if http_response is not None and http_response.status_code >= 300 else None
+    _record_call(context, error_code=error_code, retries=retries)
+
+
+def _after_call_error(context, exception=None, **kwargs):
+    _record_call(context, error_code=type(exception).__name__)
+
+
+def _needs_retry(operation, response=None, **kwargs):
+    """Counts every throttled attempt, including the ones that succeeded on retry."""
+    if response is None:
+        return None
+    error_code = (response[1] or {}).get('Error', {}).get('Code')
+    if error_code in THROTTLING_ERROR_CODES:
+        with _stats_lock:
+            _stats.setdefault(_get_key(operation), _new_stats())['throttles'] += 1
+    return None
+
+
+def _register(events):
+    events.register('before-call', _before_call, unique_id='aws-instrumentation-before-call')
+    events.register('after-call', _after_call, unique_id='aws-instrumentation-after-call')
+    events.register('after-call-error', _after_call_error, unique_id='aws-instrumentation-after-call-error')
+    events.register('needs-retry', _needs_retry, unique_id='aws-instrumentation-needs-retry')
+
+
+def is_enabled():
+    """Returns True if the instrumentation is enabled."""
+    return _state['enabled']
+
+
+def instrument_session(session):
+    """
+    Records the calls of every client the boto3 session creates from now on. Nothing is registered when the
+    instrumentation is not enabled.
+
+    Args:
+    session (boto3.Session): Session to instrument.
+
+    Returns:
+    boto3.Session: The given session.
+    """
+    if _state['enabled']:
+        _register(session.events)
+    return session
+
+
+def instrument_client(client):
+    """
+    Records the calls of an already created client. Nothing is registered when the instrumentation is not enabled.
+
+    Args:
+    client: Boto3 client.
+
+    Returns:
+    The given client.
+    """
+    if _state['enabled']:
+        _register(client.meta.events)
+    return client
+
+
+def enable(json_file=None):
+    """
+    Enables the instrumentation, instruments the default boto3 session and writes the summary to the log (and the
+    JSON file) at exit.
+
+    Args:
+    json_file (str): JSON file the summary is also written to. Not written when not passed.
+    """
+    if not _state['enabled']:
+        _state.update(enabled=True, started_at=datetime.now().isoformat(timespec='seconds'))
+        atexit.register(_write_summary)
+    if json_file:
+        _state['json_file'] = json_file
+    instrument_session(boto3._get_default_session())
+
+
+def enable_from_env():
+    """
+    Enables the instrumentation when the FINOPS_AWS_INSTRUMENTATION environment variable is set: "Y" enables it,
+    any other value is the JSON file the summary is also written to.
+
+    Returns:
+    bool: True if the instrumentation is enabled.
+    """
+    value = os.getenv(ENV_VAR, "").strip()
+    if value and value.upper() not in ("N", "NO", "0", "FALSE"):
+        enable(json_file=None if value.upper() in ("Y", "YES", "1", "TRUE") else value)
+    return _state['enabled']
+
+
+def _get_percentile_ms(histogram, percentile):
+    """Returns the upper bound of the histogram bucket holding the percentile, None for the unbounded bucket."""
+    threshold = sum(histogram) * percentile / 100
+    count = 0
+    for index, bucket_count in enumerate(histogram):
+        count += bucket_count
+        if count >= threshold and bucket_count:
+            return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else None
+    return None
+
+
+def get_stats():
+    """
+    Returns the recorded statistics, slowest operation (total latency) first.
+
+    Returns:
+    dict: "service.Operation" -> {'calls', 'errors', 'retries', 'throttles', 'total_ms', 'avg_ms', 'max_ms',
+          'p50_ms', 'p95_ms' (bucket upper bounds), 'histogram' ({'<=10ms': count, ..., '>10000ms': count})}.
+    """
+    with _stats_lock:
+        snapshot = {key: dict(stats, histogram=list(stats['histogram'])) for key, stats in _stats.items()}
+
+    labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+    result = {}
+    for key, stats in sorted(snapshot.items(), key=lambda item: -item[1]['total_ms']):
+        histogram = stats['histogram']
+        result[key] = {
+            'calls': stats['calls'],
+            'errors': stats['errors'],
+            'retries': stats['retries'],
+            'throttles': stats['throttles'],
+            'total_ms': round(stats['total_ms'], 1),
+            'avg_ms': round(stats['total_ms'] / stats['calls'], 1) if stats['calls'] else 0.0,
+            'max_ms': round(stats['max_ms'], 1),
+            'p50_ms': _get_percentile_ms(histogram, 50),
+            'p95_ms': _get_percentile_ms(histogram, 95),
+            'histogram': {label: count for label, count in zip(labels, histogram) if count}
+        }
+    return result
+
+
+def reset():
+    """Drops the recorded statistics."""
+    with _stats_lock:
+        _stats.clear()
+
+
+def log_summary():
+    """Writes one log line per operation, slowest first."""
+    stats = get_stats()
+    if not stats:
+        logging.info("AWS API instrumentation: no calls recorded")
+        return
+    logging.info(f"AWS API instrumentation: {sum(op['calls'] for op in stats.values())} calls to {len(stats)} operations")
+    for key, op in stats.items():
+        logging.info(f"AWS API {key}: calls={op['calls']} total={op['total_ms']}ms avg={op['avg_ms']}ms "
+                     f"p50<={op['p50_ms']}ms p95<={op['p95_ms']}ms max={op['max_ms']}ms retries={op['retries']} "
+                     f"throttles={op['throttles']} errors={op['errors']}")
+
+
+def write_json(json_file):
+    """
+    Writes the statistics to a JSON file, its directory is created when missing.
+
+    Args:
+    json_file (str): Target JSON file.
+    """
+    if os.path.dirname(json_file):
+        os.makedirs(os.path.dirname(json_file), exist_ok=True)
+    with open(json_file, 'w') as file:
+        json.dump({'started_at': _state['started_at'], 'finished_at': datetime.now().isoformat(timespec='seconds'),
+                   'operations': get_stats()}, file, indent=2)
+    logging.info(f"AWS API instrumentation written to {json_file}")
+
+
+def _write_summary():
+    """atexit handler, runs before logging shuts down since it is registered later."""
+    try:
+        log_summary()
+        if _state['json_file']:
+            write_json(_state['json_file'])
+    except Exception as e:
+        logging.error(f"Writing the AWS API instrumentation summary failed: {e}")
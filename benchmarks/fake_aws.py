@@ -0,0 +1,553 @@
+"""
+Desc: local fake of the AWS APIs used by the report and execution scripts - serves a synthetic fleet of RDS instances
+(standalone, Aurora cluster members and read replicas), CloudWatch log groups, NAT Gateways and load balancers from
+memory and counts every API call (each page of a paginated call is one call) per service and operation.
+
+The fake is installed by replacing boto3.client and boto3.Session.client, so the scripts run unchanged. Page sizes,
+identifier filters and state transitions (snapshot creating -> available, instance deleting -> deleted) follow the
+real APIs closely enough for the call counts to be representative.
+
+Usage Ex:
+    import fake_aws
+    fleet = fake_aws.FakeFleet(1000)
+    with fake_aws.installed(fleet):
+        rds_client = boto3.client('rds')
+        ...
+    print(fleet.calls.most_common(5))
+"""
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import boto3
+import boto3.session
+from botocore.exceptions import ClientError
+
+DEFAULT_REGION = "us-east-1"
+DEFAULT_ACCOUNT_ID = "123456789012"
+SPLUNK_DESTINATION_ARN = "arn:aws:logs:{region}:{account_id}:destination:splunk"
+
+# operation -> (input token, output token, result key, default page size, page size parameter)
+PAGINATION = {
+    'describe_db_instances': ('Marker', 'Marker', 'DBInstances', 100, 'MaxRecords'),
+    'describe_db_clusters': ('Marker', 'Marker', 'DBClusters', 100, 'MaxRecords'),
+    'describe_db_snapshots': ('Marker', 'Marker', 'DBSnapshots', 100, 'MaxRecords'),
+    'describe_db_cluster_snapshots': ('Marker', 'Marker', 'DBClusterSnapshots', 100, 'MaxRecords'),
+    'describe_log_groups': ('nextToken', 'nextToken', 'logGroups', 50, 'limit'),
+    'describe_subscription_filters': ('nextToken', 'nextToken', 'subscriptionFilters', 50, 'limit'),
+    'describe_nat_gateways': ('NextToken', 'NextToken', 'NatGateways', 1000, 'MaxResults'),
+    'describe_route_tables': ('NextToken', 'NextToken', 'RouteTables', 1000, 'MaxResults'),
+    'describe_load_balancers': ('Marker', 'NextMarker', None, 400, 'PageSize'),
+    'get_idle_recommendations': ('nextToken', 'nextToken', 'idleRecommendations', 1000, 'maxResults'),
+}
+# Result key of describe_load_balancers per service
+LOAD_BALANCER_KEYS = {'elbv2': 'LoadBalancers', 'elb': 'LoadBalancerDescriptions'}
+# get_metric_data returns at most this many data points per response
+MAX_DATAPOINTS_PER_RESPONSE = 100800
+
+
+def _client_error(code, operation, message=""):
+    return ClientError({'Error': {'Code': code, 'Message': message or code}}, operation)
+
+
+class _FakeExceptions:
+    """client.exceptions stand-in, every modeled exception is a ClientError subclass."""
+
+    def __init__(self):
+        self._classes = {}
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if name not in self._classes:
+            self._classes[name] = type(name, (ClientError,), {})
+        return self._classes[name]
+
+
+class FakeFleet:
+    """
+    Synthetic AWS fleet of one account and region, and the call counter of the fake clients serving it.
+    """
+
+    def __init__(self, size, region=DEFAULT_REGION, account_id=DEFAULT_ACCOUNT_ID):
+        """
+        Args:
+        size (int): Number of RDS instances, log groups, NAT Gateways and load balancers.
+        region (str): Region of the fleet. Default is DEFAULT_REGION.
+        account_id (str): Account of the fleet. Default is DEFAULT_ACCOUNT_ID.
+        """
+        self.size = size
+        self.region = region
+        self.account_id = account_id
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._pending = {}  # id(resource collection) -> {identifier: status key} of transitional resources
+        self._build_rds(size)
+        self._build_logs(size)
+        self._build_nat_gateways(size)
+        self._build_load_balancers(size)
+        self._metric_values = {}
+
+    def _arn(self, service, resource):
+        return f"arn:aws:{service}:{self.region}:{self.account_id}:{resource}"
+
+    def _build_rds(self, size):
+        """
+        Every block of 10 instances has one 3-member Aurora cluster (the first one is the writer), one standalone
+        instance with a read replica and 5 other standalone instances. Every 4th instance is idle.
+        """
+        self.db_instances = {}
+        self.db_clusters = {}
+        self.db_snapshots = {}
+        self.db_cluster_snapshots = {}
+        self.idle_arns = set()
+        for i in range(size):
+            db_instance_id = f"database-{i:05d}"
+            slot = i % 10
+            db_instance = {
+                'DBInstanceIdentifier': db_instance_id,
+                'DBInstanceArn': self._arn('rds', f"db:{db_instance_id}"),
+                'DBInstanceClass': 'db.r5.large' if slot < 3 else 'db.t3.medium',
+                'Engine': 'aurora-mysql' if slot < 3 else ('postgres' if i % 2 else 'mysql'),
+                'DBInstanceStatus': 'stopped' if i % 50 == 48 else 'available',
+                'ReadReplicaDBInstanceIdentifiers': [],
+            }
+            if slot < 3:
+                db_cluster_id = f"cluster-{i // 10:05d}"
+                db_instance['DBClusterIdentifier'] = db_cluster_id
+                db_cluster = self.db_clusters.setdefault(db_cluster_id, {
+                    'DBClusterIdentifier': db_cluster_id,
+                    'DBClusterArn': self._arn('rds', f"cluster:{db_cluster_id}"),
+                    'Status': 'available',
+                    'DBClusterMembers': []
+                })
+                db_cluster['DBClusterMembers'].append({'DBInstanceIdentifier': db_instance_id, 'IsClusterWriter': slot == 0})
+            elif slot == 4:
+                source_id = f"database-{i - 1:05d}"
+                db_instance['ReadReplicaSourceDBInstanceIdentifier'] = source_id
+                self.db_instances[source_id]['ReadReplicaDBInstanceIdentifiers'].append(db_instance_id)
+            self.db_instances[db_instance_id] = db_instance
+            if i % 4 == 0:
+                self.idle_arns.add(db_instance['DBInstanceArn'])
+
+    def _build_logs(self, size):
+        """Log groups under a few prefixes with mixed retention, every 2nd one has the Splunk subscription filter."""
+        prefixes = ["/aws/lambda/", "/aws/ecs/", "/aws/rds/instance/", "/aws/apigateway/", "/ecs/app-"]
+        retentions = [None, 7, 30, 90, 365, 3653]
+        self.splunk_destination_arn = SPLUNK_DESTINATION_ARN.format(region=self.region, account_id=self.account_id)
+        self.log_groups = {}
+        self.subscription_filters = {}
+        for i in range(size):
+            log_group_name = f"{prefixes[i % len(prefixes)]}service-{i % 97:02d}/{i:05d}"
+            log_group = {'logGroupName': log_group_name, 'arn': self._arn('logs', f"log-group:{log_group_name}:*"),
+                         'storedBytes': i * 1024}
+            if retentions[i % len(retentions)]:
+                log_group['retentionInDays'] = retentions[i % len(retentions)]
+            self.log_groups[log_group_name] = log_group
+            self.subscription_filters[log_group_name] = [
+                {'filterName': 'Splunk', 'logGroupName': log_group_name, 'destinationArn': self.splunk_destination_arn}
+            ] if i % 2 == 0 else []
+
+    def _build_nat_gateways(self, size):
+        """NAT Gateways with one Elastic IP each; 2 of 3 are routed to by a route table, every 20th one is deleted."""
+        self.nat_gateways = {}
+        self.route_tables = {}  # NAT Gateway id -> route tables routing to it
+        for i in range(size):
+            nat_gateway_id = f"nat-{i:017x}"
+            self.nat_gateways[nat_gateway_id] = {
+                'NatGatewayId': nat_gateway_id,
+                'State': 'deleted' if i % 20 == 19 else 'available',
+                'NatGatewayAddresses': [{'AllocationId': f"eipalloc-{i:017x}", 'PublicIp': f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"}],
+                'VpcId': f"vpc-{i // 10:017x}"
+            }
+            if i % 3:
+                self.route_tables[nat_gateway_id] = [{
+                    'RouteTableId': f"rtb-{i:017x}",
+                    'Routes': [{'DestinationCidrBlock': '0.0.0.0/0', 'NatGatewayId': nat_gateway_id}]
+                }]
+
+    def _build_load_balancers(self, size):
+        """2 of 3 load balancers are ALB/NLB (every 2nd with target groups, every 3rd with listeners), the rest Classic."""
+        self.load_balancers = {'elbv2': {}, 'elb': {}}
+        self.target_groups = {}
+        self.listeners = {}
+        for i in range(size):
+            if i % 3 == 2:
+                name = f"classic-{i:05d}"
+                self.load_balancers['elb'][name] = {'LoadBalancerName': name, 'DNSName': f"{name}.elb.amazonaws.com"}
+                continue
+            name = f"lb-{i:05d}"
+            arn = self._arn('elasticloadbalancing', f"loadbalancer/app/{name}/{i:016x}")
+            self.load_balancers['elbv2'][arn] = {'LoadBalancerArn': arn, 'LoadBalancerName': name,
+                                                 'Type': 'application', 'State': {'Code': 'active'}}
+            self.target_groups[arn] = [{'TargetGroupName': f"tg-{i:05d}",
+                                        'TargetGroupArn': self._arn('elasticloadbalancing', f"targetgroup/tg-{i:05d}/{i:016x}")}
+                                       ] if i % 2 == 0 else []
+            self.listeners[arn] = [{'Port': 443, 'Protocol': 'HTTPS'}] if i % 3 == 0 else []
+
+    def get_idle_instance_ids(self):
+        """Returns the identifiers of the idle RDS instances, in fleet order."""
+        return [db_instance['DBInstanceIdentifier'] for db_instance in self.db_instances.values()
+                if db_instance['DBInstanceArn'] in self.idle_arns]
+
+    def record_call(self, service, operation):
+        with self._lock:
+            self.calls[(service, operation)] += 1
+
+    # ---- rds ----
+
+    def _filter_values(self, params, filter_name):
+        for filter_ in params.get('Filters', []):
+            if filter_['Name'] == filter_name:
+                return set(filter_['Values'])
+        return None
+
+    def _advance(self, resources):
+        """
+        Moves the transitional resources of a collection one step on every describe, a resource is seen in its
+        transitional state by one describe: creating -> available, deleting -> removed.
+        """
+        pending = self._pending.setdefault(id(resources), {})
+        for identifier, status_key in list(pending.items()):
+            resource = resources[identifier]
+            resource['_polls'] = resource.get('_polls', 0) + 1
+            if resource['_polls'] > 1:
+                del pending[identifier]
+                if resource[status_key] == 'deleting':
+                    del resources[identifier]
+                else:
+                    resource[status_key] = 'available'
+                    del resource['_polls']
+
+    def _start_transition(self, resources, identifier, status_key, status):
+        resources[identifier][status_key] = status
+        self._pending.setdefault(id(resources), {})[identifier] = status_key
+
+    def _public(self, resource):
+        return {key: value for key, value in resource.items() if not key.startswith('_')}
+
+    def rds_describe_db_instances(self, params):
+        with self._lock:
+            if 'DBInstanceIdentifier' in params:
+                db_instance = self.db_instances.get(params['DBInstanceIdentifier'])
+                if not db_instance:
+                    raise _client_error('DBInstanceNotFound', 'DescribeDBInstances')
+                selected = [self._public(db_instance)]
+            else:
+                identifiers = self._filter_values(params, 'db-instance-id')
+                if identifiers is None:
+                    selected = [self._public(db_instance) for db_instance in self.db_instances.values()]
+                else:
+                    selected = [self._public(self.db_instances[identifier]) for identifier in identifiers
+                                if identifier in self.db_instances]
+            self._advance(self.db_instances)
+            return selected
+
+    def rds_describe_db_clusters(self, params):
+        with self._lock:
+            return list(self.db_clusters.values())
+
+    def rds_describe_db_snapshots(self, params):
+        with self._lock:
+            identifiers = self._filter_values(params, 'db-snapshot-id')
+            selected = [self._public(snapshot) for snapshot_id, snapshot in self.db_snapshots.items()
+                        if identifiers is None or snapshot_id in identifiers]
+            self._advance(self.db_snapshots)
+            return selected
+
+    def rds_describe_db_cluster_snapshots(self, params):
+        with self._lock:
+            identifiers = self._filter_values(params, 'db-cluster-snapshot-id')
+            selected = [self._public(snapshot) for snapshot_id, snapshot in self.db_cluster_snapshots.items()
+                        if identifiers is None or snapshot_id in identifiers]
+            self._advance(self.db_cluster_snapshots)
+            return selected
+
+    def rds_create_db_snapshot(self, params):
+        with self._lock:
+            snapshot_id = params['DBSnapshotIdentifier']
+            if snapshot_id in self.db_snapshots:
+                raise _client_error('DBSnapshotAlreadyExists', 'CreateDBSnapshot')
+            if params['DBInstanceIdentifier'] not in self.db_instances:
+                raise _client_error('DBInstanceNotFound', 'CreateDBSnapshot')
+            snapshot = {'DBSnapshotIdentifier': snapshot_id, 'DBInstanceIdentifier': params['DBInstanceIdentifier'],
+                        'Status': 'creating'}
+            self.db_snapshots[snapshot_id] = snapshot
+            self._start_transition(self.db_snapshots, snapshot_id, 'Status', 'creating')
+            return {'DBSnapshot': self._public(snapshot)}
+
+    def rds_create_db_cluster_snapshot(self, params):
+        with self._lock:
+            snapshot_id = params['DBClusterSnapshotIdentifier']
+            if snapshot_id in self.db_cluster_snapshots:
+                raise _client_error('DBClusterSnapshotAlreadyExistsFault', 'CreateDBClusterSnapshot')
+            if params['DBClusterIdentifier'] not in self.db_clusters:
+                raise _client_error('DBClusterNotFoundFault', 'CreateDBClusterSnapshot')
+            snapshot = {'DBClusterSnapshotIdentifier': snapshot_id, 'DBClusterIdentifier': params['DBClusterIdentifier'],
+                        'Status': 'creating'}
+            self.db_cluster_snapshots[snapshot_id] = snapshot
+            self._start_transition(self.db_cluster_snapshots, snapshot_id, 'Status', 'creating')
+            return {'DBClusterSnapshot': self._public(snapshot)}
+
+    def rds_delete_db_instance(self, params):
+        with self._lock:
+            db_instance = self.db_instances.get(params['DBInstanceIdentifier'])
+            if not db_instance:
+                raise _client_error('DBInstanceNotFound', 'DeleteDBInstance')
+            if db_instance['DBInstanceStatus'] != 'available':
+                raise _client_error('InvalidDBInstanceState', 'DeleteDBInstance')
+            self._start_transition(self.db_instances, params['DBInstanceIdentifier'], 'DBInstanceStatus', 'deleting')
+            return {'DBInstance': self._public(db_instance)}
+
+    # ---- compute-optimizer / cloudwatch / ce / sts ----
+
+    def compute_optimizer_get_idle_recommendations(self, params):
+        recommendations = []
+        for arn in params.get('resourceArns', []):
+            if arn in self.idle_arns:
+                recommendations.append({
+                    'resourceArn': arn,
+                    'resourceId': arn.rsplit(':', 1)[-1],
+                    'resourceType': 'RDSDBInstance',
+                    'finding': 'Idle',
+                    'savingsOpportunityAfterDiscounts': {'estimatedMonthlySavings': {'currency': 'USD', 'value': 123.45}},
+                    'utilizationMetrics': [{'name': 'CPU', 'statistic': 'Maximum', 'value': 1.5},
+                                           {'name': 'DatabaseConnections', 'statistic': 'Maximum', 'value': 0.0}]
+                })
+        return recommendations
+
+    def _get_metric_values(self, points, variant):
+        """Data point values are shared between queries, one list per (points, variant)."""
+        key = (points, variant)
+        if key not in self._metric_values:
+            self._metric_values[key] = [float((variant + point) % 5) for point in range(points)]
+        return self._metric_values[key]
+
+    def cloudwatch_get_metric_data(self, params):
+        queries = params['MetricDataQueries']
+        period = queries[0]['MetricStat']['Period'] if queries else 86400
+        points = max(1, int((params['EndTime'] - params['StartTime']).total_seconds() // period))
+        timestamps = [params['StartTime'] + timedelta(seconds=period * point) for point in range(points)]
+        queries_per_response = max(1, MAX_DATAPOINTS_PER_RESPONSE // points)
+        start = int(params.get('NextToken') or 0)
+        results = [{'Id': query['Id'], 'Label': query['MetricStat']['Metric']['MetricName'], 'StatusCode': 'Complete',
+                    'Timestamps': timestamps, 'Values': self._get_metric_values(points, index % 5)}
+                   for index, query in enumerate(queries[start:start + queries_per_response], start=start)]
+        response = {'MetricDataResults': results}
+        if start + queries_per_response < len(queries):
+            response['NextToken'] = str(start + queries_per_response)
+        return response
+
+    def ce_get_cost_and_usage(self, params):
+        start = datetime.strptime(params['TimePeriod']['Start'], '%Y-%m-%d')
+        end = datetime.strptime(params['TimePeriod']['End'], '%Y-%m-%d')
+        results = []
+        month = start.replace(day=1)
+        while month < end:
+            next_month = (month + timedelta(days=32)).replace(day=1)
+            groups = [{'Keys': [service], 'Metrics': {'UnblendedCost': {'Amount': str(amount), 'Unit': 'USD'}}}
+                      for service, amount in [("Amazon Relational Database Service", 1000.0 * self.size / 100),
+                                              ("AmazonCloudWatch", 10.0 * self.size / 100),
+                                              ("Amazon Elastic Compute Cloud - Compute", 500.0)]]
+            results.append({'TimePeriod': {'Start': month.strftime('%Y-%m-%d'), 'End': next_month.strftime('%Y-%m-%d')},
+                            'Groups': groups, 'Estimated': False})
+            month = next_month
+        return {'ResultsByTime': results}
+
+    def sts_get_caller_identity(self, params):
+        return {'Account': self.account_id, 'Arn': f"arn:aws:iam::{self.account_id}:user/benchmark", 'UserId': 'benchmark'}
+
+    # ---- logs ----
+
+    def logs_describe_log_groups(self, params):
+        prefix = params.get('logGroupNamePrefix', '')
+        with self._lock:
+            if not prefix:
+                return list(self.log_groups.values())
+            return [log_group for name, log_group in self.log_groups.items() if name.startswith(prefix)]
+
+    def logs_describe_subscription_filters(self, params):
+        with self._lock:
+            if params['logGroupName'] not in self.log_groups:
+                raise _client_error('ResourceNotFoundException', 'DescribeSubscriptionFilters')
+            return list(self.subscription_filters[params['logGroupName']])
+
+    def logs_put_retention_policy(self, params):
+        with self._lock:
+            if params['logGroupName'] not in self.log_groups:
+                raise _client_error('ResourceNotFoundException', 'PutRetentionPolicy')
+            self.log_groups[params['logGroupName']]['retentionInDays'] = params['retentionInDays']
+            return {}
+
+    def logs_put_subscription_filter(self, params):
+        with self._lock:
+            if params['logGroupName'] not in self.log_groups:
+                raise _client_error('ResourceNotFoundException', 'PutSubscriptionFilter')
+            filters = [filter_ for filter_ in self.subscription_filters[params['logGroupName']]
+                       if filter_['filterName'] != params['filterName']]
+            filters.append({'filterName': params['filterName'], 'logGroupName': params['logGroupName'],
+                            'destinationArn': params['destinationArn']})
+            self.subscription_filters[params['logGroupName']] = filters
+            return {}
+
+    # ---- ec2 ----
+
+    def ec2_describe_nat_gateways(self, params):
+        identifiers = set(params['NatGatewayIds']) if params.get('NatGatewayIds') else None
+        with self._lock:
+            return [nat_gateway for nat_gateway_id, nat_gateway in self.nat_gateways.items()
+                    if identifiers is None or nat_gateway_id in identifiers]
+
+    def ec2_describe_route_tables(self, params):
+        nat_gateway_ids = self._filter_values(params, 'route.nat-gateway-id')
+        with self._lock:
+            if nat_gateway_ids is None:
+                nat_gateway_ids = list(self.route_tables)
+            return [route_table for nat_gateway_id in nat_gateway_ids for route_table in self.route_tables.get(nat_gateway_id, [])]
+
+    def ec2_delete_nat_gateway(self, params):
+        with self._lock:
+            nat_gateway = self.nat_gateways.get(params['NatGatewayId'])
+            if not nat_gateway:
+                raise _client_error('NatGatewayNotFound', 'DeleteNatGateway')
+            nat_gateway['State'] = 'deleted'
+            return {'NatGatewayId': params['NatGatewayId']}
+
+    def ec2_release_address(self, params):
+        return {}
+
+    # ---- elbv2 / elb ----
+
+    def elbv2_describe_load_balancers(self, params):
+        with self._lock:
+            return list(self.load_balancers['elbv2'].values())
+
+    def elb_describe_load_balancers(self, params):
+        with self._lock:
+            return list(self.load_balancers['elb'].values())
+
+    def elbv2_describe_target_groups(self, params):
+        if params.get('LoadBalancerArn') not in self.target_groups:
+            raise _client_error('LoadBalancerNotFound', 'DescribeTargetGroups')
+        return {'TargetGroups': list(self.target_groups[params['LoadBalancerArn']])}
+
+    def elbv2_describe_listeners(self, params):
+        if params.get('LoadBalancerArn') not in self.listeners:
+            raise _client_error('LoadBalancerNotFound', 'DescribeListeners')
+        return {'Listeners': list(self.listeners[params['LoadBalancerArn']])}
+
+    def elbv2_delete_load_balancer(self, params):
+        with self._lock:
+            self.load_balancers['elbv2'].pop(params['LoadBalancerArn'], None)
+            return {}
+
+    def elb_delete_load_balancer(self, params):
+        with self._lock:
+            self.load_balancers['elb'].pop(params['LoadBalancerName'], None)
+            return {}
+
+    # ---- ses ----
+
+    def ses_send_email(self, params):
+        return {'MessageId': 'benchmark'}
+
+    def ses_send_raw_email(self, params):
+        return {'MessageId': 'benchmark'}
+
+
+class FakePaginator:
+    """Paginator of a fake client operation, every page is one counted call."""
+
+    def __init__(self, client, operation):
+        self._client = client
+        self._operation = operation
+
+    def paginate(self, **params):
+        params.pop('PaginationConfig', None)
+        input_token, output_token = PAGINATION[self._operation][:2]
+        while True:
+            page = getattr(self._client, self._operation)(**params)
+            yield page
+            if not page.get(output_token):
+                return
+            params[input_token] = page[output_token]
+
+
+class FakeClient:
+    """
+    boto3 client stand-in of one service, dispatching operation calls to the FakeFleet handlers.
+    """
+
+    def __init__(self, fleet, service, region_name=None):
+        self._fleet = fleet
+        self._service = service
+        self.meta = SimpleNamespace(region_name=region_name or fleet.region,
+                                    service_model=SimpleNamespace(service_name=service))
+        self.exceptions = _FakeExceptions()
+
+    def can_paginate(self, operation):
+        return operation in PAGINATION
+
+    def get_paginator(self, operation):
+        if operation not in PAGINATION:
+            raise NotImplementedError(f"Fake {self._service} client cannot paginate {operation}")
+        return FakePaginator(self, operation)
+
+    def __getattr__(self, operation):
+        if operation.startswith('_'):
+            raise AttributeError(operation)
+        handler = getattr(self._fleet, f"{self._service.replace('-', '_')}_{operation}", None)
+        if handler is None:
+            raise NotImplementedError(f"Fake {self._service} client does not implement {operation}")
+
+        def call(**params):
+            self._fleet.record_call(self._service, operation)
+            result = handler(params)
+            if operation not in PAGINATION or isinstance(result, dict):
+                return result
+            return self._paginate_result(operation, result, params)
+        return call
+
+    def _paginate_result(self, operation, items, params):
+        """Returns one page (copies) of a full result list, the token is the offset of the next page."""
+        input_token, output_token, result_key, page_size, page_size_param = PAGINATION[operation]
+        result_key = result_key or LOAD_BALANCER_KEYS[self._service]
+        page_size = params.get(page_size_param) or page_size
+        start = int(params.get(input_token) or 0)
+        response = {result_key: [dict(item) for item in items[start:start + page_size]]}
+        if start + page_size < len(items):
+            response[output_token] = str(start + page_size)
+        return response
+
+
+@contextmanager
+def installed(fleet):
+    """
+    Serves every boto3.client / boto3.Session().client created inside the block from the fleet.
+
+    Args:
+    fleet (FakeFleet): Fleet the fake clients serve.
+    """
+    def client(service_name, region_name=None, *args, **kwargs):
+        return FakeClient(fleet, service_name, region_name)
+
+    def session_client(self, *args, **kwargs):
+        return client(*args, **kwargs)
+
+    original_client = boto3.client
+    original_session_client = boto3.session.Session.client
+    original_region_name = boto3.session.Session.region_name
+    original_get_credentials = boto3.session.Session.get_credentials
+    boto3.client = client
+    boto3.session.Session.client = session_client
+    boto3.session.Session.region_name = property(lambda self: fleet.region)
+    # No credential provider chain lookup (environment, profiles, instance metadata) for the fake clients
+    boto3.session.Session.get_credentials = lambda self: None
+    try:
+        yield fleet
+    finally:
+        boto3.client = original_client
+        boto3.session.Session.client = original_session_client
+        boto3.session.Session.region_name = original_region_name
+        boto3.session.Session.get_credentials = original_get_credentials
@@ -0,0 +1,456 @@
+"""
+Desc: scale benchmarks of the report and execution paths - runs get_idle_rds_instances_detail, get_log_groups_detail,
+update_log_groups, get_given_log_groups_with_retention, get_table_html, the NAT Gateway and load balancer audits and process_rds_actions
+against synthetic fleets (fake_aws) of growing size and reports wall time, peak memory (tracemalloc) and the number of
+AWS calls per operation, so that a change that makes a path scale worse shows up before it reaches a real account.
+The rds_startup scenario times `update_rds --help` in a fresh interpreter (imports included) and fails when it makes
+an AWS call or takes longer than STARTUP_MAX_MS.
+
+The scripts run unchanged: their sections are loaded from the script files, mpe_utils from its copy embedded in
+"sent frm lap", every boto3 client is served by fake_aws and the reporting table / email helpers of mpe_utils are
+replaced by counters (reported as 'external' calls), so nothing leaves the machine. A missing dependency fails the
+scenario, it is not skipped.
+
+Usage Ex:
+1. python benchmarks/run_benchmarks.py
+2. python benchmarks/run_benchmarks.py -s 100 1000 -c nat_audit elb_audit -j ./cache/benchmarks.json
+3. python benchmarks/run_benchmarks.py -b ./cache/benchmarks.json     # fails if a path got slower or makes more AWS calls
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from datetime import datetime
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path[:0] = [BENCHMARKS_DIR, REPO_DIR]
+
+import fake_aws
+
+DEFAULT_SIZES = [100, 1000, 10000]
+# Poll intervals of the benchmark's rds_state_poller, the fake moves a resource to its next state on every describe
+POLL_INTERVAL = 0.01
+# Token bucket rate of the CloudWatch Logs writes, the real quota (5 TPS) would only measure the sleeps
+LOGS_WRITE_TPS = 10000
+# Relative wall time / peak memory growth over the baseline reported as a regression
+DEFAULT_TOLERANCE = 0.25
+# Upper bound of `update_rds --help` in a fresh interpreter, imports included
+STARTUP_MAX_MS = 2000
+
+# Script sections: name -> (file, start marker line, end marker line); the markers separate pasted script copies
+SCRIPTS = {
+    'mpe_utils': ("sent frm lap", "____________________________________util", None),
+    'update_rds': ("sent frm lap", "______________________________rds.py", "____________________________________util"),
+    'update_log_groups': ("log", None, None),
+    'manage_nat': ("mng-nat", None, None),
+    'manage_elb': ("mng-elb", "real", None),
+}
+
+
+def load_script(name):
+    """
+    Loads a script section as a module, running its module level code (clients, account lookups) like a script run.
+    The embedded mpe_utils is loaded first, so that `import mpe_utils` of the section resolves to it.
+
+    Args:
+    name (str): Key of SCRIPTS.
+
+    Returns:
+    module: Loaded script, its main() is not run.
+    """
+    if name != 'mpe_utils':
+        get_mpe_utils()
+    file_name, start_marker, end_marker = SCRIPTS[name]
+    file_path = os.path.join(REPO_DIR, file_name)
+    with open(file_path, 'r') as file:
+        lines = file.read().split('\n')
+    start = 0
+    if start_marker:
+        start = max(index for index, line in enumerate(lines) if line.strip() == start_marker) + 1
+    end = len(lines)
+    if end_marker:
+        end = next(index for index, line in enumerate(lines) if index >= start and line.strip() == end_marker)
+    # The lines pasted under an indented marker are indented too, up to the first line at column 0
+    section = lines[start:end]
+    for index, line in enumerate(section):
+        if line[:1] not in ('', ' ', '\t'):
+            break
+        section[index] = line.lstrip()
+    # Leading blank lines keep the line numbers of tracebacks right
+    source = '\n' * start + '\n'.join(section)
+
+    module = types.ModuleType(name)
+    module.__file__ = file_path
+    exec(compile(source, file_path, 'exec'), module.__dict__)
+    return module
+
+
+@contextlib.contextmanager
+def patched(target, **attributes):
+    """Replaces attributes of a module or class for the duration of the block."""
+    originals = {attribute: getattr(target, attribute) for attribute in attributes}
+    for attribute, value in attributes.items():
+        setattr(target, attribute, value)
+    try:
+        yield
+    finally:
+        for attribute, value in originals.items():
+            setattr(target, attribute, value)
+
+
+def get_mpe_utils():
+    """
+    Returns mpe_utils loaded from its section of "sent frm lap", loading it on first use and registering it in
+    sys.modules. A missing dependency raises ImportError, failing the scenario.
+    """
+    mpe_utils = sys.modules.get('mpe_utils')
+    if mpe_utils is None or getattr(mpe_utils, '__file__', None) != os.path.join(REPO_DIR, SCRIPTS['mpe_utils'][0]):
+        mpe_utils = load_script('mpe_utils')
+        sys.modules['mpe_utils'] = mpe_utils
+    return mpe_utils
+
+
+@contextlib.contextmanager
+def offline_mpe_utils(fleet, approved_data=None):
+    """
+    Replaces the reporting table / email helpers of mpe_utils with counters.
+
+    Args:
+    fleet (fake_aws.FakeFleet): Fleet whose call counter records the calls as ('external', helper name).
+    approved_data (dict): RegRecTypeDt part to the rows get_data_from_url returns for it, e.g. approved ExecutableData;
+                          the first key contained in the requested RegRecTypeDt is used.
+    """
+    mu = get_mpe_utils()
+    approved_data = approved_data or {}
+
+    def external(helper, result=None):
+        def call(*args, **kwargs):
+            fleet.record_call('external', helper)
+            return result
+        return call
+
+    def get_data_from_url(*args, **kwargs):
+        fleet.record_call('external', 'get_data_from_url')
+        reg_rec_type_dt = kwargs.get('RegRecTypeDt') or ''
+        for key, rows in approved_data.items():
+            if key in reg_rec_type_dt:
+                return rows
+        return []
+
+    def send_email(*args, **kwargs):
+        fleet.record_call('external', 'send_email')
+        # As sent, the report attachments are deleted
+        for file_path in kwargs.get('attachments') or []:
+            mu.remove_report_attachment(file_path)
+
+    with patched(mu,
+                 get_data_from_url=get_data_from_url,
+                 post_data_to_url=external('post_data_to_url'),
+                 update_data_to_url=external('update_data_to_url'),
+                 get_itiative_execution_date=external('get_itiative_execution_date', ""),
+                 get_account_contact_details=external('get_account_contact_details', ("", "")),
+                 send_email=send_email,
+                 send_email_with_attachment=external('send_email_with_attachment'),
+                 get_splunk_destination_arn_region=lambda region: fleet.splunk_destination_arn):
+        yield mu
+
+
+def run_script_main(script, argv):
+    """Runs the main() of a loaded script with given command line arguments."""
+    with patched(sys, argv=[script.__name__] + argv):
+        script.main()
+
+
+# ---- scenarios: fleet -> short description of the result ----
+
+def scenario_rds_idle_report(fleet):
+    with offline_mpe_utils(fleet):
+        update_rds = load_script('update_rds')
+        update_rds.load_account_context()
+        update_rds.get_idle_rds_instances_detail(test="Y")
+    return f"{len(fleet.idle_arns)} idle instances"
+
+
+def scenario_log_groups_report(fleet):
+    with offline_mpe_utils(fleet):
+        update_log_groups = load_script('update_log_groups')
+        update_log_groups.get_log_groups_detail(30, test="Y")
+    return f"{len(fleet.log_groups)} log groups"
+
+
+def scenario_log_groups_update(fleet):
+    # Every 2nd log group is over 30 days, every 10th one of them has an exception with Splunk on
+    log_group_names = list(fleet.log_groups)
+    executable = [[name, str(fleet.log_groups[name].get('retentionInDays', "Never expire")), "N"] for name in log_group_names[::2]]
+    exceptions = [f"{name},90,Y" for name in log_group_names[::20]]
+    approved_data = {
+        'LOG_GROUP_UPDATE_EXCEPTIONS': [{'ExecutableData': json.dumps(exceptions)}],
+        'LOG_GROUP_UPDATE_E': [{'ExecutableData': json.dumps(executable)}],
+    }
+    with offline_mpe_utils(fleet, approved_data):
+        update_log_groups = load_script('update_log_groups')
+        update_log_groups.update_log_groups(30, splunk="N", test="Y")
+    updated = sum(1 for name, *_ in executable if fleet.log_groups[name].get('retentionInDays') in (30, 90))
+    return f"{updated}/{len(executable)} log groups updated"
+
+
+def scenario_given_log_groups(fleet):
+    # Anchored prefixes only, listed with logGroupNamePrefix instead of scanning the account
+    patterns = ["^/aws/lambda/service-1", "^/aws/rds/instance/service-42/,30,Y", "^/aws/lambda/service-12/"]
+    with offline_mpe_utils(fleet) as mu:
+        log_groups = mu.get_given_log_groups_with_retention(patterns)
+    return f"{len(log_groups)}/{len(fleet.log_groups)} log groups matched"
+
+
+def scenario_report_table(fleet):
+    # One row per log group, as in the log group reports
+    rows = [[name, str(log_group.get('retentionInDays', "Never expire")), "N"] for name, log_group in fleet.log_groups.items()]
+    mu = get_mpe_utils()
+    table_html = mu.get_table_html(["Log Group Name", "Retention in Days", "Transfer Logs to Splunk"], rows)
+    return f"{len(rows)} rows, {len(table_html) // 1024} KiB"
+
+
+def scenario_nat_audit(fleet):
+    run_script_main(load_script('manage_nat'), ["ALL"])
+    return f"{len(fleet.nat_gateways)} NAT Gateways"
+
+
+def scenario_elb_audit(fleet):
+    run_script_main(load_script('manage_elb'), ["-i", "all"])
+    return f"{len(fleet.load_balancers['elbv2']) + len(fleet.load_balancers['elb'])} load balancers"
+
+
+def scenario_rds_execution(fleet):
+    idle_instance_ids = fleet.get_idle_instance_ids()
+    # Every 3rd idle instance is terminated with backup, every 7th one is exempted by the App Owner
+    exceptions = [f"{db_instance_id},TWB" for db_instance_id in idle_instance_ids[::3]]
+    exceptions += [f"{db_instance_id},NA" for db_instance_id in idle_instance_ids[1::7]]
+    approved_data = {
+        'RDS_TERMINATION_EXCEPTIONS': [{'ExecutableData': exceptions}],
+        'RDS_TERMINATION_E': [{'ExecutableData': json.dumps([[db_instance_id] for db_instance_id in idle_instance_ids]),
+                               'ApprovedDate': "2000-01-01"}],
+    }
+    with offline_mpe_utils(fleet, approved_data):
+        update_rds = load_script('update_rds')
+        update_rds.load_account_context()
+        update_rds.process_rds_actions(input_type="T", action="TERMINATE", test="Y")
+    deleted = sum(1 for db_instance_id in idle_instance_ids if db_instance_id not in fleet.db_instances
+                  or fleet.db_instances[db_instance_id]['DBInstanceStatus'] == 'deleting')
+    return f"{deleted}/{len(idle_instance_ids)} approved instances deleted, " \
+           f"{len(fleet.db_snapshots) + len(fleet.db_cluster_snapshots)} final snapshots"
+
+
+def scenario_rds_startup(fleet):
+    # A fresh interpreter, so that the imports of the script and mpe_utils are measured too
+    completed = subprocess.run([sys.executable, os.path.abspath(__file__), '--startup-child', 'update_rds'],
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "startup child failed")
+    child = json.loads(completed.stdout.strip().splitlines()[-1])
+    for operation, count in child['calls'].items():
+        fleet.calls[tuple(operation.split('.', 1))] += count
+    aws_calls = {operation: count for operation, count in child['calls'].items() if not operation.startswith('external.')}
+    if aws_calls:
+        raise AssertionError(f"--help made AWS calls: {aws_calls}")
+    if child['startup_ms'] > STARTUP_MAX_MS:
+        raise AssertionError(f"--help took {child['startup_ms']} ms, over {STARTUP_MAX_MS} ms")
+    return f"--help in {child['startup_ms']} ms"
+
+
+def run_startup_child(name):
+    """
+    Loads a script and runs its main() with --help against an empty fleet, then prints the time it took and the AWS
+    calls it made as JSON. boto3 is already imported by fake_aws at that point, the rest of the imports (mpe_utils
+    included) are measured. A failed import is raised, failing the scenario.
+    """
+    fleet = fake_aws.FakeFleet(0)
+    result = {}
+    with tempfile.TemporaryDirectory(prefix="benchmark-") as work_dir, fake_aws.installed(fleet), \
+            open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        os.chdir(work_dir)
+        start = time.perf_counter()
+        try:
+            run_script_main(load_script(name), ['--help'])
+        except SystemExit:
+            pass
+        result['startup_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        os.chdir(BENCHMARKS_DIR)
+    result['calls'] = {f"{service}.{operation}": count for (service, operation), count in fleet.calls.items()}
+    print(json.dumps(result))
+
+
+SCENARIOS = {
+    'rds_idle_report': scenario_rds_idle_report,
+    'log_groups_report': scenario_log_groups_report,
+    'log_groups_update': scenario_log_groups_update,
+    'given_log_groups': scenario_given_log_groups,
+    'report_table': scenario_report_table,
+    'nat_audit': scenario_nat_audit,
+    'elb_audit': scenario_elb_audit,
+    'rds_execution': scenario_rds_execution,
+    'rds_startup': scenario_rds_startup,
+}
+
+
+def warm_up():
+    """Imports the heavy dependencies of the scripts once, so that the first scenario does not pay for them."""
+    import rds_utilization
+    get_mpe_utils()
+
+
+def reset_process_state(fleet):
+    """Drops the process-wide caches and registries, so that every run starts cold against its own fleet."""
+    # Imported here, not at module level, so that the startup child process measures their import
+    import aws_clients
+    import config_registry
+    import cost_explorer_cache
+    import execution_journal
+    import log_group_inventory
+    import log_group_updater
+    import rds_inventory
+    import rds_state_poller
+    aws_clients.clear_clients()
+    config_registry.invalidate()
+    rds_inventory.invalidate_rds_inventory()
+    log_group_inventory.invalidate_log_group_inventory()
+    cost_explorer_cache.clear_monthly_costs()
+    log_group_updater.set_rate_limit('put_retention_policy', LOGS_WRITE_TPS)
+    log_group_updater.set_rate_limit('put_subscription_filter', LOGS_WRITE_TPS)
+    with execution_journal._journals_lock:
+        execution_journal._journals.clear()
+    with rds_state_poller._pollers_lock:
+        rds_state_poller._pollers.clear()
+        poller_client = fake_aws.FakeClient(fleet, 'rds')
+        rds_state_poller._pollers[aws_clients.get_client_key(poller_client)] = rds_state_poller.RdsStatePoller(
+            poller_client, min_interval=POLL_INTERVAL, max_interval=POLL_INTERVAL * 4)
+
+
+def run_scenario(name, size):
+    """
+    Runs one scenario against a new fleet of given size, in a scratch working directory (./cache, journals, plans).
+
+    Returns:
+    dict: 'scenario', 'size', 'status' (ok/error), 'detail', 'wall_time_s', 'peak_memory_mb', 'aws_calls'
+          and 'calls_by_operation' ({'service.operation': count}).
+    """
+    fleet = fake_aws.FakeFleet(size)
+    result = {'scenario': name, 'size': size}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="benchmark-") as work_dir, fake_aws.installed(fleet), \
+            open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        os.chdir(work_dir)
+        reset_process_state(fleet)
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            result.update(status='ok', detail=SCENARIOS[name](fleet))
+        except Exception as e:
+            logging.exception(f"Scenario {name} failed for {size} resources")
+            result.update(status='error', detail=f"{type(e).__name__}: {e}")
+        result['wall_time_s'] = round(time.perf_counter() - start, 3)
+        result['peak_memory_mb'] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 2)
+        tracemalloc.stop()
+        os.chdir(cwd)
+
+    calls = {f"{service}.{operation}": count for (service, operation), count in fleet.calls.most_common()}
+    result['aws_calls'] = sum(count for key, count in calls.items() if not key.startswith('external.'))
+    result['calls_by_operation'] = calls
+    return result
+
+
+def print_results(results):
+    """Prints one row per scenario and size, followed by the AWS calls per operation."""
+    print(f"{'Scenario':<20} {'Size':>6} {'Status':<8} {'Wall (s)':>9} {'Peak (MB)':>10} {'AWS calls':>10}  Detail")
+    for result in results:
+        print(f"{result['scenario']:<20} {result['size']:>6} {result['status']:<8} {result['wall_time_s']:>9.3f} "
+              f"{result['peak_memory_mb']:>10.2f} {result['aws_calls']:>10}  {result['detail']}")
+        if result['status'] == 'ok':
+            for operation, count in result['calls_by_operation'].items():
+                print(f"{'':<29}{operation:<48} {count:>8}")
+
+
+def compare_with_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compares the results with an earlier run: more AWS calls, or wall time / peak memory grown by more than
+    tolerance, is a regression.
+
+    Returns:
+    list: Regression messages, empty if there is none.
+    """
+    baseline_results = {(result['scenario'], result['size']): result for result in baseline}
+    regressions = []
+    for result in results:
+        previous = baseline_results.get((result['scenario'], result['size']))
+        if not previous or result['status'] != 'ok' or previous['status'] != 'ok':
+            continue
+        label = f"{result['scenario']} ({result['size']})"
+        for operation, count in result['calls_by_operation'].items():
+            previous_count = previous['calls_by_operation'].get(operation, 0)
+            if count > previous_count:
+                regressions.append(f"{label}: {operation} calls {previous_count} -> {count}")
+        for metric in ['wall_time_s', 'peak_memory_mb']:
+            if result[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{label}: {metric} {previous[metric]} -> {result[metric]}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scale benchmarks of the FinOps report and execution paths")
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Fleet sizes (default: 100 1000 10000)")
+    parser.add_argument('-c', '--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS), help="Scenarios to run (default: all)")
+    parser.add_argument('-j', '--json', help="Save the results to this JSON file")
+    parser.add_argument('-b', '--baseline', help="Compare with the results JSON of an earlier run, exit code 1 on a regression")
+    parser.add_argument('-t', '--tolerance', type=float, default=DEFAULT_TOLERANCE, help="Allowed wall time/peak memory growth over the baseline (default: 0.25)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Show the log messages of the scripts")
+    parser.add_argument('--startup-child', choices=list(SCRIPTS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.startup_child:
+        run_startup_child(args.startup_child)
+        return
+
+    # The scripts log every resource, which would dominate the measured time
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+
+    warm_up()
+    results = []
+    for size in args.sizes:
+        for name in args.scenarios:
+            results.append(run_scenario(name, size))
+            print(f"{name} ({size}): {results[-1]['status']} in {results[-1]['wall_time_s']}s", file=sys.stderr)
+    print_results(results)
+
+    if args.json:
+        if os.path.dirname(args.json):
+            os.makedirs(os.path.dirname(args.json), exist_ok=True)
+        with open(args.json, 'w') as file:
+            json.dump({'generated_at': datetime.now().isoformat(timespec='seconds'), 'results': results}, file, indent=2)
+        print(f"✅ Results saved to {args.json}")
+
+    failed = [f"{result['scenario']} ({result['size']})" for result in results if result['status'] != 'ok']
+    if failed:
+        print(f"❌ Failed scenarios: {', '.join(failed)}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            regressions = compare_with_baseline(results, json.load(file)['results'], args.tolerance)
+        for regression in regressions:
+            print(f"❌ Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        print("✅ No regression against the baseline")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Desc: importable Cloudability API client - logs in to frontdoor.apptio.com once, caches the apptio-opentoken until expiry,
+reuses one pooled requests.Session with retry/backoff and is shared across products (rds, ec2, ebs) and accounts in one process.
+The view API keys are read through the secrets lookup passed by the caller (its own utils module), this module imports none.
+
+Usage Ex:
+    import cloudability_client
+    client = cloudability_client.get_cloudability_client(mu.get_cloudability_secrets_by_view, view_name="GBS_ALL")
+    try:
+        recommendations = client.get_rightsizing_recommendations(product="rds", vendor_account_ids="675440017561")
+    except cloudability_client.CloudabilityError as e:
+        print(f"❌ {e}")
+
+    # Large views - records are fetched page by page and yielded one at a time
+    for recommendation in client.iter_rightsizing_recommendations(product="rds", vendor_account_ids="675440017561"):
+        ...
+    client.export_rightsizing_csv(product="rds", vendor_account_ids="675440017561", file_path="cloudability-rds-rightsizing.csv")
+
+    # Many accounts - account ids are sent in chunks and the records are partitioned by vendorAccountId
+    recommendations_by_account = client.get_recommendations_by_account(product="rds", account_ids=["675440017561", "876055497336"])
+"""
+import csv
+import io
+import logging
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from urllib3.util.retry import Retry
+
+FRONTDOOR_LOGIN_URL = "https://frontdoor.apptio.com/service/apikeylogin"
+RIGHTSIZING_API_URL = "https://api.cloudability.com/v3/rightsizing/aws/recommendations/{product}"
+ENV_ID = "8207c224-4499-4cbf-b63d-537d61bb2582"
+VIEW_ID = 1467480
+
+# Token is refreshed before the frontdoor session expires, and on any 401
+TOKEN_TTL_SECONDS = 50 * 60
+REQUEST_TIMEOUT_SECONDS = 120
+# Resources requested per page by the paginated fetch
+PAGE_SIZE = 1000
+# Account ids sent in one vendorAccountIds filter by the multi-account fetch
+ACCOUNTS_PER_REQUEST = 50
+
+# view_name -> CloudabilityClient
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class CloudabilityError(Exception):
+    """Raised when Cloudability authentication or an API call fails after retries."""
+
+
+def _get_charset(headers, default='utf-8'):
+    """
+    Returns the charset of the Content-Type header, default when it carries none - requests would report ISO-8859-1
+    for any text/* response without a charset.
+    """
+    for parameter in headers.get('Content-Type', '').split(';')[1:]:
+        name, _, value = parameter.partition('=')
+        if name.strip().lower() == 'charset' and value.strip():
+            return value.strip().strip('"\'')
+    return default
+
+
+class CloudabilityClient:
+    """
+    Cloudability API client with a cached apptio-opentoken and a pooled, retrying HTTP session.
+    Safe to share between threads.
+    """
+
+    def __init__(self, get_secrets, view_name="GBS_ALL", env_id=ENV_ID, max_retries=5, backoff_factor=1.0,
+                 pool_size=10, timeout=REQUEST_TIMEOUT_SECONDS):
+        """
+        Args:
+        get_secrets (callable): Called as get_secrets(view_name=...), returns the (public key, secret key) of the view,
+            e.g. mu.get_cloudability_secrets_by_view.
+        view_name (str): Cloudability view whose API keys are used. Default is "GBS_ALL".
+        env_id (str): Apptio environment id. Default is ENV_ID.
+        max_retries (int): Retries on connection errors, 429 and 5xx responses. Default is 5.
+        backoff_factor (float): Exponential backoff factor between retries in seconds. Default is 1.0.
+        pool_size (int): Connections kept open in the pool. Default is 10.
+        timeout (int): Request timeout in seconds. Default is REQUEST_TIMEOUT_SECONDS.
+        """
+        self.get_secrets = get_secrets
+        self.view_name = view_name
+        self.env_id = env_id
+        self.timeout = timeout
+        self._token = None
+        self._token_expiry = 0
+        self._token_lock = threading.Lock()
+
+        retry = Retry(total=max_retries, backoff_factor=backoff_factor,
+                      status_forcelist=[429, 500, 502, 503, 504],
+                      allowed_methods=["GET", "POST"], respect_retry_after_header=True,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+
+    def _login(self):
+        """Logs in to frontdoor with the view API keys and returns the apptio-opentoken."""
+        public_key, secret_key = self.get_secrets(view_name=self.view_name)
+        auth_response = self._send("post", FRONTDOOR_LOGIN_URL, json={'keyAccess': public_key, 'keySecret': secret_key})
+        if auth_response.status_code != 200:
+            raise CloudabilityError(f"Authentication failed: {auth_response.status_code} {auth_response.text}")
+        token = auth_response.headers.get('apptio-opentoken')
+        if not token:
+            raise CloudabilityError("Authentication token not found!")
+        logging.info(f"Cloudability authentication successful for view {self.view_name}")
+        return token
+
+    def get_token(self, refresh=False):
+        """
+        Returns the cached apptio-opentoken, logging in only when it is missing, expired or refresh is requested.
+
+        Args:
+        refresh (bool): If True, logs in again even if the cached token has not expired. Default is False.
+
+        Returns:
+        str: apptio-opentoken.
+        """
+        with self._token_lock:
+            if refresh or not self._token or time.time() >= self._token_expiry:
+                self._token = self._login()
+                self._token_expiry = time.time() + TOKEN_TTL_SECONDS
+            return self._token
+
+    def _send(self, method, url, **kwargs):
+        """Sends a request through the pooled session, a connection failure left after the retries is a CloudabilityError."""
+        try:
+            return self.session.request(method, url, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            raise CloudabilityError(f"{method.upper()} {url} failed: {e}") from e
+
+    def get_headers(self, refresh_token=False):
+        """Returns the headers of an authenticated Cloudability API call."""
+        return {
+            'apptio-opentoken': self.get_token(refresh=refresh_token),
+            'Content-Type': 'application/json',
+            'apptio-current-environment': self.env_id
+        }
+
+    def get(self, url, params=None, headers=None, **kwargs):
+        """
+        Authenticated GET through the pooled session; logs in again once if the token was rejected.
+
+        Args:
+        url (str): API URL.
+        params (dict): Query parameters.
+        headers (dict): Extra headers, e.g. {'Accept': 'text/csv'}.
+
+        Returns:
+        requests.Response: Successful (200) response.
+        """
+        response = self._send("get", url, headers={**self.get_headers(), **(headers or {})}, params=params, **kwargs)
+        if response.status_code in (401, 403):
+            logging.info("Cloudability token rejected, logging in again")
+            response.close()
+            response = self._send("get", url, headers={**self.get_headers(refresh_token=True), **(headers or {})},
+                                  params=params, **kwargs)
+        if response.status_code != 200:
+            raise CloudabilityError(f"API call failed: {response.status_code} {response.text}")
+        return response
+
+    def _get_rightsizing_params(self, product, vendor_account_ids, basis, limit, offset, max_recs_per_resource,
+                                duration, view_id):
+        """Returns the query parameters of a rightsizing recommendations call."""
+        return {
+            'vendorAccountIds': vendor_account_ids,
+            'basis': basis,
+            'limit': limit,
+            'maxRecsPerResource': max_recs_per_resource,
+            'offset': offset,
+            'product': product,
+            'duration': duration,
+            'viewId': view_id
+        }
+
+    def _get_rightsizing_page(self, product, vendor_account_ids, offset, page_size, **kwargs):
+        """Returns the 'result' records of one page of rightsizing recommendations."""
+        api_params = self._get_rightsizing_params(product, vendor_account_ids, limit=page_size, offset=offset, **kwargs)
+        response = self.get(RIGHTSIZING_API_URL.format(product=product), params=api_params)
+        try:
+            return response.json().get('result', [])
+        except ValueError as e:
+            raise CloudabilityError(f"API response is not valid JSON: {e}") from e
+
+    def _iter_rightsizing_pages(self, first_page, product, vendor_account_ids, page_size, **kwargs):
+        """Yields the records of first_page and of every following page until a short page is returned."""
+        page, offset = first_page, 0
+        while True:
+            yield from page
+            if len(page) < page_size:
+                break
+            offset += page_size
+            page = self._get_rightsizing_page(product, vendor_account_ids, offset, page_size, **kwargs)
+            logging.info(f"Cloudability {product} recommendations page at offset {offset}: {len(page)} records")
+
+    def iter_rightsizing_recommendations(self, product, vendor_account_ids, basis="effective", page_size=PAGE_SIZE,
+                                         max_recs_per_resource=1, duration="thirty-day", view_id=VIEW_ID):
+        """
+        Returns a generator of the AWS rightsizing recommendation records of a product, fetched page by page
+        (offset/limit) so that only one page is held in memory. The first page is fetched before returning,
+        so authentication and API errors are raised by this call.
+
+        Args:
+        product (str): Cloudability product, e.g. "rds", "ec2", "ebs".
+        vendor_account_ids (str): AWS account id, or comma separated account ids.
+        basis (str): Cost basis, "effective" or "on-demand" (EBS supports only "on-demand"). Default is "effective".
+        page_size (int): Resources requested per page. Default is PAGE_SIZE.
+        max_recs_per_resource (int): Recommendations per resource. Default is 1.
+        duration (str): Lookback duration. Default is "thirty-day".
+        view_id (int): Cloudability view id. Default is VIEW_ID.
+
+        Returns:
+        generator: 'result' records of all the pages.
+        """
+        kwargs = {'basis': basis, 'max_recs_per_resource': max_recs_per_resource, 'duration': duration,
+                  'view_id': view_id}
+        first_page = self._get_rightsizing_page(product, vendor_account_ids, 0, page_size, **kwargs)
+        return self._iter_rightsizing_pages(first_page, product, vendor_account_ids, page_size, **kwargs)
+
+    def get_rightsizing_recommendations(self, product, vendor_account_ids, basis="effective", **kwargs):
+        """
+        Returns all the AWS rightsizing recommendation records of a product as a list,
+        see iter_rightsizing_recommendations for the arguments.
+        """
+        return list(self.iter_rightsizing_recommendations(product, vendor_account_ids, basis=basis, **kwargs))
+
+    def get_recommendations_by_account(self, product, account_ids, basis="effective", chunk_size=ACCOUNTS_PER_REQUEST,
+                                       **kwargs):
+        """
+        Returns the AWS rightsizing recommendations of many accounts, requesting chunk_size account ids per
+        call (comma separated vendorAccountIds) and partitioning the records locally by vendorAccountId.
+
+        Args:
+        product (str): Cloudability product, e.g. "rds", "ec2", "ebs".
+        account_ids (list): AWS account ids.
+        basis (str): Cost basis, "effective" or "on-demand". Default is "effective".
+        chunk_size (int): Account ids per call. Default is ACCOUNTS_PER_REQUEST.
+        kwargs: See iter_rightsizing_recommendations.
+
+        Returns:
+        dict: Account id to list of its records; every requested account id is present, with [] when it has no records.
+        """
+        account_ids = [str(account_id) for account_id in account_ids]
+        recommendations_by_account = {account_id: [] for account_id in account_ids}
+        for start in range(0, len(account_ids), chunk_size):
+            vendor_account_ids = ",".join(account_ids[start:start + chunk_size])
+            for record in self.iter_rightsizing_recommendations(product, vendor_account_ids, basis=basis, **kwargs):
+                recommendations_by_account.setdefault(str(record.get('vendorAccountId')), []).append(record)
+        logging.info(f"Cloudability {product} recommendations fetched for {len(account_ids)} accounts in chunks of {chunk_size}")
+        return recommendations_by_account
+
+    def iter_rightsizing_csv_rows(self, product, vendor_account_ids, basis="effective", page_size=PAGE_SIZE,
+                                  max_recs_per_resource=1, duration="thirty-day", view_id=VIEW_ID):
+        """
+        Yields the AWS rightsizing recommendations of a product in the CSV response format, page by page.
+        Each page is streamed and parsed record by record, so peak memory stays bounded regardless of fleet size.
+
+        Args:
+        See iter_rightsizing_recommendations.
+
+        Returns:
+        generator: CSV rows as lists; the header row is yielded once, first.
+        """
+        url = RIGHTSIZING_API_URL.format(product=product)
+        offset = 0
+        header_sent = False
+        while True:
+            api_params = self._get_rightsizing_params(product, vendor_account_ids, basis, page_size, offset,
+                                                      max_recs_per_resource, duration, view_id)
+            row_count = 0
+            with self.get(url, params=api_params, headers={'Accept': 'text/csv'}, stream=True) as response:
+                # csv.reader splits the records itself, so quoted newlines stay inside their field
+                response.raw.decode_content = True
+                text_stream = io.TextIOWrapper(response.raw, encoding=_get_charset(response.headers), newline='')
+                reader = csv.reader(text_stream)
+                try:
+                    header = next(reader, None)
+                    if header and not header_sent:
+                        header_sent = True
+                        yield header
+                    for row in reader:
+                        row_count += 1
+                        yield row
+                except (Urllib3HTTPError, OSError) as e:
+                    raise CloudabilityError(f"CSV download failed at offset {offset}: {e}") from e
+            logging.info(f"Cloudability {product} CSV page at offset {offset}: {row_count} rows")
+            if row_count < page_size:
+                break
+            offset += page_size
+
+    def export_rightsizing_csv(self, product, vendor_account_ids, file_path, **kwargs):
+        """
+        Streams the AWS rightsizing recommendations of a product into a CSV file,
+        e.g. for cloudability_rightsizing.load_rightsizing_export.
+
+        Args:
+        product (str): Cloudability product, e.g. "rds", "ec2", "ebs".
+        vendor_account_ids (str): AWS account id, or comma separated account ids.
+        file_path (str): CSV file to write.
+        kwargs: See iter_rightsizing_recommendations.
+
+        Returns:
+        int: Number of records written.
+        """
+        record_count = -1
+        with open(file_path, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            for row in self.iter_rightsizing_csv_rows(product, vendor_account_ids, **kwargs):
+                writer.writerow(row)
+                record_count += 1
+        logging.info(f"Exported {max(record_count, 0)} Cloudability {product} recommendations to {file_path}")
+        return max(record_count, 0)
+
+def get_cloudability_client(get_secrets, view_name="GBS_ALL"):
+    """
+    Returns the process-wide CloudabilityClient of a view, creating it on first use.
+
+    Args:
+    get_secrets (callable): Secrets lookup of the caller's utils module, see CloudabilityClient.
+    view_name (str): Cloudability view whose API keys are used. Default is "GBS_ALL".
+
+    Returns:
+    CloudabilityClient: Shared client.
+    """
+    with _clients_lock:
+        if view_name not in _clients:
+            _clients[view_name] = CloudabilityClient(get_secrets, view_name=view_name)
+        return _clients[view_name]
@@ -0,0 +1,228 @@
+"""
+Desc: importable local rightsizing engine over the Cloudability rightsizing CSV export (e.g. cloudability-rds-rightsizing.csv)
+- loads the export into columnar NumPy arrays and computes termination/rightsize candidates, risk filters and
+savings totals with vectorized operations, so what-if analysis on org-wide exports needs no row-by-row Python.
+
+Usage Ex:
+    python cloudability_rightsizing.py -f cloudability-rds-rightsizing.csv
+    python cloudability_rightsizing.py -f cloudability-rds-rightsizing.csv -r Terminate --max-risk 0 -g "Account Identifier"
+    python cloudability_rightsizing.py -f cloudability-rds-rightsizing.csv --what-if --cpu-max 10 --connections-max 0
+
+    import cloudability_rightsizing as cr
+    table = cr.load_rightsizing_export("cloudability-rds-rightsizing.csv")
+    mask = cr.get_candidates(table, recommendation="Rightsize", max_risk=0)
+    print(cr.get_savings_summary(table, mask))
+"""
+import argparse
+import csv
+import logging
+from operator import itemgetter
+import numpy as np
+
+# Columns loaded by default - the rest of the ~70 columns (mostly tags) are skipped to keep memory low
+DEFAULT_COLUMNS = [
+    'Cluster ID', 'Resource ID', 'Resource Name', 'Account Name', 'Account Identifier', 'ClusterRole', 'Engine',
+    'Instance Type - Current', 'Idle', 'Hours Running', 'CPU Max', 'Memory Max', 'IOPS Max', 'Storage Throughput Max',
+    'Connections Max', 'Effective Rate - Current', 'Cost', 'Recommendation', 'Instance Type - Recommended', 'Risk',
+    'Effective Rate - Recommended', 'Savings', 'Savings Percent'
+]
+NUMERIC_COLUMNS = {
+    'Idle', 'Hours Running', 'CPU Max', 'Memory Max', 'IOPS Max', 'Storage Throughput Max', 'Connections Max',
+    'Effective Rate - Current', 'Cost', 'Risk', 'Effective Rate - Recommended', 'Savings', 'Savings Percent'
+}
+# Values Cloudability uses for "no value" in numeric columns
+MISSING_VALUES = {'', 'N/A'}
+
+
+def _to_float(values):
+    """Converts a column of strings to float64, missing values become NaN."""
+    return np.array([np.nan if value.strip() in MISSING_VALUES else float(value) for value in values], dtype=float)
+
+
+def load_rightsizing_export(file_path, columns=None):
+    """
+    Loads a Cloudability rightsizing CSV export into columnar NumPy arrays. The file is parsed once with csv.reader,
+    keeping only the wanted columns of every row, and each column is converted on its own.
+
+    Args:
+    file_path (str): Path of the CSV export.
+    columns (list): Columns to load. Default is DEFAULT_COLUMNS; columns missing from the export are skipped.
+
+    Returns:
+    dict: Table with 'rows' (int) and 'columns' (dict of column name to NumPy array) keys;
+          NUMERIC_COLUMNS are float64 with NaN for missing values, the others are object arrays of strings.
+    """
+    wanted = columns or DEFAULT_COLUMNS
+    with open(file_path, newline='', encoding='utf-8') as csv_file:
+        reader = csv.reader(csv_file)
+        header = next(reader, [])
+        column_indexes = [header.index(column) for column in wanted if column in header]
+        column_names = [header[index] for index in column_indexes]
+        skipped = [column for column in wanted if column not in header]
+        if skipped:
+            logging.warning(f"Columns not found in {file_path}: {skipped}")
+
+        # One tuple of the wanted values per row; rows shorter than the header are padded, blank lines are skipped
+        rows = []
+        if column_indexes:
+            get_values = itemgetter(*column_indexes) if len(column_indexes) > 1 else lambda row: (row[column_indexes[0]],)
+            width = max(column_indexes) + 1
+            rows = [get_values(row if len(row) >= width else row + [''] * (width - len(row))) for row in reader if row]
+
+    column_values = list(zip(*rows)) if rows else [()] * len(column_names)
+    table_columns = {}
+    for column_name, values in zip(column_names, column_values):
+        table_columns[column_name] = _to_float(values) if column_name in NUMERIC_COLUMNS else np.array(values, dtype=object)
+
+    logging.info(f"Loaded {len(rows)} rows x {len(column_names)} columns from {file_path}")
+    return {'rows': len(rows), 'columns': table_columns}
+
+
+def get_candidates(table, recommendation=None, max_risk=None, min_savings=None, account_ids=None, engines=None):
+    """
+    Returns the row mask of the recommendations matching all given filters.
+
+    Args:
+    table (dict): Table as returned by load_rightsizing_export.
+    recommendation (str): 'Terminate', 'Rightsize' or 'No Action'. All recommendations when not passed.
+    max_risk (float): Highest Risk allowed. No risk filter when not passed.
+    min_savings (float): Lowest Savings allowed. No savings filter when not passed.
+    account_ids (list): Account Identifiers to keep. All accounts when not passed.
+    engines (list): Engines to keep, e.g. ['Aurora MySQL']. All engines when not passed.
+
+    Returns:
+    numpy.ndarray: Boolean mask with one entry per row.
+    """
+    columns = table['columns']
+    mask = np.ones(table['rows'], dtype=bool)
+    if recommendation:
+        mask &= columns['Recommendation'] == recommendation
+    with np.errstate(invalid='ignore'):
+        if max_risk is not None:
+            mask &= columns['Risk'] <= max_risk
+        if min_savings is not None:
+            mask &= columns['Savings'] >= min_savings
+    if account_ids:
+        mask &= np.isin(columns['Account Identifier'], [str(account_id) for account_id in account_ids])
+    if engines:
+        mask &= np.isin(columns['Engine'], engines)
+    return mask
+
+
+def get_what_if_candidates(table, cpu_max=None, memory_max=None, connections_max=None):
+    """
+    Returns the row mask of the resources whose observed maximums are within the what-if thresholds,
+    independent of the Cloudability recommendation.
+
+    Args:
+    table (dict): Table as returned by load_rightsizing_export.
+    cpu_max (float): Highest CPU Max (%) allowed. No CPU filter when not passed.
+    memory_max (float): Highest Memory Max (%) allowed. No memory filter when not passed.
+    connections_max (float): Highest Connections Max allowed. No connections filter when not passed.
+
+    Returns:
+    numpy.ndarray: Boolean mask with one entry per row; rows without data for a used threshold are excluded.
+    """
+    columns = table['columns']
+    mask = np.ones(table['rows'], dtype=bool)
+    with np.errstate(invalid='ignore'):
+        if cpu_max is not None:
+            mask &= columns['CPU Max'] <= cpu_max
+        if memory_max is not None:
+            mask &= columns['Memory Max'] <= memory_max
+        if connections_max is not None:
+            mask &= columns['Connections Max'] <= connections_max
+    return mask
+
+
+def get_savings_summary(table, mask=None, group_by=None):
+    """
+    Returns count, savings and cost totals of the selected rows, optionally grouped by a column.
+
+    Args:
+    table (dict): Table as returned by load_rightsizing_export.
+    mask (numpy.ndarray): Row mask, see get_candidates. All rows when not passed.
+    group_by (str): Column to group by, e.g. 'Account Identifier' or 'Recommendation'. No grouping when not passed.
+
+    Returns:
+    list: [group, count, savings, cost] rows sorted by savings descending (group is 'ALL' when not grouped).
+    """
+    columns = table['columns']
+    if mask is None:
+        mask = np.ones(table['rows'], dtype=bool)
+    savings = np.nan_to_num(columns['Savings'][mask])
+    cost = np.nan_to_num(columns['Cost'][mask])
+
+    if not group_by:
+        return [['ALL', int(mask.sum()), round(float(savings.sum()), 2), round(float(cost.sum()), 2)]]
+
+    groups, group_index = np.unique(columns[group_by][mask], return_inverse=True)
+    counts = np.bincount(group_index, minlength=len(groups))
+    savings_totals = np.bincount(group_index, weights=savings, minlength=len(groups))
+    cost_totals = np.bincount(group_index, weights=cost, minlength=len(groups))
+
+    order = np.argsort(-savings_totals)
+    return [
+        [str(groups[i]), int(counts[i]), round(float(savings_totals[i]), 2), round(float(cost_totals[i]), 2)]
+        for i in order
+    ]
+
+
+def get_rows(table, mask, columns=None, top_n=None):
+    """
+    Returns the selected rows as a list of lists (e.g. for mu.get_table_html or mu.create_csv_file), highest savings first.
+
+    Args:
+    table (dict): Table as returned by load_rightsizing_export.
+    mask (numpy.ndarray): Row mask, see get_candidates.
+    columns (list): Columns to return. Default is Resource Name, Account Identifier, Engine, current/recommended type, Risk and Savings.
+    top_n (int): Maximum number of rows returned. All rows when not passed.
+
+    Returns:
+    list: Rows of the selected columns.
+    """
+    columns = columns or ['Resource Name', 'Account Identifier', 'Engine', 'Instance Type - Current',
+                          'Recommendation', 'Instance Type - Recommended', 'Risk', 'Savings']
+    row_indexes = np.flatnonzero(mask)
+    row_indexes = row_indexes[np.argsort(-np.nan_to_num(table['columns']['Savings'][row_indexes]), kind='stable')]
+    if top_n:
+        row_indexes = row_indexes[:top_n]
+    selected = [table['columns'][column][row_indexes].tolist() for column in columns]
+    return [list(row) for row in zip(*selected)]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="This script summarizes rightsizing/termination candidates and savings from a Cloudability rightsizing CSV export.",
+        epilog="Example usage: python cloudability_rightsizing.py -f cloudability-rds-rightsizing.csv -r Terminate --max-risk 0"
+    )
+    parser.add_argument("-f", "--file", required=True, help="Cloudability rightsizing CSV export")
+    parser.add_argument("-r", "--recommendation", choices=["Terminate", "Rightsize", "No Action"], help="Recommendation to keep")
+    parser.add_argument("--max-risk", type=float, help="Highest Risk to keep")
+    parser.add_argument("--min-savings", type=float, help="Lowest Savings to keep")
+    parser.add_argument("-a", "--accounts", nargs="+", help="Account Identifiers to keep")
+    parser.add_argument("-g", "--group-by", default="Recommendation", help="Column to group the savings summary by")
+    parser.add_argument("--what-if", action="store_true", help="Select by observed maximums instead of the Cloudability recommendation")
+    parser.add_argument("--cpu-max", type=float, help="What-if: highest CPU Max (%%)")
+    parser.add_argument("--memory-max", type=float, help="What-if: highest Memory Max (%%)")
+    parser.add_argument("--connections-max", type=float, help="What-if: highest Connections Max")
+    parser.add_argument("-n", "--top", type=int, default=20, help="Number of top resources to print")
+    args = parser.parse_args()
+
+    table = load_rightsizing_export(args.file)
+    mask = get_candidates(table, recommendation=args.recommendation, max_risk=args.max_risk,
+                          min_savings=args.min_savings, account_ids=args.accounts)
+    if args.what_if:
+        mask &= get_what_if_candidates(table, cpu_max=args.cpu_max, memory_max=args.memory_max,
+                                       connections_max=args.connections_max)
+
+    print(f"Selected {int(mask.sum())}/{table['rows']} resources")
+    for group, count, savings, cost in get_savings_summary(table, mask, group_by=args.group_by):
+        print(f"{group}: count={count}, savings=${savings}, cost=${cost}")
+    print(f"Top {args.top} resources by savings:")
+    for row in get_rows(table, mask, top_n=args.top):
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
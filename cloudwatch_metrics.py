@@ -0,0 +1,140 @@
+"""
+Desc: importable bulk CloudWatch metrics fetcher - replaces one get_metric_statistics call per resource
+with get_metric_data requests carrying up to 500 metric queries each.
+
+Usage Ex:
+    import cloudwatch_metrics
+    connections = cloudwatch_metrics.get_average_db_connections(["database-1-instance-1", "database-2"], days=30)
+    print(connections["database-1-instance-1"])
+"""
+import logging
+from datetime import datetime, timedelta
+import boto3
+
+# get_metric_data accepts at most 500 MetricDataQueries per request
+MAX_QUERIES_PER_REQUEST = 500
+
+
+def build_metric_query(query_id, namespace, metric_name, dimensions, stat="Average", period=86400):
+    """
+    Builds one MetricDataQueries entry for get_metric_data.
+
+    Args:
+    query_id (str): Query id, must start with a lower case letter.
+    namespace (str): Metric namespace, e.g. 'AWS/RDS'.
+    metric_name (str): Metric name, e.g. 'DatabaseConnections'.
+    dimensions (dict): Dimension name to value, e.g. {'DBInstanceIdentifier': 'database-1'}.
+    stat (str): Statistic to return. Default is 'Average'.
+    period (int): Period in seconds. Default is 86400 (one data point per day).
+
+    Returns:
+    dict: MetricDataQueries entry.
+    """
+    return {
+        'Id': query_id,
+        'MetricStat': {
+            'Metric': {
+                'Namespace': namespace,
+                'MetricName': metric_name,
+                'Dimensions': [{'Name': name, 'Value': value} for name, value in dimensions.items()]
+            },
+            'Period': period,
+            'Stat': stat
+        },
+        'ReturnData': True
+    }
+
+
+def get_metric_data_bulk(metric_queries, start_time, end_time, client=None):
+    """
+    Runs the metric queries through get_metric_data, MAX_QUERIES_PER_REQUEST queries per request,
+    following NextToken on every request.
+
+    Args:
+    metric_queries (list): MetricDataQueries entries, see build_metric_query.
+    start_time (datetime): Start of the time range.
+    end_time (datetime): End of the time range.
+    client: Boto3 CloudWatch client. Default client is created when not passed.
+
+    Returns:
+    dict: Query id to {'Timestamps': [...], 'Values': [...]} with the data points of all pages.
+    """
+    if client is None:
+        client = boto3.client('cloudwatch')
+
+    results = {query['Id']: {'Timestamps': [], 'Values': []} for query in metric_queries}
+    request_count = 0
+    for start in range(0, len(metric_queries), MAX_QUERIES_PER_REQUEST):
+        request = {
+            'MetricDataQueries': metric_queries[start:start + MAX_QUERIES_PER_REQUEST],
+            'StartTime': start_time,
+            'EndTime': end_time
+        }
+        while True:
+            response = client.get_metric_data(**request)
+            request_count += 1
+            for metric_result in response.get('MetricDataResults', []):
+                result = results[metric_result['Id']]
+                result['Timestamps'].extend(metric_result.get('Timestamps', []))
+                result['Values'].extend(metric_result.get('Values', []))
+            next_token = response.get('NextToken')
+            if not next_token:
+                break
+            request['NextToken'] = next_token
+
+    logging.info(f"get_metric_data returned {len(metric_queries)} metric queries in {request_count} requests")
+    return results
+
+
+def get_rds_metric_values(rds_instance_ids, metric_name, days=7, stat="Average", period=86400, client=None):
+    """
+    Returns the data point values of one AWS/RDS metric for every given RDS instance.
+
+    Args:
+    rds_instance_ids (list): RDS instance identifiers.
+    metric_name (str): AWS/RDS metric name, e.g. 'DatabaseConnections'.
+    days (int): Number of days back from now. Default is 7.
+    stat (str): Statistic to return. Default is 'Average'.
+    period (int): Period in seconds. Default is 86400.
+    client: Boto3 CloudWatch client. Default client is created when not passed.
+
+    Returns:
+    dict: RDS instance identifier to list of data point values.
+    """
+    end_time = datetime.now()
+    start_time = end_time - timedelta(days=days)
+
+    # Query ids are positional since instance identifiers may contain '-'
+    metric_queries = [
+        build_metric_query(f"m{index}", 'AWS/RDS', metric_name, {'DBInstanceIdentifier': rds_instance_id}, stat, period)
+        for index, rds_instance_id in enumerate(rds_instance_ids)
+    ]
+    results = get_metric_data_bulk(metric_queries, start_time, end_time, client)
+    return {
+        rds_instance_id: results[f"m{index}"]['Values']
+        for index, rds_instance_id in enumerate(rds_instance_ids)
+    }
+
+
+def get_average_db_connections(rds_instance_ids, days=7, client=None):
+    """
+    Bulk form of mpe_utils.get_active_db_connections - average of the daily average DatabaseConnections
+    for every given RDS instance.
+
+    Args:
+    rds_instance_ids (list): RDS instance identifiers.
+    days (int): Number of days back from now. Default is 7.
+    client: Boto3 CloudWatch client. Default client is created when not passed.
+
+    Returns:
+    dict: RDS instance identifier to average connections rounded to 2 decimals, None when there are no data points.
+    """
+    average_connections = {}
+    metric_values = get_rds_metric_values(rds_instance_ids, 'DatabaseConnections', days=days, client=client)
+    for rds_instance_id, values in metric_values.items():
+        if values:
+            average_connections[rds_instance_id] = round(sum(values) / len(values), 2)
+        else:
+            logging.info(f"No DatabaseConnections data points found for instance '{rds_instance_id}' over the last {days} days")
+            average_connections[rds_instance_id] = None
+    return average_connections
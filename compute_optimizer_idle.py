@@ -0,0 +1,76 @@
+"""
+Desc: importable Compute Optimizer idle recommendation fetcher - sends resource ARNs in chunks,
+follows nextToken on every chunk and joins the recommendations back to their resources through
+a dict index in one pass.
+
+Usage Ex:
+    import compute_optimizer_idle
+    idle_recommendations = compute_optimizer_idle.get_idle_recommendations(rds_instance_arns)
+    for db_instance, recommendation in compute_optimizer_idle.join_idle_recommendations(DBInstances, idle_recommendations):
+        ...
+"""
+import logging
+import boto3
+
+# Number of resource ARNs sent in one get_idle_recommendations request
+RESOURCE_ARNS_CHUNK_SIZE = 100
+# Page size requested from get_idle_recommendations
+MAX_RESULTS = 1000
+
+
+def get_idle_recommendations(resource_arns, client=None, chunk_size=RESOURCE_ARNS_CHUNK_SIZE):
+    """
+    Returns the Compute Optimizer idle recommendations for given resource ARNs, reading every page
+    of every ARN chunk.
+
+    Args:
+    resource_arns (list): Resource ARNs to get the idle recommendations for.
+    client: Boto3 Compute Optimizer client. Default client is created when not passed.
+    chunk_size (int): Number of ARNs sent per request. Default is RESOURCE_ARNS_CHUNK_SIZE.
+
+    Returns:
+    list: idleRecommendations of all the chunks.
+    """
+    if client is None:
+        client = boto3.client('compute-optimizer')
+
+    idle_recommendations = []
+    for start in range(0, len(resource_arns), chunk_size):
+        request = {'resourceArns': resource_arns[start:start + chunk_size], 'maxResults': MAX_RESULTS}
+        while True:
+            response = client.get_idle_recommendations(**request)
+            idle_recommendations.extend(response.get('idleRecommendations', []))
+            for error in response.get('errors', []):
+                logging.error(f"Compute Optimizer idle recommendation error for {error.get('identifier')}: {error.get('message')}")
+            next_token = response.get('nextToken')
+            if not next_token:
+                break
+            request['nextToken'] = next_token
+
+    logging.info(f"Compute Optimizer returned {len(idle_recommendations)} idle recommendations for {len(resource_arns)} resources")
+    return idle_recommendations
+
+
+def join_idle_recommendations(resources, idle_recommendations, arn_key='DBInstanceArn', id_key='DBInstanceIdentifier'):
+    """
+    Joins the idle recommendations to their resources through a dict index on resource ARN,
+    falling back to the resource id.
+
+    Args:
+    resources (list): Resources as returned by the describe API, e.g. DBInstances.
+    idle_recommendations (list): Recommendations as returned by get_idle_recommendations.
+    arn_key (str): Resource key holding the ARN. Default is 'DBInstanceArn'.
+    id_key (str): Resource key holding the id. Default is 'DBInstanceIdentifier'.
+
+    Returns:
+    list: (resource, recommendation) tuples in recommendation order; recommendations without a matching resource are skipped.
+    """
+    by_arn = {resource[arn_key]: resource for resource in resources}
+    by_id = {resource[id_key]: resource for resource in resources}
+
+    joined = []
+    for recommendation in idle_recommendations:
+        resource = by_arn.get(recommendation.get('resourceArn')) or by_id.get(recommendation.get('resourceId'))
+        if resource is not None:
+            joined.append((resource, recommendation))
+    return joined
@@ -0,0 +1,108 @@
+"""
+Desc: importable registry of the JSON config files under ./config (account contacts, jetbridge accounts, splunk
+subscription filter ARNs, cloudability secrets, monthly report mappings) - each file is read and parsed once and kept
+in memory with the indexes derived from it, instead of being opened and parsed again on every lookup.
+
+A file is reloaded when its modification time or size changes, checked at most once per STAT_INTERVAL_SECONDS, so an
+edited config is picked up by a running process without a restart.
+
+Usage Ex:
+    import config_registry
+    accounts_data = config_registry.get_config("./config/account_contacts.json")
+    account_ids = config_registry.get_index("./config/monthly_report_mapings.json", 'accounts',
+                                            lambda data: [account for cd in data.values() for account in cd.get('accounts', [])])
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+# A loaded file is stat'ed at most once per second to detect changes
+STAT_INTERVAL_SECONDS = 1.0
+
+# absolute file path -> {'version': (mtime_ns, size), 'data', 'indexes' (name -> index), 'checked_at'}
+_configs = {}
+_configs_lock = threading.Lock()
+
+
+def _get_entry(file_path):
+    path = os.path.abspath(file_path)
+    now = time.monotonic()
+    entry = _configs.get(path)
+    if entry and now - entry['checked_at'] < STAT_INTERVAL_SECONDS:
+        return entry
+
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        with _configs_lock:
+            _configs.pop(path, None)
+        raise
+    version = (stat.st_mtime_ns, stat.st_size)
+    if entry and entry['version'] == version:
+        entry['checked_at'] = now
+        return entry
+
+    with open(path, 'r') as file:
+        data = json.load(file)
+    entry = {'version': version, 'data': data, 'indexes': {}, 'checked_at': now}
+    with _configs_lock:
+        _configs[path] = entry
+    logging.debug(f"Config file loaded: {file_path}")
+    return entry
+
+
+def get_config(file_path):
+    """
+    Returns the parsed content of a JSON config file, loaded on first use and reloaded when the file changes.
+    The returned object is shared by all callers and must not be modified.
+
+    Args:
+    file_path (str): Path of the JSON file, e.g. "./config/account_contacts.json".
+
+    Returns:
+    Parsed JSON content.
+
+    Raises:
+    FileNotFoundError: If the file does not exist.
+    json.JSONDecodeError: If the file is not valid JSON, it is parsed again on next call.
+    """
+    return _get_entry(file_path)['data']
+
+
+def get_index(file_path, index_name, build):
+    """
+    Returns an index derived from a JSON config file, built once per loaded version of the file.
+    The returned object is shared by all callers and must not be modified.
+
+    Args:
+    file_path (str): Path of the JSON file.
+    index_name (str): Name of the index, unique per file.
+    build (callable): Builds the index from the parsed content.
+
+    Returns:
+    The index returned by build.
+
+    Raises:
+    FileNotFoundError, json.JSONDecodeError: Same as get_config.
+    """
+    entry = _get_entry(file_path)
+    with _configs_lock:
+        if index_name not in entry['indexes']:
+            entry['indexes'][index_name] = build(entry['data'])
+        return entry['indexes'][index_name]
+
+
+def invalidate(file_path=None):
+    """
+    Drops a loaded file so that next lookup reads it again.
+
+    Args:
+    file_path (str): File to drop. All files are dropped when not passed.
+    """
+    with _configs_lock:
+        if file_path:
+            _configs.pop(os.path.abspath(file_path), None)
+        else:
+            _configs.clear()
@@ -0,0 +1,146 @@
+"""
+Desc: importable Cost Explorer monthly cost cache - one get_cost_and_usage query grouped by SERVICE (or USAGE_TYPE)
+per run instead of one query per service, with an on-disk cache keyed by account and month.
+
+Closed months never change once Cost Explorer has finalized them, so they are served from ./cache/cost_explorer
+and only the open (current) month is fetched again.
+
+Usage Ex:
+    import cost_explorer_cache
+    monthly_costs = cost_explorer_cache.get_monthly_costs("307946647371", "2025-01-01", "2025-06-15")
+    print(monthly_costs["2025-05"].get("Amazon Relational Database Service", 0.0))
+"""
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+import boto3
+
+CACHE_DIR = os.path.join(".", "cache", "cost_explorer")
+# A month is served from the cache only once this many days have passed since its end, as Cost Explorer
+# may still restate the last days of a month right after it closes
+CLOSED_MONTH_SETTLE_DAYS = 5
+
+# (account_id, group_by) -> {month: {group key: amount}} fetched or loaded in this process
+_monthly_costs = {}
+
+
+def _get_months(start_date, end_date):
+    """Returns the 'YYYY-MM' months from start_date up to the month of end_date (exclusive end date)."""
+    months = []
+    month = datetime.strptime(start_date[:7], '%Y-%m')
+    last_day = datetime.strptime(end_date, '%Y-%m-%d') - timedelta(days=1)
+    while month <= last_day:
+        months.append(month.strftime('%Y-%m'))
+        month = (month + timedelta(days=32)).replace(day=1)
+    return months
+
+
+def _is_closed_month(month, today=None):
+    """Returns True if month ended at least CLOSED_MONTH_SETTLE_DAYS ago."""
+    today = today or datetime.now()
+    next_month = (datetime.strptime(month, '%Y-%m') + timedelta(days=32)).replace(day=1)
+    return today >= next_month + timedelta(days=CLOSED_MONTH_SETTLE_DAYS)
+
+
+def _get_cache_file(account_id, group_by):
+    return os.path.join(CACHE_DIR, f"{account_id}_{group_by}.json")
+
+
+def _load_cache(account_id, group_by):
+    """Loads the cached closed months of an account, {} when there is no readable cache file."""
+    cache_file = _get_cache_file(account_id, group_by)
+    if not os.path.exists(cache_file):
+        return {}
+    try:
+        with open(cache_file, 'r') as file:
+            return json.load(file)
+    except (OSError, json.JSONDecodeError) as e:
+        logging.warning(f"Ignoring unreadable Cost Explorer cache {cache_file}: {e}")
+        return {}
+
+
+def _save_cache(account_id, group_by, monthly_costs):
+    """Saves the closed months of an account to its cache file."""
+    closed_months = {month: costs for month, costs in monthly_costs.items() if _is_closed_month(month)}
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(_get_cache_file(account_id, group_by), 'w') as file:
+            json.dump(closed_months, file, indent=2, sort_keys=True)
+    except OSError as e:
+        logging.warning(f"Could not save Cost Explorer cache for {account_id}: {e}")
+
+
+def _query_monthly_costs(start_date, end_date, group_by, client):
+    """
+    Runs one grouped get_cost_and_usage query, following NextPageToken.
+
+    Returns:
+    dict: 'YYYY-MM' month to {group key: UnblendedCost amount}.
+    """
+    request = {
+        'TimePeriod': {'Start': start_date, 'End': end_date},
+        'Granularity': 'MONTHLY',
+        'Metrics': ['UnblendedCost'],
+        'GroupBy': [{'Type': 'DIMENSION', 'Key': group_by}]
+    }
+    monthly_costs = {}
+    while True:
+        response = client.get_cost_and_usage(**request)
+        for result in response['ResultsByTime']:
+            costs = monthly_costs.setdefault(result['TimePeriod']['Start'][:7], {})
+            for group in result.get('Groups', []):
+                costs[group['Keys'][0]] = float(group['Metrics']['UnblendedCost']['Amount'])
+        next_page_token = response.get('NextPageToken')
+        if not next_page_token:
+            break
+        request['NextPageToken'] = next_page_token
+    return monthly_costs
+
+
+def get_monthly_costs(account_id, start_date, end_date, group_by="SERVICE", client=None):
+    """
+    Returns the monthly UnblendedCost of every SERVICE (or USAGE_TYPE) of an account. Months already known
+    in this process or closed and cached on disk are not queried; the rest are fetched with one grouped query.
+
+    Args:
+    account_id (str): AWS account id the costs belong to (cache key).
+    start_date (str): Start date 'YYYY-MM-DD', the month of this date is the first month.
+    end_date (str): Exclusive end date 'YYYY-MM-DD'.
+    group_by (str): Cost Explorer dimension, "SERVICE" or "USAGE_TYPE". Default is "SERVICE".
+    client: Boto3 Cost Explorer client. Default client is created when not passed.
+
+    Returns:
+    dict: 'YYYY-MM' month to {service or usage type: amount}, for the months between start_date and end_date.
+    """
+    key = (account_id, group_by)
+    if key not in _monthly_costs:
+        _monthly_costs[key] = _load_cache(account_id, group_by)
+    monthly_costs = _monthly_costs[key]
+
+    months = _get_months(start_date, end_date)
+    missing_months = [month for month in months if month not in monthly_costs]
+    if missing_months:
+        if client is None:
+            client = boto3.client('ce')
+        query_start = max(start_date, f"{missing_months[0]}-01")
+        monthly_costs.update(_query_monthly_costs(query_start, end_date, group_by, client))
+        # Months without any cost are not returned by Cost Explorer
+        for month in missing_months:
+            monthly_costs.setdefault(month, {})
+        _save_cache(account_id, group_by, monthly_costs)
+        logging.info(f"Cost Explorer {group_by} costs fetched for {account_id} from {query_start} to {end_date}")
+
+    return {month: monthly_costs[month] for month in months}
+
+
+def clear_monthly_costs(account_id=None):
+    """
+    Drops the monthly costs known in this process (not the disk cache), e.g. when switching to an assumed-role session.
+
+    Args:
+    account_id (str): Account whose costs are dropped. All accounts are dropped when not passed.
+    """
+    for key in list(_monthly_costs):
+        if account_id is None or key[0] == account_id:
+            del _monthly_costs[key]
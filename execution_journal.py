@@ -0,0 +1,184 @@
+"""
+Desc: importable resumable execution journal - records every step of an approved-action execution per resource
+(planned -> snapshot started -> snapshot done -> delete started -> deleted) in a local SQLite file, so that a rerun
+of a run that died halfway skips completed work, waits on snapshots/deletions that were already in flight instead of
+starting them again, and needs no fleet-wide describe to find out where it stopped.
+
+A journal is scoped by run_id, e.g. account + region + RegRecTypeDt of the approved execution data; resource
+identifiers that can be reused (like RDS instance names) therefore start fresh with the next month's run.
+
+Usage Ex:
+    import execution_journal
+    journal = execution_journal.open_journal("307946647371:us-east-1RDS_TERMINATION_E2025-06")
+    journal.record("database-2", execution_journal.STEP_SNAPSHOT_STARTED, resource_type="rds", snapshot_id="snap-1")
+    if journal.is_done("database-2", execution_journal.STEP_DELETED):
+        print("already deleted")
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+import aws_clients
+
+DEFAULT_DB_PATH = os.path.join(".", "cache", "execution_journal.db")
+
+STEP_PLANNED = "planned"
+STEP_SNAPSHOT_STARTED = "snapshot_started"
+STEP_SNAPSHOT_DONE = "snapshot_done"
+STEP_DELETE_STARTED = "delete_started"
+STEP_DELETED = "deleted"
+# Steps in execution order, a resource never moves back to an earlier step
+STEPS = [STEP_PLANNED, STEP_SNAPSHOT_STARTED, STEP_SNAPSHOT_DONE, STEP_DELETE_STARTED, STEP_DELETED]
+
+# (db_path, run_id) -> ExecutionJournal
+_journals = {}
+_journals_lock = threading.Lock()
+
+
+class ExecutionJournal:
+    """
+    Per-resource step journal of one execution run, safe to use from worker threads.
+    """
+
+    def __init__(self, run_id, db_path=DEFAULT_DB_PATH):
+        """
+        Args:
+        run_id (str): Identifier of the execution run the journal belongs to.
+        db_path (str): SQLite file. Default is DEFAULT_DB_PATH.
+        """
+        self.run_id = run_id
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS execution_journal ("
+                "run_id TEXT NOT NULL, resource_id TEXT NOT NULL, resource_type TEXT, step TEXT NOT NULL, "
+                "detail TEXT, updated_at TEXT NOT NULL, PRIMARY KEY (run_id, resource_id))"
+            )
+        self._entries = self._load()
+        logging.info(f"Execution journal {run_id} opened with {len(self._entries)} recorded resources")
+
+    def _load(self):
+        """Reads all entries of the run, resource_id -> {'resource_type', 'step', 'detail'}."""
+        rows = self._connection.execute(
+            "SELECT resource_id, resource_type, step, detail FROM execution_journal WHERE run_id = ?", (self.run_id,))
+        return {
+            resource_id: {'resource_type': resource_type, 'step': step, 'detail': json.loads(detail or "{}")}
+            for resource_id, resource_type, step, detail in rows
+        }
+
+    def record(self, resource_id, step, resource_type=None, **detail):
+        """
+        Records that a resource reached a step. Detail values (e.g. snapshot_id) are merged into the earlier ones.
+        A step earlier than the recorded one is ignored.
+
+        Args:
+        resource_id (str): Resource identifier, e.g. RDS instance id, volume id, NAT Gateway id.
+        step (str): One of STEPS.
+        resource_type (str): Resource type, e.g. 'rds', 'ebs', 'nat', 'elb'. Kept from the earlier record when not passed.
+        **detail: Values needed to resume the resource, e.g. snapshot_id, db_cluster_id, allocation_id.
+        """
+        with self._lock:
+            entry = self._entries.get(resource_id)
+            if entry and STEPS.index(step) < STEPS.index(entry['step']):
+                return
+            entry = {
+                'resource_type': resource_type or (entry or {}).get('resource_type'),
+                'step': step,
+                'detail': {**(entry or {}).get('detail', {}), **detail}
+            }
+            self._entries[resource_id] = entry
+            with self._connection:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO execution_journal VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.run_id, resource_id, entry['resource_type'], step, json.dumps(entry['detail']),
+                     datetime.now().isoformat(timespec='seconds')))
+
+    def get(self, resource_id):
+        """
+        Returns the recorded entry of a resource.
+
+        Returns:
+        dict: {'resource_type', 'step', 'detail'}, or None if nothing is recorded for the resource.
+        """
+        with self._lock:
+            entry = self._entries.get(resource_id)
+            return {**entry, 'detail': dict(entry['detail'])} if entry else None
+
+    def get_step(self, resource_id):
+        """Returns the recorded step of a resource, None if nothing is recorded."""
+        entry = self.get(resource_id)
+        return entry['step'] if entry else None
+
+    def is_done(self, resource_id, step):
+        """Returns True if the resource reached the given step or a later one."""
+        recorded_step = self.get_step(resource_id)
+        return recorded_step is not None and STEPS.index(recorded_step) >= STEPS.index(step)
+
+    def get_resources(self, step=None, resource_type=None):
+        """
+        Returns the recorded entries of the run.
+
+        Args:
+        step (str): Only resources currently at this step. All steps when not passed.
+        resource_type (str): Only resources of this type. All types when not passed.
+
+        Returns:
+        dict: resource_id -> {'resource_type', 'step', 'detail'}.
+        """
+        with self._lock:
+            return {
+                resource_id: {**entry, 'detail': dict(entry['detail'])}
+                for resource_id, entry in self._entries.items()
+                if (step is None or entry['step'] == step) and (resource_type is None or entry['resource_type'] == resource_type)
+            }
+
+
+def get_run_id(operation, region_name=None, period_format="%Y-%m", session=None):
+    """
+    Returns the run id of an execution in the caller account, scoped like the RDS run ids by account, region and period,
+    e.g. "307946647371:us-east-1NAT_DELETE_2025-06": a run of another account or region never resumes its entries and
+    reused resource names (e.g. Classic ELB names) start fresh in the next period.
+
+    Args:
+    operation (str): Executed operation, e.g. "NAT_DELETE".
+    region_name (str): Region of the execution. Default is the region of the session.
+    period_format (str): strftime format of the period, e.g. "%Y-%m-%d" for one run per day. Default is one per month.
+    session (boto3.Session): Session of the execution. Default is the default session.
+
+    Returns:
+    str: Run id for open_journal.
+
+    Raises:
+    ValueError: If no region is set.
+    """
+    session = session or aws_clients.get_session()
+    region_name = region_name or session.region_name
+    if not region_name:
+        raise ValueError(f"No AWS region set, the {operation} execution journal cannot be opened")
+    account_id = aws_clients.get_caller_identity(session)['Account']
+    return f"{account_id}:{region_name}{operation}_{datetime.now().strftime(period_format)}"
+
+
+def open_journal(run_id, db_path=DEFAULT_DB_PATH):
+    """
+    Returns the process-wide ExecutionJournal of a run, opening it on first use.
+
+    Args:
+    run_id (str): Identifier of the execution run, e.g. account + region + RegRecTypeDt.
+    db_path (str): SQLite file. Default is DEFAULT_DB_PATH.
+
+    Returns:
+    ExecutionJournal: Journal of the run.
+    """
+    with _journals_lock:
+        key = (db_path, run_id)
+        if key not in _journals:
+            _journals[key] = ExecutionJournal(run_id, db_path)
+        return _journals[key]
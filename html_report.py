@@ -0,0 +1,128 @@
+"""
+Desc: importable HTML renderer of the report email tables and bodies - rows are streamed into one io.StringIO buffer
+(or any object with a write method) instead of growing a string with repeated `html +=`, which copies the whole table
+for every cell, so a 5k+ row log group report renders in milliseconds.
+
+Cell values and headers are HTML escaped; a value that is already markup (e.g. a link) is wrapped in RawHtml to be
+written as is. Large tables can be capped to max_rows inline rows, the remaining rows being announced with a
+"see attachment" row.
+
+Usage Ex:
+    import html_report
+    table_html = html_report.render_table(["Log Group Name", "Retention in Days"], rows, max_rows=500)
+
+    body = html_report.HtmlBody()
+    body.write("<b>Recommended Log Groups:</b><br>")
+    body.write_table(header, rows, formatters={"Retention in Days": lambda days: f"{days} days"})
+    email_body = body.getvalue()
+"""
+import html
+import io
+import itertools
+
+TABLE_START = "<table border='1'>\n"
+TABLE_END = "</table>"
+HEADER_ROW_START = "<tr bgcolor='#FF6600' style='color: white;' >"
+OVERFLOW_TEXT = "{remaining} more rows not shown inline, see attachment"
+
+
+class RawHtml(str):
+    """Cell value or header that is already HTML, written without escaping."""
+
+
+def _to_html(value):
+    if isinstance(value, RawHtml):
+        return value
+    text = str(value)
+    # most cells have nothing to escape, checking is cheaper than escaping
+    if '&' in text or '<' in text or '>' in text:
+        return html.escape(text, quote=False)
+    return text
+
+
+def _resolve_formatters(header, formatters):
+    """Returns one formatter (or None) per column, formatters are keyed by column index or header name."""
+    if not formatters:
+        return None
+    resolved = [formatters.get(index, formatters.get(col)) for index, col in enumerate(header)]
+    return resolved if any(resolved) else None
+
+
+def write_table(out, header, rows, formatters=None, max_rows=None, overflow_text=OVERFLOW_TEXT):
+    """
+    Writes an HTML table to out, one row at a time.
+
+    Args:
+    out: Buffer with a write method, e.g. io.StringIO or HtmlBody.
+    header (list): Column headers.
+    rows (iterable): Rows, each one a list of values. Can be a generator, it is read once.
+    formatters (dict): Column index or header name -> callable returning the cell text of a value. Default is str.
+    max_rows (int): Maximum rows written inline. All rows are written when not passed.
+    overflow_text (str): Text of the last row when rows are left out, formatted with {remaining} and {total}.
+
+    Returns:
+    int: Number of rows read, inline or not.
+    """
+    write = out.write
+    write(TABLE_START)
+    write(HEADER_ROW_START + "".join(f"<th>{_to_html(col)}</th>" for col in header) + "</tr>\n")
+
+    column_formatters = _resolve_formatters(header, formatters)
+    count = 0
+    for row in rows:
+        count += 1
+        if max_rows is not None and count > max_rows:
+            continue
+        if column_formatters:
+            # cells beyond the header have no formatter
+            row = [formatter(val) if formatter else val
+                   for val, formatter in zip(row, itertools.chain(column_formatters, itertools.repeat(None)))]
+        write("<tr><td>" + "</td><td>".join(map(_to_html, row)) + "</td></tr>\n" if row else "<tr></tr>\n")
+
+    if max_rows is not None and count > max_rows:
+        text = overflow_text.format(remaining=count - max_rows, total=count)
+        write(f"<tr><td colspan='{max(1, len(header))}'><i>{_to_html(text)}</i></td></tr>\n")
+    write(TABLE_END)
+    return count
+
+
+def render_table(header, rows, formatters=None, max_rows=None, overflow_text=OVERFLOW_TEXT):
+    """
+    Returns an HTML table of header and rows, see write_table for the arguments.
+
+    Returns:
+    str: HTML string representing the table.
+    """
+    out = io.StringIO()
+    write_table(out, header, rows, formatters, max_rows, overflow_text)
+    return out.getvalue()
+
+
+class HtmlBody:
+    """Email body buffer, parts are appended without copying what is already written."""
+
+    def __init__(self, html_text=""):
+        self._buffer = io.StringIO()
+        if html_text:
+            self._buffer.write(html_text)
+
+    def write(self, html_text):
+        """Appends HTML as is."""
+        self._buffer.write(html_text)
+        return self
+
+    def write_text(self, text):
+        """Appends escaped text."""
+        self._buffer.write(_to_html(text))
+        return self
+
+    def write_table(self, header, rows, formatters=None, max_rows=None, overflow_text=OVERFLOW_TEXT):
+        """Appends an HTML table, see write_table for the arguments. Returns the number of rows read."""
+        return write_table(self._buffer, header, rows, formatters, max_rows, overflow_text)
+
+    def getvalue(self):
+        """Returns the body HTML."""
+        return self._buffer.getvalue()
+
+    def __str__(self):
+        return self.getvalue()
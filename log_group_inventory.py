@@ -0,0 +1,260 @@
+"""
+Desc: importable CloudWatch log group inventory - one paginated describe_log_groups scan per run, shared by the count,
+the retention filter and the report instead of each of them scanning the account again.
+
+Subscription filters are only described for the log groups that need their status (e.g. the reported ones), with a
+bounded worker pool, and are cached in the inventory so a log group is never described twice in a run.
+
+Usage Ex:
+    import log_group_inventory
+    total_count = log_group_inventory.get_log_group_count()
+    log_groups = log_group_inventory.get_log_groups_with_retention_over(30)
+    log_groups = log_group_inventory.get_log_groups_matching(log_group_matcher.compile_log_group_patterns(["^/aws/lambda/"]))
+    splunk_status = log_group_inventory.get_subscription_status([lg['logGroupName'] for lg in log_groups], destination_arn)
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+import aws_clients
+
+# Inventory snapshot is reused for 15 minutes, which covers a full report run
+INVENTORY_TTL_SECONDS = 900
+# Concurrent describe_subscription_filters calls, kept low since the DescribeSubscriptionFilters quota is a few TPS
+SUBSCRIPTION_FILTER_WORKERS = 4
+
+# Both caches are keyed by aws_clients.get_client_key (access key id, region name), so that another credential set in
+# the same region never reads the log groups or subscription filters of the first one
+# client key -> inventory snapshot
+_inventory_cache = {}
+# client key -> subscription filters described while no inventory snapshot is loaded (prefix queries)
+_subscription_filter_cache = {}
+_inventory_lock = threading.Lock()
+
+
+def _describe_all_log_groups(logs_client):
+    """
+    Reads every page of describe_log_groups.
+
+    Args:
+    logs_client: Boto3 CloudWatch Logs client.
+
+    Returns:
+    list: All logGroups in the client region.
+    """
+    log_groups = []
+    paginator = logs_client.get_paginator('describe_log_groups')
+    for page in paginator.paginate():
+        log_groups.extend(page.get('logGroups', []))
+    return log_groups
+
+
+def _is_inventory_fresh(key, ttl=INVENTORY_TTL_SECONDS):
+    inventory = _inventory_cache.get(key)
+    return bool(inventory) and (time.time() - inventory['fetched_at']) < ttl
+
+
+def get_log_group_inventory(logs_client=None, ttl=INVENTORY_TTL_SECONDS, refresh=False):
+    """
+    Returns the log group inventory snapshot for the client credentials and region, scanning the account only when it
+    is missing, older than ttl seconds or refresh is requested.
+
+    Args:
+    logs_client: Boto3 CloudWatch Logs client. Shared client is used when not passed.
+    ttl (int): Maximum age of the cached snapshot in seconds. Default is INVENTORY_TTL_SECONDS.
+    refresh (bool): If True, ignores the cached snapshot. Default is False.
+
+    Returns:
+    dict: Inventory snapshot with 'log_groups' (list), 'by_name' (dict), 'subscription_filters' (dict of the log groups
+          described so far, name -> subscriptionFilters) and 'fetched_at' keys.
+    """
+    logs_client = logs_client or aws_clients.get_client('logs')
+    key = aws_clients.get_client_key(logs_client)
+
+    if not refresh and _is_inventory_fresh(key, ttl):
+        return _inventory_cache[key]
+
+    log_groups = _describe_all_log_groups(logs_client)
+    inventory = {
+        'log_groups': log_groups,
+        'by_name': {log_group['logGroupName']: log_group for log_group in log_groups},
+        'subscription_filters': {},
+        'fetched_at': time.time()
+    }
+    with _inventory_lock:
+        inventory['subscription_filters'].update(_subscription_filter_cache.pop(key, {}))
+        _inventory_cache[key] = inventory
+    logging.info(f"Log group inventory loaded for region {key[1]}: {len(log_groups)} log groups")
+    return inventory
+
+
+def invalidate_log_group_inventory(logs_client=None):
+    """
+    Drops the cached inventory snapshot so that next read scans the account again,
+    e.g. after retention or subscription filters were updated.
+
+    Args:
+    logs_client: Boto3 CloudWatch Logs client whose snapshot (credentials and region) is dropped. All snapshots are
+                 dropped when not passed.
+    """
+    with _inventory_lock:
+        if logs_client is not None:
+            key = aws_clients.get_client_key(logs_client)
+            _inventory_cache.pop(key, None)
+            _subscription_filter_cache.pop(key, None)
+        else:
+            _inventory_cache.clear()
+            _subscription_filter_cache.clear()
+
+
+def record_retention(log_group_name, retention_days, logs_client=None):
+    """
+    Updates the retention of a log group in the loaded inventory snapshot after put_retention_policy, so that the
+    snapshot stays usable without scanning the account again.
+
+    Args:
+    log_group_name (str): Log group name.
+    retention_days (int): New retention period in days.
+    logs_client: Boto3 CloudWatch Logs client. Shared client is used when not passed.
+    """
+    logs_client = logs_client or aws_clients.get_client('logs')
+    inventory = _inventory_cache.get(aws_clients.get_client_key(logs_client))
+    if inventory and log_group_name in inventory['by_name']:
+        with _inventory_lock:
+            inventory['by_name'][log_group_name]['retentionInDays'] = retention_days
+
+
+def record_subscription_filter(log_group_name, subscription_filter, logs_client=None):
+    """
+    Adds a subscription filter to the cached filters of a log group after put_subscription_filter. A log group not
+    described yet stays uncached, it is described on next lookup.
+
+    Args:
+    log_group_name (str): Log group name.
+    subscription_filter (dict): Filter with 'filterName' and 'destinationArn' keys.
+    logs_client: Boto3 CloudWatch Logs client. Shared client is used when not passed.
+    """
+    logs_client = logs_client or aws_clients.get_client('logs')
+    cached = _get_subscription_filter_cache(aws_clients.get_client_key(logs_client))
+    with _inventory_lock:
+        if log_group_name in cached:
+            cached[log_group_name] = [existing for existing in cached[log_group_name]
+                                      if existing['filterName'] != subscription_filter['filterName']] + [subscription_filter]
+
+
+def get_log_groups(logs_client=None):
+    """Returns all log groups of the inventory snapshot."""
+    return get_log_group_inventory(logs_client)['log_groups']
+
+
+def get_log_group_count(logs_client=None):
+    """Returns the number of log groups, without describing any subscription filter."""
+    return len(get_log_group_inventory(logs_client)['log_groups'])
+
+
+def get_log_groups_with_retention_over(retention_days, logs_client=None):
+    """
+    Returns the log groups whose retention is greater than retention_days, or that never expire.
+
+    Args:
+    retention_days (int): Retention period in days.
+    logs_client: Boto3 CloudWatch Logs client. Shared client is used when not passed.
+
+    Returns:
+    list: logGroups in scan order.
+    """
+    return [log_group for log_group in get_log_groups(logs_client)
+            if not log_group.get('retentionInDays') or log_group['retentionInDays'] > retention_days]
+
+
+def get_log_groups_matching(matcher, logs_client=None):
+    """
+    Returns the log groups matched by a compiled log_group_matcher. When all patterns are prefixes and the account is
+    not scanned yet in this run, only the matching log groups are listed, with one logGroupNamePrefix query per prefix.
+
+    Args:
+    matcher (log_group_matcher.LogGroupNameMatcher): Compiled log group patterns.
+    logs_client: Boto3 CloudWatch Logs client. Shared client is used when not passed.
+
+    Returns:
+    list: Matching logGroups, each one once.
+    """
+    logs_client = logs_client or aws_clients.get_client('logs')
+    if not matcher:
+        return []
+    if matcher.has_substrings() or _is_inventory_fresh(aws_clients.get_client_key(logs_client)):
+        return [log_group for log_group in get_log_groups(logs_client) if matcher.matches(log_group['logGroupName'])]
+
+    log_groups = []
+    paginator = logs_client.get_paginator('describe_log_groups')
+    # get_prefixes drops the prefixes covered by a shorter one, so the queries do not overlap
+    for prefix in matcher.get_prefixes():
+        for page in paginator.paginate(logGroupNamePrefix=prefix):
+            log_groups.extend(page.get('logGroups', []))
+    logging.info(f"{len(log_groups)} log groups listed for {len(matcher.get_prefixes())} prefixes")
+    return log_groups
+
+
+def _get_subscription_filter_cache(key):
+    """Returns the subscription filters described so far, without scanning the account when no snapshot is loaded."""
+    if _is_inventory_fresh(key):
+        return _inventory_cache[key]['subscription_filters']
+    with _inventory_lock:
+        return _subscription_filter_cache.setdefault(key, {})
+
+
+def _describe_subscription_filters(logs_client, log_group_name):
+    try:
+        paginator = logs_client.get_paginator('describe_subscription_filters')
+        return [subscription_filter for page in paginator.paginate(logGroupName=log_group_name)
+                for subscription_filter in page.get('subscriptionFilters', [])]
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ResourceNotFoundException':
+            raise
+        logging.warning(f"Log group {log_group_name} no longer exists")
+        return []
+
+
+def get_subscription_filters(log_group_names, logs_client=None, max_workers=SUBSCRIPTION_FILTER_WORKERS):
+    """
+    Returns the subscription filters of given log groups. Log groups not described yet in this run are described
+    concurrently and cached, in the inventory snapshot when it is loaded.
+
+    Args:
+    log_group_names (list): Log group names.
+    logs_client: Boto3 CloudWatch Logs client. Shared client is used when not passed.
+    max_workers (int): Maximum concurrent describe_subscription_filters calls. Default is SUBSCRIPTION_FILTER_WORKERS.
+
+    Returns:
+    dict: Log group name -> subscriptionFilters.
+    """
+    logs_client = logs_client or aws_clients.get_client('logs')
+    cached = _get_subscription_filter_cache(aws_clients.get_client_key(logs_client))
+    missing = list(dict.fromkeys(name for name in log_group_names if name not in cached))
+    if missing:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(missing))), thread_name_prefix="log-sub-filters") as executor:
+            for log_group_name, subscription_filters in zip(missing, executor.map(
+                    lambda name: _describe_subscription_filters(logs_client, name), missing)):
+                cached[log_group_name] = subscription_filters
+        logging.info(f"Subscription filters described for {len(missing)} log groups")
+    return {name: cached[name] for name in log_group_names}
+
+
+def get_subscription_status(log_group_names, destination_arn, logs_client=None):
+    """
+    Returns whether each given log group has a subscription filter to destination_arn.
+
+    Args:
+    log_group_names (list): Log group names.
+    destination_arn (str): Subscription filter destination, e.g. the Splunk destination ARN of the region.
+    logs_client: Boto3 CloudWatch Logs client. Shared client is used when not passed.
+
+    Returns:
+    dict: Log group name -> 'Y' or 'N'.
+    """
+    subscription_filters = get_subscription_filters(log_group_names, logs_client)
+    return {
+        name: 'Y' if any(subscription_filter['destinationArn'] == destination_arn for subscription_filter in filters) else 'N'
+        for name, filters in subscription_filters.items()
+    }
@@ -0,0 +1,153 @@
+"""
+Desc: importable log group name matcher - compiles the requested log group patterns once, instead of splitting every
+input line and testing every pattern against every log group name.
+
+A pattern matches the log groups whose name contains it. A pattern starting with '^' is anchored and matches the log
+groups whose name starts with it; when all patterns are anchored, the log groups are listed with the server side
+logGroupNamePrefix filter (see log_group_inventory.get_log_groups_matching) and the rest of the account is not scanned.
+
+Substring patterns are matched with an Aho-Corasick automaton and prefixes with a trie, so one pass over a log group
+name checks all patterns.
+
+Usage Ex:
+    import log_group_matcher
+    matcher = log_group_matcher.compile_log_group_patterns(["^/aws/lambda/payments-,30,Y", "audit"])
+    matcher.matches("/aws/lambda/payments-api")   # True
+    matcher.get_prefixes()                       # ['/aws/lambda/payments-']
+"""
+
+PREFIX_ANCHOR = '^'
+# trie node key marking the end of a prefix, not a valid log group name character
+_END = ''
+
+
+def parse_log_group_pattern(line):
+    """
+    Returns the log group pattern of an input line, the first field of "pattern,retention,splunk" lines.
+
+    Args:
+    line (str): Input line, e.g. "/aws/lambda/,30,Y".
+
+    Returns:
+    str: Pattern without surrounding whitespace, empty for blank lines.
+    """
+    return line.split(',')[0].strip().replace('\n', '')
+
+
+class LogGroupNameMatcher:
+    """Matches log group names against a compiled set of substring and prefix patterns."""
+
+    def __init__(self, patterns):
+        """
+        Args:
+        patterns (list): Parsed patterns, '^' prefixed ones are anchored prefixes. Empty patterns are ignored.
+        """
+        self.substrings = sorted({pattern for pattern in patterns if pattern and not pattern.startswith(PREFIX_ANCHOR)})
+        self.prefixes = sorted({pattern[1:] for pattern in patterns if pattern.startswith(PREFIX_ANCHOR) and pattern[1:]})
+        self._prefix_trie = self._build_prefix_trie(self.prefixes)
+        self._goto, self._fail, self._output = self._build_automaton(self.substrings)
+
+    @staticmethod
+    def _build_prefix_trie(prefixes):
+        trie = {}
+        for prefix in prefixes:
+            node = trie
+            for char in prefix:
+                node = node.setdefault(char, {})
+            node[_END] = True
+        return trie
+
+    @staticmethod
+    def _build_automaton(substrings):
+        """Builds the Aho-Corasick goto, failure and output tables, node 0 is the root."""
+        goto, output = [{}], [False]
+        for substring in substrings:
+            node = 0
+            for char in substring:
+                if char not in goto[node]:
+                    goto.append({})
+                    output.append(False)
+                    goto[node][char] = len(goto) - 1
+                node = goto[node][char]
+            output[node] = True
+
+        # nodes of depth 1 fail to the root, deeper ones are resolved breadth first
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for node in queue:
+            for char, child in goto[node].items():
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(char, 0)
+                # a node also matches when any pattern ending at its failure node does
+                output[child] = output[child] or output[fail[child]]
+                queue.append(child)
+        return goto, fail, output
+
+    def has_substrings(self):
+        """Returns True if any pattern is unanchored, i.e. all log groups of the account have to be checked."""
+        return bool(self.substrings)
+
+    def get_prefixes(self):
+        """
+        Returns the prefixes to list with the logGroupNamePrefix filter, without the prefixes covered by a shorter one.
+
+        Returns:
+        list: Sorted prefixes, none of them starts with another one.
+        """
+        prefixes = []
+        for prefix in self.prefixes:
+            if not prefixes or not prefix.startswith(prefixes[-1]):
+                prefixes.append(prefix)
+        return prefixes
+
+    def _matches_prefix(self, log_group_name):
+        node = self._prefix_trie
+        for char in log_group_name:
+            if _END in node:
+                return True
+            node = node.get(char)
+            if node is None:
+                return False
+        return _END in node
+
+    def _matches_substring(self, log_group_name):
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in log_group_name:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                return True
+        return False
+
+    def matches(self, log_group_name):
+        """
+        Returns True if the log group name starts with any prefix or contains any substring pattern.
+
+        Args:
+        log_group_name (str): Log group name.
+
+        Returns:
+        bool: True if any pattern matches.
+        """
+        return (bool(self.prefixes) and self._matches_prefix(log_group_name)) or \
+               (bool(self.substrings) and self._matches_substring(log_group_name))
+
+    def __bool__(self):
+        return bool(self.prefixes or self.substrings)
+
+
+def compile_log_group_patterns(lines):
+    """
+    Compiles the log group patterns of input lines.
+
+    Args:
+    lines (list): Input lines, the first comma separated field is the pattern, e.g. "^/aws/lambda/,30,Y".
+
+    Returns:
+    LogGroupNameMatcher: Matcher of all non blank patterns.
+    """
+    return LogGroupNameMatcher([parse_log_group_pattern(line) for line in lines or []])
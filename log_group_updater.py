@@ -0,0 +1,193 @@
+"""
+Desc: importable bulk updater of CloudWatch log groups - applies the retention period (put_retention_policy) and the
+Splunk subscription filter (put_subscription_filter) to many log groups on a bounded worker pool, instead of one log
+group after another.
+
+Every operation goes through a token bucket shared by all workers and callers of the process, so the run stays under
+the CloudWatch Logs TPS quota of the API (5 TPS per account and region for both) instead of being throttled. The Splunk
+status of all log groups is read once with the batched log_group_inventory lookup, not described again before every put.
+
+Usage Ex:
+    import log_group_updater
+    results = log_group_updater.update_log_groups_bulk(
+        [{'log_group_name': "/aws/lambda/app", 'retention_days': 30, 'splunk': "Y"}, ...],
+        destination_arn=splunk_destination_arn)
+    failed = [result for result in results if result['status'] != "SUCCESS"]
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import aws_clients
+import log_group_inventory
+
+DEFAULT_MAX_WORKERS = 8
+# CloudWatch Logs quotas of the write APIs, per account and region
+PUT_RETENTION_POLICY_TPS = 5
+PUT_SUBSCRIPTION_FILTER_TPS = 5
+
+
+class TokenBucket:
+    """Thread safe token bucket, acquire blocks until a token is available."""
+
+    def __init__(self, rate, capacity=None):
+        """
+        Args:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum burst. Default is one second worth of tokens.
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Takes one token, waiting for the bucket to refill when it is empty."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# operation -> token bucket shared by every caller in the process
+_buckets = {
+    'put_retention_policy': TokenBucket(PUT_RETENTION_POLICY_TPS),
+    'put_subscription_filter': TokenBucket(PUT_SUBSCRIPTION_FILTER_TPS),
+}
+
+
+def set_rate_limit(operation, tps):
+    """
+    Replaces the token bucket of an operation, e.g. after a quota increase.
+
+    Args:
+    operation (str): 'put_retention_policy' or 'put_subscription_filter'.
+    tps (float): Allowed calls per second.
+    """
+    _buckets[operation] = TokenBucket(tps)
+
+
+def put_retention_policy(log_group_name, retention_days, logs_client=None):
+    """
+    Sets the retention period of a log group within the PutRetentionPolicy rate limit, and keeps the inventory
+    snapshot in line.
+
+    Args:
+    log_group_name (str): Log group name.
+    retention_days (int): New retention period in days.
+    logs_client: Boto3 CloudWatch Logs client. Shared client is used when not passed.
+
+    Returns:
+    dict: Response from the AWS API call.
+    """
+    logs_client = logs_client or aws_clients.get_client('logs')
+    _buckets['put_retention_policy'].acquire()
+    response = logs_client.put_retention_policy(logGroupName=log_group_name, retentionInDays=retention_days)
+    log_group_inventory.record_retention(log_group_name, retention_days, logs_client)
+    return response
+
+
+def put_subscription_filter(log_group_name, destination_arn, filter_name="Splunk", filter_pattern="", logs_client=None):
+    """
+    Adds a subscription filter to a log group within the PutSubscriptionFilter rate limit, and records it in the
+    subscription filter cache of log_group_inventory.
+
+    Args:
+    log_group_name (str): Log group name.
+    destination_arn (str): Subscription filter destination.
+    filter_name (str): The name of the subscription filter. Default is "Splunk".
+    filter_pattern (str): The pattern to match log events. Default matches all.
+    logs_client: Boto3 CloudWatch Logs client. Shared client is used when not passed.
+
+    Returns:
+    dict: Response from the AWS API call.
+    """
+    logs_client = logs_client or aws_clients.get_client('logs')
+    _buckets['put_subscription_filter'].acquire()
+    response = logs_client.put_subscription_filter(logGroupName=log_group_name, filterName=filter_name,
+                                                   filterPattern=filter_pattern, destinationArn=destination_arn)
+    log_group_inventory.record_subscription_filter(
+        log_group_name, {'filterName': filter_name, 'logGroupName': log_group_name, 'destinationArn': destination_arn},
+        logs_client)
+    return response
+
+
+def _update_log_group(update, splunk_status, destination_arn, filter_name, filter_pattern, logs_client):
+    log_group_name = update['log_group_name']
+    result = {'log_group_name': log_group_name, 'retention_days': update['retention_days'],
+              'splunk': update.get('splunk', "N"), 'retention_status': None, 'splunk_status': None, 'errors': []}
+
+    if result['splunk'].upper() == "Y":
+        if not destination_arn:
+            result['splunk_status'] = "FAILED"
+            result['errors'].append("Splunk destination ARN not found")
+        elif splunk_status.get(log_group_name) == "Y":
+            result['splunk_status'] = "ALREADY_EXISTS"
+        else:
+            try:
+                put_subscription_filter(log_group_name, destination_arn, filter_name, filter_pattern, logs_client)
+                result['splunk_status'] = "ADDED"
+            except Exception as e:
+                result['splunk_status'] = "FAILED"
+                result['errors'].append(f"put_subscription_filter: {e}")
+
+    try:
+        put_retention_policy(log_group_name, result['retention_days'], logs_client)
+        result['retention_status'] = "UPDATED"
+    except Exception as e:
+        result['retention_status'] = "FAILED"
+        result['errors'].append(f"put_retention_policy: {e}")
+
+    result['status'] = "FAILED" if result['errors'] else "SUCCESS"
+    if result['errors']:
+        logging.error(f"Log group {log_group_name} update failed: {'; '.join(result['errors'])}")
+    else:
+        logging.info(f"Log group {log_group_name} updated: retention {result['retention_days']} days, splunk {result['splunk_status']}")
+    return result
+
+
+def update_log_groups_bulk(updates, destination_arn=None, filter_name="Splunk", filter_pattern="", logs_client=None,
+                           max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Applies retention periods and Splunk subscription filters to log groups in parallel, within the API rate limits.
+    A failed log group does not stop the others, its errors are returned in its result.
+
+    Args:
+    updates (list): Dicts with 'log_group_name', 'retention_days' (int) and optional 'splunk' ("Y"/"N", default "N").
+    destination_arn (str): Splunk subscription filter destination, required when any update has splunk "Y".
+    filter_name (str): The name of the subscription filter. Default is "Splunk".
+    filter_pattern (str): The pattern to match log events. Default matches all.
+    logs_client: Boto3 CloudWatch Logs client. Shared client is used when not passed.
+    max_workers (int): Maximum concurrent log group updates. Default is DEFAULT_MAX_WORKERS.
+
+    Returns:
+    list: One result per update, in input order: {'log_group_name', 'retention_days', 'splunk', 'retention_status'
+          ("UPDATED"/"FAILED"), 'splunk_status' (None/"ADDED"/"ALREADY_EXISTS"/"FAILED"), 'status' ("SUCCESS"/"FAILED"),
+          'errors' (list)}.
+    """
+    if not updates:
+        return []
+    logs_client = logs_client or aws_clients.get_client('logs')
+
+    splunk_log_group_names = [update['log_group_name'] for update in updates if update.get('splunk', "N").upper() == "Y"]
+    splunk_status = {}
+    if splunk_log_group_names and destination_arn:
+        splunk_status = log_group_inventory.get_subscription_status(splunk_log_group_names, destination_arn, logs_client)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(updates))), thread_name_prefix="log-group-update") as executor:
+        results = list(executor.map(
+            lambda update: _update_log_group(update, splunk_status, destination_arn, filter_name, filter_pattern, logs_client),
+            updates))
+
+    failed_count = sum(1 for result in results if result['status'] != "SUCCESS")
+    logging.info(f"{len(results) - failed_count}/{len(results)} log groups updated in {time.perf_counter() - start:.1f}s, "
+                 f"{failed_count} failed")
+    return results
@@ -1,16 +1,29 @@
 
 import argparse
-import boto3, requests
 import mpe_utils as mu
+import aws_clients
+import rds_inventory
+import compute_optimizer_idle
+import cloudwatch_metrics
 from botocore.exceptions import ClientError
 
-# Initialize a session using Amazon RDS
-rds_client = boto3.client('rds')
-session = boto3.Session()
-compute_optimizer_client = boto3.client('compute-optimizer')
-account_no, AWS_REGION = mu.get_aws_account_id_and_region()
-msg_key = account_no + "_" + AWS_REGION + "_" + mu.get_current_month() + "_RDS_TERMINATION_R"
-msg_value = "Region:" + AWS_REGION 
+# Clients are created on first use and the account detail is resolved by load_account_context() once the arguments
+# are valid, so that --help and argument errors make no AWS call
+rds_client = aws_clients.LazyClient('rds')
+compute_optimizer_client = aws_clients.LazyClient('compute-optimizer')
+account_no = AWS_REGION = msg_key = msg_value = None
+
+def load_account_context():
+    """Resolves the account number, region and report message key used by the functions of this script.
+    Called by main(), callers importing the script call it before using its functions.
+    """
+    global account_no, AWS_REGION, msg_key, msg_value
+    if account_no:
+        return
+    account_no, AWS_REGION = mu.get_aws_account_id_and_region()
+    msg_key = account_no + "_" + AWS_REGION + "_" + mu.get_current_month() + "_RDS_TERMINATION_R"
+    msg_value = "Region:" + AWS_REGION 
+
 def get_rds_instances_for_current_account(input = "ALL",action="READ"):
     """
     Get the list of RDS instances for the current AWS account.
@@ -20,8 +33,7 @@ def get_rds_instances_for_current_account(input = "ALL",action="READ"):
     :return: List of RDS instance identifiers.
     """
     try:
-        response = rds_client.describe_db_instances()
-        db_instances = response['DBInstances']
+        db_instances = rds_inventory.get_db_instances(rds_client)
 
         if action == "COUNT":
             # Count the number of RDS instances
@@ -31,6 +43,8 @@ def get_rds_instances_for_current_account(input = "ALL",action="READ"):
         
         header_data = ["DBInstanceIdentifier", "DBInstanceClass", "DBInstanceEngine" "DBInstanceStatus", "Average_Connections"]
         instance_details = []
+        # Get the average connections for all RDS instances in bulk
+        average_connections = cloudwatch_metrics.get_average_db_connections([db_instance['DBInstanceIdentifier'] for db_instance in db_instances], days=30)
         for db_instance in db_instances:
             instance_id = db_instance['DBInstanceIdentifier']
             instance_state = db_instance['DBInstanceStatus']
@@ -39,7 +53,7 @@ def get_rds_instances_for_current_account(input = "ALL",action="READ"):
             # Get the average connections for the RDS instance
             instance_arn = db_instance['DBInstanceArn']
             Idle =get_rds_instance_recommendations
-            Avergae_Connections = mu.get_active_db_connections(rds_instance_id=instance_id, days=30)
+            Avergae_Connections = average_connections.get(instance_id)
             instance_engine = db_instance['Engine']
             if input == "ALL":
                 instance_details.append([instance_id, instance_class,instance_engine, instance_state, Avergae_Connections])
@@ -57,41 +71,44 @@ def get_idle_rds_instances_detail(option="ALL",test="Y"):
     :return: List of idle RDS instance identifiers.
     """
     global msg_key, msg_value
-    header_data = ["DBInstanceIdentifier", "DBInstanceClass", "DBInstanceEngine", "DBInstanceStatus", "AverageConnections","MaxConnections", "Finding", "SavingsOpportunityAfterDiscounts"]
+    import rds_utilization
+    header_data = ["DBInstanceIdentifier", "DBInstanceClass", "DBInstanceEngine", "DBInstanceStatus", "AverageConnections","MaxConnections", "Finding", "SavingsOpportunityAfterDiscounts", "CPUUtilizationP95", "LocalUtilizationCheck"]
     instance_details = []
-    # Create a Boto3 client for Compute Optimizer
-    client = boto3.client('compute-optimizer')
+    # Shared Compute Optimizer client
+    client = compute_optimizer_client
     # Initialize a list to hold the ARNs
     rds_instance_arns = []
 
     # Describe RDS instances
-    response = rds_client.describe_db_instances()
-    DBInstances = response['DBInstances']
+    DBInstances = rds_inventory.get_db_instances(rds_client)
     # Iterate through the instances and collect their ARNs
     for db_instance in DBInstances:
         rds_instance_arns.append(db_instance['DBInstanceArn'])
     # Get recommendations for RDS instances
-    response = client.get_idle_recommendations(
-        resourceArns=rds_instance_arns
-    )
+    idle_recommendations = compute_optimizer_idle.get_idle_recommendations(rds_instance_arns, client=client)
     total_savingsOpportunityAfterDiscounts = 0
     # Iterate through the recommendations
-    for recommendation in response['idleRecommendations']:
+    idle_db_instances = compute_optimizer_idle.join_idle_recommendations(DBInstances, idle_recommendations)
+    idle_instance_ids = [db_instance['DBInstanceIdentifier'] for db_instance, recommendation in idle_db_instances]
+    # Validate the idle recommendations against local CPU/connections utilization profiles
+    utilization_profiles = rds_utilization.get_utilization_profiles(idle_instance_ids, days=30)
+    idle_checks = rds_utilization.check_idle_candidates(utilization_profiles)
+    # The average connections come from the same profiles, DatabaseConnections is not queried twice
+    average_connections = rds_utilization.get_metric_averages(utilization_profiles, 'DatabaseConnections')
+    for db_instance, recommendation in idle_db_instances:
         # Check the utilization metrics for idle instances
-        resourceId = recommendation['resourceId']
         finding = recommendation['finding']
         savingsOpportunityAfterDiscounts = "$" + str(recommendation['savingsOpportunityAfterDiscounts']["estimatedMonthlySavings"]["value"])
         total_savingsOpportunityAfterDiscounts += recommendation['savingsOpportunityAfterDiscounts']["estimatedMonthlySavings"]["value"]
         maxDatabaseConnections = round(recommendation['utilizationMetrics'][1]["value"],2)
 
-        for db_instance in DBInstances:
-            instance_id = db_instance['DBInstanceIdentifier']
-            if instance_id == resourceId:
-                instance_state = db_instance['DBInstanceStatus']
-                instance_class = db_instance['DBInstanceClass']
-                AverageConnections = mu.get_active_db_connections(rds_instance_id=instance_id, days=30)
-                instance_engine = db_instance['Engine']
-                instance_details.append([instance_id, instance_class,instance_engine, instance_state, AverageConnections, maxDatabaseConnections, finding, savingsOpportunityAfterDiscounts])
+        instance_id = db_instance['DBInstanceIdentifier']
+        instance_state = db_instance['DBInstanceStatus']
+        instance_class = db_instance['DBInstanceClass']
+        AverageConnections = average_connections.get(instance_id)
+        cpu_p95 = rds_utilization.get_instance_profile(utilization_profiles, instance_id)['CPUUtilization']['p95']
+        instance_engine = db_instance['Engine']
+        instance_details.append([instance_id, instance_class,instance_engine, instance_state, AverageConnections, maxDatabaseConnections, finding, savingsOpportunityAfterDiscounts, cpu_p95, idle_checks.get(instance_id)])
         
     last_6_month_cost = mu.get_monthly_cost(service_name="Amazon Relational Database Service")
     last_month_cost = "Error"
@@ -115,7 +132,7 @@ def get_idle_rds_instances_detail(option="ALL",test="Y"):
     print("msg_key: " + msg_key)
     print("msg_value: " + msg_value)
     
-    if len(response['idleRecommendations']) > 0:
+    if len(idle_recommendations) > 0:
        # mu.write_data_to_confluent_topic(key=msg_key, value=msg_value)
         table_html = mu.get_table_html(header_data, instance_details)
         exec_table_html = mu.get_table_html(['Serial Number','DBInstanceIdentifier','No Action(NA))/Termination with Backup Snapshot(TWB)/Just Stop(JS)'], [['1', ' ', ' '],['2', ' ', ' '],['3', ' ', ' ']])
@@ -227,6 +244,8 @@ def resize_rds_instance(db_instance_identifier, new_instance_type):
             DBInstanceClass=new_instance_type,
             ApplyImmediately=True  # Apply changes immediately, may cause downtime
         )
+        # The instance changed, the inventory snapshot is read again on next lookup
+        rds_inventory.invalidate_rds_inventory(rds_client)
         mu.log_info(f"Successfully initiated resize of RDS instance {db_instance_identifier} to {new_instance_type}.")
         mu.log_debug(f"Response: {response}")
     
@@ -257,6 +276,8 @@ def delete_rds_instance(db_instance_identifier,SkipFinalSnapshot=False):
             DBInstanceIdentifier=db_instance_identifier,
             SkipFinalSnapshot=SkipFinalSnapshot  # Skip final snapshot before deletion
         )
+        # The instance changed, the inventory snapshot is read again on next lookup
+        rds_inventory.invalidate_rds_inventory(rds_client)
         mu.log_info(f"Successfully initiated deletion of RDS instance {db_instance_identifier}.")
         mu.log_debug(f"Response: {response}")
     
@@ -311,10 +332,8 @@ def process_input_file(file_path, action):
 
 
 def get_stopped_rds_instances():
-    client = boto3.client('rds')
-    response = client.describe_db_instances()
     stopped_rds = []
-    for db in response['DBInstances']:
+    for db in rds_inventory.get_db_instances(rds_client):
         if db['DBInstanceStatus'] == 'stopped':
             stopped_rds.append({
                 'name': db['DBInstanceIdentifier'],
@@ -331,52 +350,16 @@ def get_stopped_rds_instances():
 
 
 def get_rds_recommendation_from_cloudability(input="ALL", action="READ", test="Y"):
-    FD_API_PUBLIC_KEY, FD_API_SECRET_KEY = mu.get_cloudability_secrets_by_view(view_name="GBS_ALL")
-    DOMAIN = "firstdata.com"
-    ENV_ID = "8207c224-4499-4cbf-b63d-537d61bb2582"
-    
+    import cloudability_client
     aws_account_number, region = mu.get_aws_account_id_and_region()
     vendor_account_ids = aws_account_number
 
-    RIGHTSIZING_API_URL = "https://api.cloudability.com/v3/rightsizing/aws/recommendations/rds"
-    params = {'keyAccess': FD_API_PUBLIC_KEY, 'keySecret': FD_API_SECRET_KEY}
-    auth_response = requests.post('https://frontdoor.apptio.com/service/apikeylogin', json=params)
-
-    if auth_response.status_code != 200:
-        print(f'❌ Auth failed: {auth_response.status_code}\n{auth_response.text}')
-        exit()
-    
-    token = auth_response.headers.get('apptio-opentoken')
-    if not token:
-        print("❌ Token not found!")
-        exit()
-
-    headers = {
-        'apptio-opentoken': token,
-        'Content-Type': 'application/json',
-        'apptio-current-environment': ENV_ID
-    }
-
-    api_params = {
-        'vendorAccountIds': vendor_account_ids,
-        'basis': 'effective',
-        'limit': 100000,
-        'maxRecsPerResource': 1,
-        'offset': 0,
-        'product': 'rds',
-        'duration': 'thirty-day',
-        'viewId': 1467480,
-        'Accept': 'text/csv'
-    }
-
-    rightsizing_response = requests.get(RIGHTSIZING_API_URL, headers=headers, params=api_params)
-
-    if rightsizing_response.status_code != 200:
-        print(f'❌ API failed: {rightsizing_response.status_code}\n{rightsizing_response.text}')
-        exit()
-
-    rightsizing_response_json = rightsizing_response.json()
-    accounts_rds = rightsizing_response_json.get('result', [])
+    try:
+        accounts_rds = cloudability_client.get_cloudability_client(mu.get_cloudability_secrets_by_view, view_name="GBS_ALL").iter_rightsizing_recommendations(
+            product="rds", vendor_account_ids=vendor_account_ids, basis="effective")
+    except cloudability_client.CloudabilityError as e:
+        print(f'❌ {e}')
+        return
 
     terminate_data, resize_data = [], []
 
@@ -495,54 +478,24 @@ ddef main():
 sent chnages -
 
 def get_rds_recommendation_from_cloudability(input="ALL", action="READ", test="Y"):
-    FD_API_PUBLIC_KEY, FD_API_SECRET_KEY = mu.get_cloudability_secrets_by_view(view_name="GBS_ALL")
-    ENV_ID = "8207c224-4499-4cbf-b63d-537d61bb2582"
-
+    import cloudability_client
     aws_account_number, region = mu.get_aws_account_id_and_region()
     vendor_account_ids = aws_account_number
     product = "rds"
-    RIGHTSIZING_API_URL = f"https://api.cloudability.com/v3/rightsizing/aws/recommendations/{product}"
-
-    params = {'keyAccess': FD_API_PUBLIC_KEY, 'keySecret': FD_API_SECRET_KEY}
-    auth_response = requests.post('https://frontdoor.apptio.com/service/apikeylogin', json=params)
-    if auth_response.status_code != 200:
-        print(f'❌ Authentication failed: {auth_response.status_code}')
-        exit()
-
-    token = auth_response.headers.get('apptio-opentoken')
-    if not token:
-        print("❌ Authentication token not found!")
-        exit()
-
-    headers = {
-        'apptio-opentoken': token,
-        'Content-Type': 'application/json',
-        'apptio-current-environment': ENV_ID
-    }
 
-    api_params = {
-        'vendorAccountIds': vendor_account_ids,
-        'basis': "effective",
-        'limit': 100000,
-        'maxRecsPerResource': 1,
-        'offset': 0,
-        'product': product,
-        'duration': "thirty-day",
-        'viewId': 1467480,
-        'Accept': "text/csv"
-    }
-
-    rightsizing_response = requests.get(RIGHTSIZING_API_URL, headers=headers, params=api_params)
-    if rightsizing_response.status_code != 200:
-        print(f'❌ API call failed: {rightsizing_response.status_code}')
-        exit()
+    try:
+        recommendations = cloudability_client.get_cloudability_client(mu.get_cloudability_secrets_by_view, view_name="GBS_ALL").iter_rightsizing_recommendations(
+            product=product, vendor_account_ids=vendor_account_ids, basis="effective")
+    except cloudability_client.CloudabilityError as e:
+        print(f'❌ {e}')
+        return
 
     print("✅ API call successful")
 
     header = ["Resource Name", "Last Seen", "Engine", "Instance Type - Current", "Instance Type - Recommended", "Savings ($)", "Savings (%)"]
     data = []
 
-    for account_rds in rightsizing_response.json().get('result', []):
+    for account_rds in recommendations:
         name = account_rds.get('name')
         last_seen = account_rds.get('lastSeen')
         engine = account_rds.get('databaseEngine')
@@ -774,6 +727,8 @@ def delete_rds_instance(db_instance_identifier, SkipFinalSnapshot=False):
             DBInstanceIdentifier=db_instance_identifier,
             SkipFinalSnapshot=True  # Already handled manually
         )
+        # The instance changed, the inventory snapshot is read again on next lookup
+        rds_inventory.invalidate_rds_inventory(rds_client)
         mu.log_info(f"Successfully initiated deletion of RDS instance {db_instance_identifier}.")
         mu.log_debug(f"Response: {response}")
 
@@ -853,8 +808,6 @@ def create_final_snapshot(db_instance_identifier):
 def main():
     global log_file
 
-    log_file = mu.setup_logging(True)
-
     parser = argparse.ArgumentParser(
         description="RDS automation for RESIZE, DELETE, and DELETE-WITH-COMMENTS.",
         epilog="Example: python rds1.py -i input.csv -a DELETE-WITH-COMMENTS"
@@ -880,7 +833,9 @@ def main():
     )
 
     args = parser.parse_args()
-    log_file = mu.setup_logging(args.verbose)
+    # Logging (and its STS call) starts once the arguments are valid, console logging stays on as before
+    log_file = mu.setup_logging(True)
+    load_account_context()
 
     mu.log_info(f"Running action: {args.action}, using input file: {args.input}")
 
@@ -963,19 +918,33 @@ rds
 
 import argparse
 import json
-import boto3, requests
 import mpe_utils as mu
+import aws_clients
+import rds_inventory
+import compute_optimizer_idle
+import cloudwatch_metrics
+import rds_state_poller
 import time
 from datetime import datetime
 from botocore.exceptions import ClientError
 
-# Initialize a session using Amazon RDS
-rds_client = boto3.client('rds')
-session = boto3.Session()
-compute_optimizer_client = boto3.client('compute-optimizer')
-account_no, AWS_REGION = mu.get_aws_account_id_and_region()
-msg_key = account_no + "_" + AWS_REGION + "_" + mu.get_current_month() + "_RDS_TERMINATION_R"
-msg_value = "Region:" + AWS_REGION 
+# Clients are created on first use and the account detail is resolved by load_account_context() once the arguments
+# are valid, so that --help and argument errors make no AWS call
+rds_client = aws_clients.LazyClient('rds')
+compute_optimizer_client = aws_clients.LazyClient('compute-optimizer')
+account_no = AWS_REGION = msg_key = msg_value = None
+
+def load_account_context():
+    """Resolves the account number, region and report message key used by the functions of this script.
+    Called by main(), callers importing the script call it before using its functions.
+    """
+    global account_no, AWS_REGION, msg_key, msg_value
+    if account_no:
+        return
+    account_no, AWS_REGION = mu.get_aws_account_id_and_region()
+    msg_key = account_no + "_" + AWS_REGION + "_" + mu.get_current_month() + "_RDS_TERMINATION_R"
+    msg_value = "Region:" + AWS_REGION 
+
 def get_rds_instances_for_current_account(input = "ALL",action="READ"):
     """
     Get the list of RDS instances for the current AWS account.
@@ -985,8 +954,7 @@ def get_rds_instances_for_current_account(input = "ALL",action="READ"):
     :return: List of RDS instance identifiers.
     """
     try:
-        response = rds_client.describe_db_instances()
-        db_instances = response['DBInstances']
+        db_instances = rds_inventory.get_db_instances(rds_client)
 
         if action == "COUNT":
             # Count the number of RDS instances
@@ -996,6 +964,8 @@ def get_rds_instances_for_current_account(input = "ALL",action="READ"):
         
         header_data = ["DBInstanceIdentifier", "DBInstanceClass", "DBInstanceEngine" ,"DBInstanceStatus", "Average_Connections"]
         instance_details = []
+        # Get the average connections for all RDS instances in bulk
+        average_connections = cloudwatch_metrics.get_average_db_connections([db_instance['DBInstanceIdentifier'] for db_instance in db_instances], days=30)
         for db_instance in db_instances:
             instance_id = db_instance['DBInstanceIdentifier']
             instance_state = db_instance['DBInstanceStatus']
@@ -1004,7 +974,7 @@ def get_rds_instances_for_current_account(input = "ALL",action="READ"):
             # Get the average connections for the RDS instance
             instance_arn = db_instance['DBInstanceArn']
             Idle =get_rds_instance_recommendations
-            Average_Connections = mu.get_active_db_connections(rds_instance_id=instance_id, days=30)
+            Average_Connections = average_connections.get(instance_id)
             instance_engine = db_instance['Engine']
             if input == "ALL":
                 instance_details.append([instance_id, instance_class,instance_engine, instance_state, Avergae_Connections])
@@ -1022,41 +992,44 @@ def get_idle_rds_instances_detail(option="ALL",test="Y"):
     :return: List of idle RDS instance identifiers.
     """
     global msg_key, msg_value
-    header_data = ["DBInstanceIdentifier", "DBInstanceClass", "DBInstanceEngine", "DBInstanceStatus", "AverageConnections","MaxConnections", "Finding", "SavingsOpportunityAfterDiscounts"]
+    import rds_utilization
+    header_data = ["DBInstanceIdentifier", "DBInstanceClass", "DBInstanceEngine", "DBInstanceStatus", "AverageConnections","MaxConnections", "Finding", "SavingsOpportunityAfterDiscounts", "CPUUtilizationP95", "LocalUtilizationCheck"]
     instance_details = []
-    # Create a Boto3 client for Compute Optimizer
-    client = boto3.client('compute-optimizer')
+    # Shared Compute Optimizer client
+    client = compute_optimizer_client
     # Initialize a list to hold the ARNs
     rds_instance_arns = []
 
     # Describe RDS instances
-    response = rds_client.describe_db_instances()
-    DBInstances = response['DBInstances']
+    DBInstances = rds_inventory.get_db_instances(rds_client)
     # Iterate through the instances and collect their ARNs
     for db_instance in DBInstances:
         rds_instance_arns.append(db_instance['DBInstanceArn'])
     # Get recommendations for RDS instances
-    response = client.get_idle_recommendations(
-        resourceArns=rds_instance_arns
-    )
+    idle_recommendations = compute_optimizer_idle.get_idle_recommendations(rds_instance_arns, client=client)
     total_savingsOpportunityAfterDiscounts = 0
     # Iterate through the recommendations
-    for recommendation in response['idleRecommendations']:
+    idle_db_instances = compute_optimizer_idle.join_idle_recommendations(DBInstances, idle_recommendations)
+    idle_instance_ids = [db_instance['DBInstanceIdentifier'] for db_instance, recommendation in idle_db_instances]
+    # Validate the idle recommendations against local CPU/connections utilization profiles
+    utilization_profiles = rds_utilization.get_utilization_profiles(idle_instance_ids, days=30)
+    idle_checks = rds_utilization.check_idle_candidates(utilization_profiles)
+    # The average connections come from the same profiles, DatabaseConnections is not queried twice
+    average_connections = rds_utilization.get_metric_averages(utilization_profiles, 'DatabaseConnections')
+    for db_instance, recommendation in idle_db_instances:
         # Check the utilization metrics for idle instances
-        resourceId = recommendation['resourceId']
         finding = recommendation['finding']
         savingsOpportunityAfterDiscounts = "$" + str(recommendation['savingsOpportunityAfterDiscounts']["estimatedMonthlySavings"]["value"])
         total_savingsOpportunityAfterDiscounts += recommendation['savingsOpportunityAfterDiscounts']["estimatedMonthlySavings"]["value"]
         maxDatabaseConnections = round(recommendation['utilizationMetrics'][1]["value"],2)
 
-        for db_instance in DBInstances:
-            instance_id = db_instance['DBInstanceIdentifier']
-            if instance_id == resourceId:
-                instance_state = db_instance['DBInstanceStatus']
-                instance_class = db_instance['DBInstanceClass']
-                AverageConnections = mu.get_active_db_connections(rds_instance_id=instance_id, days=30)
-                instance_engine = db_instance['Engine']
-                instance_details.append([instance_id, instance_class,instance_engine, instance_state, AverageConnections, maxDatabaseConnections, finding, savingsOpportunityAfterDiscounts])
+        instance_id = db_instance['DBInstanceIdentifier']
+        instance_state = db_instance['DBInstanceStatus']
+        instance_class = db_instance['DBInstanceClass']
+        AverageConnections = average_connections.get(instance_id)
+        cpu_p95 = rds_utilization.get_instance_profile(utilization_profiles, instance_id)['CPUUtilization']['p95']
+        instance_engine = db_instance['Engine']
+        instance_details.append([instance_id, instance_class,instance_engine, instance_state, AverageConnections, maxDatabaseConnections, finding, savingsOpportunityAfterDiscounts, cpu_p95, idle_checks.get(instance_id)])
         
     last_6_month_cost = mu.get_monthly_cost(service_name="Amazon Relational Database Service")
     last_month_cost = "Error"
@@ -1080,7 +1053,7 @@ def get_idle_rds_instances_detail(option="ALL",test="Y"):
     print("msg_key: " + msg_key)
     print("msg_value: " + msg_value)
     
-    if len(response['idleRecommendations']) > 0:
+    if len(idle_recommendations) > 0:
        # mu.write_data_to_confluent_topic(key=msg_key, value=msg_value)
         table_html = mu.get_table_html(header_data, instance_details)
         exec_table_html = mu.get_table_html(['Serial Number','DBInstanceIdentifier','No Action(NA))/Termination with Backup Snapshot(TWB)/Just Stop(JS)'], [['1', ' ', ' '],['2', ' ', ' '],['3', ' ', ' ']])
@@ -1122,22 +1095,16 @@ def get_rds_instance_recommendations():
         print(f"Error fetching recommendations: {e}")
         
 
-def wait_for_instance_available(db_instance_identifier, wait_interval=30, max_wait=1800):
+def wait_for_instance_available(db_instance_identifier, max_wait=1800):
     """
-    Waits until the RDS instance is in 'available' state.
+    Waits until the RDS instance is in 'available' state. Instances waited on from several threads are polled
+    together with batched describe calls by the shared rds_state_poller.
     """
-    waited = 0
-    while waited < max_wait:
-        _, instance_state, _, _, _ = get_instance_details(db_instance_identifier)
-        if instance_state == 'available':
-            mu.log_info(f"Instance {db_instance_identifier} is now available.")
-            return True
-        mu.log_info(f"Waiting for instance {db_instance_identifier} to become available (current state: {instance_state})...")
-        time.sleep(wait_interval)
-        waited += wait_interval
-    mu.log_error(f"Timeout: Instance {db_instance_identifier} did not become available after {max_wait} seconds.")
-    return False        
-
+    mu.log_info(f"Waiting for instance {db_instance_identifier} to be in 'available' state...")
+    available = rds_state_poller.wait_for_instances([db_instance_identifier], timeout=max_wait, rds_client=rds_client)[db_instance_identifier]
+    if available:
+        mu.log_info(f"Instance {db_instance_identifier} is now available.")
+    return available
 
 
 def get_instance_details(db_instance_identifier):
@@ -1209,6 +1176,8 @@ def resize_rds_instance(db_instance_identifier, new_instance_type):
             DBInstanceClass=new_instance_type,
             ApplyImmediately=True  # Apply changes immediately, may cause downtime
         )
+        # The instance changed, the inventory snapshot is read again on next lookup
+        rds_inventory.invalidate_rds_inventory(rds_client)
         mu.log_info(f"Successfully initiated resize of RDS instance {db_instance_identifier} to {new_instance_type}.")
         mu.log_debug(f"Response: {response}")
     
@@ -1296,6 +1265,8 @@ def delete_rds_instance(db_instance_identifier,SkipFinalSnapshot=False):
             DBInstanceIdentifier=db_instance_identifier,
             SkipFinalSnapshot=SkipFinalSnapshot  # Skip final snapshot before deletion
         )
+        # The instance changed, the inventory snapshot is read again on next lookup
+        rds_inventory.invalidate_rds_inventory(rds_client)
         mu.log_info(f"Successfully initiated deletion of RDS instance {db_instance_identifier}.")
         mu.log_debug(f"Response: {response}")
     
@@ -1367,10 +1338,8 @@ def process_rds_actions(input_file, action):
 
 
 def get_stopped_rds_instances():
-    client = boto3.client('rds')
-    response = client.describe_db_instances()
     stopped_rds = []
-    for db in response['DBInstances']:
+    for db in rds_inventory.get_db_instances(rds_client):
         if db['DBInstanceStatus'] == 'stopped':
             stopped_rds.append({
                 'name': db['DBInstanceIdentifier'],
@@ -1386,67 +1355,48 @@ def get_stopped_rds_instances():
     return stopped_rds
 
 
-def get_rds_recommendation_from_cloudability(input="ALL", action="READ", test="Y", override_account_id="675440017561"):
-    FD_API_PUBLIC_KEY, FD_API_SECRET_KEY = mu.get_cloudability_secrets_by_view(view_name="GBS_ALL")
-    ENV_ID = "8207c224-4499-4cbf-b63d-537d61bb2582"
+def get_rds_recommendation_from_cloudability(input="ALL", action="READ", test="Y", override_account_id="675440017561", recommendations=None):
+    """
+    Sends the RDS rightsize recommendation report of one account from Cloudability recommendations.
 
+    :param override_account_id: Account to report on instead of the current account. The RDS cost, the instance count
+                                and the CPU checks read the current account, so they are left out for another account.
+    :param recommendations: Cloudability RDS records of the account already fetched, e.g. by get_rds_recommendations_for_gbs_accounts.
+    """
+    import cloudability_client, rds_utilization
+    caller_account_id, region = mu.get_aws_account_id_and_region()
     if override_account_id:
         aws_account_number = override_account_id
-        region= "us-west-2"
         mu.log_info(f"using override account ID: {aws_account_number}")
     else:
-         aws_account_number, region = mu.get_aws_account_id_and_region()  
+        aws_account_number = caller_account_id
+    is_caller_account = str(aws_account_number) == str(caller_account_id)
 
     
     vendor_account_ids = aws_account_number
     product = "rds"
-    RIGHTSIZING_API_URL = f"https://api.cloudability.com/v3/rightsizing/aws/recommendations/{product}"
-
-    params = {'keyAccess': FD_API_PUBLIC_KEY, 'keySecret': FD_API_SECRET_KEY}
-    auth_response = requests.post('https://frontdoor.apptio.com/service/apikeylogin', json=params)
-    if auth_response.status_code != 200:
-        print(f'❌ Authentication failed: {auth_response.status_code}')
-        exit()
-
-    token = auth_response.headers.get('apptio-opentoken')
-    if not token:
-        print("❌ Authentication token not found!")
-        exit()
 
-    headers = {
-        'apptio-opentoken': token,
-        'Content-Type': 'application/json',
-        'apptio-current-environment': ENV_ID
-    }
-
-    api_params = {
-        'vendorAccountIds': vendor_account_ids,
-        'basis': "effective",
-        'limit': 100000,
-        'maxRecsPerResource': 1,
-        'offset': 0,
-        'product': product,
-        'duration': "thirty-day",
-        'viewId': 1467480,
-        'Accept': "text/csv"
-    }
-
-    rightsizing_response = requests.get(RIGHTSIZING_API_URL, headers=headers, params=api_params)
-    if rightsizing_response.status_code != 200:
-        print(f'❌ API call failed: {rightsizing_response.status_code}')
-        exit()
+    if recommendations is None:
+        try:
+            recommendations = cloudability_client.get_cloudability_client(mu.get_cloudability_secrets_by_view, view_name="GBS_ALL").iter_rightsizing_recommendations(
+                product=product, vendor_account_ids=vendor_account_ids, basis="effective")
+        except cloudability_client.CloudabilityError as e:
+            print(f'❌ {e}')
+            return
 
-    print("✅ API call successful")
+        print("✅ API call successful")
 
-    header = ["DBInstanceIdentifier", "Engine", "Instance Type - Current", "Instance Type - Recommended", "Savings ($)", "Savings (%)"]
+    header = ["DBInstanceIdentifier", "Engine", "Instance Type - Current", "Instance Type - Recommended", "Savings ($)", "Savings (%)", "CPU P95 (%)", "Local Check"]
     data = []
+    # True for the rows of instances in the caller account, the only ones with CloudWatch metrics here
+    local_rows = []
 
-    for account_rds in rightsizing_response.json().get('result', []):
-        print ("----incoming RDS:", json.dumps(account_rds, indent =2))
+    for account_rds in recommendations:
+        mu.log_debug(f"Incoming RDS recommendation: {account_rds.get('name')}")
 
         DBInstanceIdentifier = account_rds.get('name')
         engine = account_rds.get('databaseEngine')
-
+        is_local = str(account_rds.get('vendorAccountId')) == str(caller_account_id)
 
         for recommendation in account_rds.get('recommendations', []):
             if recommendation.get('action') == "Rightsize":
@@ -1455,18 +1405,30 @@ def get_rds_recommendation_from_cloudability(input="ALL", action="READ", test="Y
                 savings = round(recommendation.get('savings', 0.0), 2)
                 savings_pct = recommendation.get('savingsPct', 0.0)
                 data.append([DBInstanceIdentifier, engine, current_type, target_type, f"${savings}", f"{savings_pct}%"])
+                local_rows.append(is_local)
 
-
-    last_6_month_cost = mu.get_monthly_cost(service_name="Amazon Relational Database Service")
-    email_body = "<b>Last 6 months RDS Cost:</b><br>"
-    if last_6_month_cost and last_6_month_cost[0][1] != "$0.0":
-        email_body += mu.get_table_html(["Month", "Cost"], last_6_month_cost) + "<br>"
+    # Validate the rightsizing recommendations against local CPU utilization profiles
+    if is_caller_account:
+        rds_utilization.extend_with_local_checks(data, local_rows, rds_utilization.check_rightsize_candidates)
     else:
-        email_body += "This information is currently not available due to a technical issue.<br>"
+        header = header[:-2]
 
-    email_body += "Total Recommended RDS Instances for Rightsize: <b>{}/{}</b><br><br>".format(
-        len(data), get_rds_instances_for_current_account(input="ALL", action="COUNT")
-    )
+
+    # Cost Explorer and the RDS inventory are those of the caller account, another account's report leaves them out
+    email_body = ""
+    if is_caller_account:
+        last_6_month_cost = mu.get_monthly_cost(service_name="Amazon Relational Database Service")
+        email_body += "<b>Last 6 months RDS Cost:</b><br>"
+        if last_6_month_cost and last_6_month_cost[0][1] != "$0.0":
+            email_body += mu.get_table_html(["Month", "Cost"], last_6_month_cost) + "<br>"
+        else:
+            email_body += "This information is currently not available due to a technical issue.<br>"
+
+        email_body += "Total Recommended RDS Instances for Rightsize: <b>{}/{}</b><br><br>".format(
+            len(data), get_rds_instances_for_current_account(input="ALL", action="COUNT")
+        )
+    else:
+        email_body += "Total Recommended RDS Instances for Rightsize: <b>{}</b><br><br>".format(len(data))
 
     if data:
         table_html = mu.get_table_html(header, data)
@@ -1489,7 +1451,7 @@ def get_rds_recommendation_from_cloudability(input="ALL", action="READ", test="Y
             sender_list = "santhisri.kankanala@fiserv.com"
             cc_list = "mukesh.kumar4@Fiserv.com"
         else:
-            acct_no, region = override_account_id if override_account_id else aws_account_number
+            acct_no = aws_account_number
             sender_list, cc_list = mu.get_account_conatct_details(acct_no)
             mu.log_info("Test mode is OFF. Sending email to " + sender_list)
 
@@ -1504,9 +1466,33 @@ def get_rds_recommendation_from_cloudability(input="ALL", action="READ", test="Y
         mu.log_info("No RDS Found for Rightsize Recommendation")
 
 
-def main():
-    log_file = mu.setup_logging(True)
+def get_rds_recommendations_for_gbs_accounts(test="Y"):
+    """
+    Sends the RDS rightsize recommendation report of every GBS account, fetching the Cloudability
+    recommendations of all accounts in chunked multi-account calls instead of one call per account.
+
+    :param test: Set to 'Y' for test mode email.
+    """
+    import cloudability_client
+    account_ids = mu.get_accounts_for_gbs_org(detail_type="accounts")
+    if not account_ids:
+        mu.log_info("No GBS accounts found for RDS recommendations")
+        return
 
+    try:
+        recommendations_by_account = cloudability_client.get_cloudability_client(mu.get_cloudability_secrets_by_view, view_name="GBS_ALL").get_recommendations_by_account(
+            product="rds", account_ids=account_ids, basis="effective")
+    except cloudability_client.CloudabilityError as e:
+        print(f'❌ {e}')
+        return
+
+    print(f"✅ API call successful for {len(account_ids)} accounts")
+    for account_id, recommendations in recommendations_by_account.items():
+        get_rds_recommendation_from_cloudability(input="ALL", action="READ", test=test,
+                                                 override_account_id=account_id, recommendations=recommendations)
+
+
+def main():
     parser = argparse.ArgumentParser(
         description="RDS automation for RESIZE, DELETE, DELETE-WITH-COMMENTS, and Cloudability recommendations.",
         epilog="Example: python rds3.py -i input.txt -a DELETE-WITH-COMMENTS"
@@ -1538,13 +1524,24 @@ def main():
         default='N'
     )
 
+    parser.add_argument(
+        "-m", "--multi-account",
+        action="store_true",
+        help="Send Cloudability recommendation reports for all GBS accounts"
+    )
+
     args = parser.parse_args()
-    log_file = mu.setup_logging(args.verbose)
+    # Logging (and its STS call) starts once the arguments are valid, console logging stays on as before
+    log_file = mu.setup_logging(True)
+    load_account_context()
 
     mu.log_info(f"Running action: {args.action}, using input file: {args.input}")
 
     if args.action in ["RESIZE", "DELETE", "DELETE-WITH-COMMENTS"]:
         process_rds_actions(args.input, action=args.action)
+    elif args.multi_account:
+        mu.log_info("Getting RDS recommendations from Cloudability for all GBS accounts")
+        get_rds_recommendations_for_gbs_accounts(test=args.test)
     else:
         mu.log_info(f"Getting RDS recommendations from Cloudability for input: {args.input}")
         get_rds_recommendation_from_cloudability(input=args.input, action="READ", test=args.test)
@@ -1571,18 +1568,40 @@ Desc: importable header file - includes logging ability with custom wrappers & a
 """
 import logging,sys,json,csv
 #import pandas as pd
-import os,requests
-import pytz
+import os
 import boto3
 from datetime import datetime, timedelta
 import inspect,base64
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.application import MIMEApplication
+import gzip,io,itertools,tempfile
+# pytz, requests, the email MIME classes and the DynamoDB conditions are imported by the functions using
+# them, so that importing this module (every script start, --help included) does not load them
 # from confluent_kafka import Producer
 # from confluent_kafka import Consumer,KafkaError
 # import socket,ntplib, configparser
-from boto3.dynamodb.conditions import Key, Attr
+import rds_inventory
+import cost_explorer_cache
+import aws_instrumentation
+import aws_clients
+import log_group_inventory
+import log_group_matcher
+import log_group_updater
+import config_registry
+import html_report
+
+# Opt-in AWS API call statistics (FINOPS_AWS_INSTRUMENTATION=Y or a JSON file path), enabled before any client is created
+aws_instrumentation.enable_from_env()
+
+# Report tables over REPORT_INLINE_MAX_ROWS rows or REPORT_INLINE_MAX_BYTES of HTML are sent as a gzip CSV attachment,
+# with only the top REPORT_TOP_ROWS rows inline (see get_report_table_html). Every attachment is written to its own
+# REPORT_ATTACHMENT_PREFIX directory under REPORT_ATTACHMENT_DIR, so that runs do not overwrite each other, and is
+# deleted once sent (see remove_report_attachment)
+REPORT_INLINE_MAX_ROWS = 1000
+REPORT_INLINE_MAX_BYTES = 1024 * 1024
+REPORT_TOP_ROWS = 100
+REPORT_ATTACHMENT_DIR = tempfile.gettempdir()
+REPORT_ATTACHMENT_PREFIX = "finops-report-"
+# SES rejects messages larger than 10 MB, encoded attachments included
+SES_MAX_MESSAGE_BYTES = 10 * 1024 * 1024
 
 def add_multiple_items_to_dynamodb(table_name="stage-finops-cost-optimization-report-ddb", region_name='us-east-2',items_to_add=[]):
     """
@@ -1647,26 +1666,22 @@ def get_services_count_for_current_account(service="AmazonCloudWatch"):
     """
     try:
         if service == "AmazonCloudWatch":
-            total_log_groups_count = len(get_log_groups_with_retention(0))
+            total_log_groups_count = log_group_inventory.get_log_group_count()
             return total_log_groups_count
 
         elif service == "Amazon Relational Database Service":
-            rds_client = boto3.client('rds')
-            response = rds_client.describe_db_instances()
-            db_instances = response['DBInstances']
-
-            instance_count = len(db_instances)
+            instance_count = rds_inventory.get_db_instance_count()
                 
             return instance_count
         elif "SnapshotUsage" in service:
-            ec2_client = boto3.client('ec2')
+            ec2_client = aws_clients.get_client('ec2')
             response = ec2_client.describe_snapshots(OwnerIds=['self'])
             snapshots = response['Snapshots']
             snapshot_count = len(snapshots)
             
             return snapshot_count 
         elif service == "Amazon Elastic Block Store":
-            ec2_client = boto3.client('ec2')
+            ec2_client = aws_clients.get_client('ec2')
             response = ec2_client.describe_volumes()
             volumes = response['Volumes']
             volume_count = len(volumes)
@@ -1707,6 +1722,7 @@ def post_data_to_url(url="https://stage-write-data-to-ddb.merch-tech-pe-dev-nonp
     Returns:
     String: The response from the POST request.
     """
+    import requests
 
     # Define the headers
     headers = {
@@ -1734,6 +1750,7 @@ def update_data_to_url(url="https://stage-update-data-to-ddb.merch-tech-pe-dev-n
     Returns:
     String: The response from the POST request.
     """
+    import requests
 
     # Define the headers
     headers = {
@@ -1841,6 +1858,7 @@ def read_data_from_dynamodb_table(table_name="dev-finops-cost-optimization-repor
     Returns:
     dict: The item retrieved from the DynamoDB table.
     """
+    from boto3.dynamodb.conditions import Key, Attr
     app_env = os.environ.get('APP_ENV', 'dev')
     if app_env == 'stage':
         table_name = "stage-finops-cost-optimization-report-ddb"
@@ -1877,6 +1895,7 @@ def get_data_from_url(url="https://stage-get-data-from-ddb.merch-tech-pe-dev-non
     Returns:
     dict: The item retrieved from the DynamoDB table.
     """
+    import requests
     try:
         params = {'AccountNumber': AccountNumber, 'RegRecTypeDt': RegRecTypeDt}
         response = requests.get(url, params=params)
@@ -1893,7 +1912,7 @@ def get_savings_opportunities_for_aws_account():
     list: A list of dictionaries containing savings opportunity details.
     """
     # Create a Compute Optimizer client
-    client = boto3.client('compute-optimizer')
+    client = aws_clients.get_client('compute-optimizer')
     try:
         # Get recommendation summaries
         recommendations = client.get_recommendation_summaries(
@@ -2076,8 +2095,8 @@ def create_csv_file(file_name, data):
     Creates a CSV file with the specified name and data.
     
     Args:
-    file_name (str): The name of the CSV file to be created.
-    data (list): A list of lists containing the data to be written to the CSV file.
+    file_name (str): The name of the CSV file to be created, gzip compressed when it ends with ".gz".
+    data (list): A list of lists containing the data to be written to the CSV file, or any iterable of rows.
     
     Returns:
     None
@@ -2089,7 +2108,9 @@ def create_csv_file(file_name, data):
         
         # Create a DataFrame and write to CSV
         # Writing to CSV
-        with open(file_name, mode='w', newline='') as file:
+        # Rows are written as they are read, a .gz file is compressed on the fly
+        open_file = gzip.open if file_name.endswith('.gz') else open
+        with open_file(file_name, mode='wt', newline='') as file:
             writer = csv.writer(file)
     
             # Write the data
@@ -2217,8 +2238,8 @@ def get_monthly_cost_by_snapshot_id(snapshot_id):
     
     # Initialize the Boto3 EC2 client
     acct_no, region = get_aws_account_id_and_region()
-    ec2 = boto3.client('ec2')
-    pricing = boto3.client('pricing', region_name=region)  # Pricing API is only available in us-east-1
+    ec2 = aws_clients.get_client('ec2')
+    pricing = aws_clients.get_client('pricing', region_name=region)  # Pricing API is only available in us-east-1
 
 
     response = ec2.describe_snapshots(SnapshotIds=[snapshot_id])
@@ -2254,91 +2275,29 @@ def get_monthly_cost_by_snapshot_id(snapshot_id):
     return monthly_cost
  
 def get_monthly_cost(service_name="AmazonCloudWatch"):
-    """Retrieves the last 3 months of cost for a specified AWS service using the Cost Explorer API.
+    """Retrieves the last 6 months of cost for a specified AWS service using the Cost Explorer API.
+    Costs of all services (or usage types) are fetched with one grouped query per run and closed months
+    are served from the on-disk cache, see cost_explorer_cache.
     Args:
-    service_name (str): The name of the AWS service for which to retrieve the cost. Default is "AmazonCloudWatch".
+    service_name (str): The name of the AWS service (or the usage type containing "SnapshotUsage") for which to retrieve the cost. Default is "AmazonCloudWatch".
     Returns:
-    list: A list containing the last 3 months of costs for the specified service, formatted as [month, cost].
+    list: A list containing the last 6 months of costs for the specified service, formatted as [month, cost].
     """
     
-    start_date = (datetime.now() - timedelta(days=180)).strftime('%Y-%m-01')  # Start of the month 30 days ago
+    start_date = (datetime.now() - timedelta(days=180)).strftime('%Y-%m-01')  # Start of the month 180 days ago
     end_date = datetime.now().strftime('%Y-%m-%d')  # Current date
 
-    
-    client = boto3.client('ce')  # Cost Explorer client
+    group_by = "USAGE_TYPE" if "SnapshotUsage" in service_name else "SERVICE"
+    acct_no, region = get_aws_account_id_and_region()
+    client = aws_clients.get_client('ce')  # Cost Explorer client
     try:
-        if service_name and service_name.strip() == "AmazonCloudWatch":
-            response = client.get_cost_and_usage(
-                TimePeriod={
-                    'Start': start_date,
-                    'End': end_date
-                },
-                Granularity='MONTHLY',
-                Filter={
-                    'Dimensions': {
-                        'Key': 'SERVICE',
-                        'Values': [service_name]
-                    }
-                },
-                Metrics=['UnblendedCost']
-            )
-        elif  "SnapshotUsage" in service_name :
-            response = client.get_cost_and_usage(
-                TimePeriod={
-                    'Start': start_date,
-                    'End': end_date
-                },
-                Granularity='MONTHLY',
-                Filter={
-                    'Dimensions': {
-                        'Key': 'USAGE_TYPE',
-                        'Values': [service_name]
-                    }
-                },
-                Metrics=['UnblendedCost']
-            )
-        elif service_name and service_name.strip() == "Amazon Relational Database Service":
-            response = client.get_cost_and_usage(
-                TimePeriod={
-                    'Start': start_date,
-                    'End': end_date
-                },
-                Granularity='MONTHLY',
-                Filter={
-                    'Dimensions': {
-                        'Key': 'SERVICE',
-                        'Values': [service_name]
-                    }
-                },
-                Metrics=['UnblendedCost']
-            )
-        elif service_name and service_name.strip() == "Amazon Elastic Block Store":
-            # This else will handle "Amazon Elastic Block Store" and any other service
-            response = client.get_cost_and_usage(
-                TimePeriod={'Start': start_date, 'End': end_date},
-                Granularity='MONTHLY',
-                Filter={
-                    'Dimensions': {
-                        'Key': 'SERVICE',
-                        'Values': [service_name]
-                    }
-                },
-                Metrics=['UnblendedCost']
-            )
-
+        monthly_costs = cost_explorer_cache.get_monthly_costs(acct_no, start_date, end_date, group_by=group_by, client=client)
     except client.exceptions.InvalidParameterValueException as e:
         print(f"Invalid parameter value: {e}")
         return []
     last_6_mnths_cost = []
-    rec_count = 0
-    #print(response)
-    for result in response['ResultsByTime']:
-        rec_count += 1
-        last_6_mnths_cost.append([result['TimePeriod']['Start'][:-3],"$"+str(round(float(result['Total']['UnblendedCost']['Amount']),2))])
-        #print(f"Billing Period: {result['TimePeriod']['Start']} to {result['TimePeriod']['End']}")
-       # print(f"Monthly cost for {service_name}: ${result['Total']['UnblendedCost']['Amount']}")
-        if rec_count == 6:
-            break
+    for month in sorted(monthly_costs)[:6]:
+        last_6_mnths_cost.append([month, "$"+str(round(monthly_costs[month].get(service_name.strip(), 0.0),2))])
 
     return last_6_mnths_cost[::-1]  # Reverse the list to show the most recent month first
 
@@ -2351,7 +2310,7 @@ def get_active_db_connections(rds_instance_id,days=7):
     None: Prints the active database connections for the specified RDS instance.
     """
     # Create a CloudWatch client
-    cloudwatch = boto3.client('cloudwatch')
+    cloudwatch = aws_clients.get_client('cloudwatch')
     # Define the time range for the last month
     end_time = datetime.now()
     start_time = end_time - timedelta(days=days)
@@ -2388,26 +2347,73 @@ def get_active_db_connections(rds_instance_id,days=7):
         return None
 
 
-def get_table_html(header, data):
+def get_table_html(header, data, formatters=None, max_rows=None):
     """
     Generates an HTML table from the provided header and data.
+    Rows are streamed into one buffer and values are HTML escaped, see html_report.write_table.
     
     Args:
     header (list): List of column headers for the table.
     data (list): List of rows, where each row is a list of values.
+    formatters (dict): Column index or header name -> callable formatting the values of the column. Default is None.
+    max_rows (int): Maximum rows shown, the rest are announced with a "see attachment" row. Default shows all.
     
     Returns:
     str: HTML string representing the table.
     """
-    html = "<table border='1'>\n"
-    html += "<tr bgcolor='#FF6600' style='color: white;' >" + "".join(f"<th>{col}</th>" for col in header) + "</tr>\n"
-    for row in data:
-        html += "<tr>" 
-        for val in row:
-                html += f"<td>{val}</td>"
-        html += "</tr>\n"
-    html += "</table>"
-    return html
+    return html_report.render_table(header, data, formatters=formatters, max_rows=max_rows)
+
+def get_report_table_html(header, data, file_name, top_key=None, max_inline_rows=REPORT_INLINE_MAX_ROWS, top_rows=REPORT_TOP_ROWS):
+    """
+    Generates the HTML table of a report, moving a large table to a gzip CSV attachment.
+    When data has more than max_inline_rows rows or its table is over REPORT_INLINE_MAX_BYTES, all rows are written with
+    the header to the gzip CSV file_name in a new temporary directory and only the top_rows first rows are shown inline.
+    send_email deletes the attachment once sent.
+    
+    Args:
+    header (list): List of column headers for the table.
+    data (list): List of rows, where each row is a list of values.
+    file_name (str): Name of the attachment, e.g. "log_groups_123456789012_us-east-1.csv.gz".
+    top_key (callable): Ranks the rows shown inline, highest first, e.g. by savings. Default shows the first rows.
+    max_inline_rows (int): Maximum rows of a table sent inline. Default is REPORT_INLINE_MAX_ROWS.
+    top_rows (int): Rows shown inline when the table is attached. Default is REPORT_TOP_ROWS.
+    
+    Returns:
+    tuple: HTML string representing the table, attachment file path or None when the whole table is inline.
+    """
+    if len(data) <= max_inline_rows:
+        table_html = get_table_html(header, data)
+        if len(table_html) <= REPORT_INLINE_MAX_BYTES:
+            return table_html, None
+
+    file_path = os.path.join(tempfile.mkdtemp(prefix=REPORT_ATTACHMENT_PREFIX, dir=REPORT_ATTACHMENT_DIR), file_name)
+    if create_csv_file(file_path, itertools.chain([header], data)) is not True:
+        log_warning(f"Report attachment {file_path} could not be created, sending the whole table inline")
+        remove_report_attachment(file_path)
+        return get_table_html(header, data), None
+    rows = sorted(data, key=top_key, reverse=True) if top_key else data
+    overflow_text = "{remaining} more rows not shown, see attachment " + file_name + " for all {total} rows"
+    return html_report.render_table(header, rows, max_rows=top_rows, overflow_text=overflow_text), file_path
+
+def remove_report_attachment(file_path):
+    """
+    Deletes an attachment of get_report_table_html with its temporary directory. Other paths are left as is.
+    
+    Args:
+    file_path (str): Attachment file path, or None.
+    """
+    if not file_path:
+        return
+    report_dir = os.path.dirname(os.path.abspath(file_path))
+    if os.path.dirname(report_dir) != os.path.abspath(REPORT_ATTACHMENT_DIR) or \
+            not os.path.basename(report_dir).startswith(REPORT_ATTACHMENT_PREFIX):
+        return
+    try:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        os.rmdir(report_dir)
+    except OSError as e:
+        log_warning(f"Report attachment {file_path} could not be deleted: {e}")
 
 def get_aws_account_id_and_region():
     """Retrieves the AWS account ID and region using the Boto3 library.
@@ -2415,15 +2421,11 @@ def get_aws_account_id_and_region():
     Returns:
     tuple: (account_id, region)
     """
-    # Initialize a Boto3 session
-    session = boto3.Session()
-    
-    # Get the current region
-    region = session.region_name
+    # Get the current region from the shared session
+    region = aws_clients.get_session().region_name
 
-    # Get the account ID by calling STS
-    sts_client = session.client('sts')
-    account_id = sts_client.get_caller_identity().get('Account')
+    # Get the account ID from STS, called once per credential set and cached, see aws_clients.get_caller_identity
+    account_id = aws_clients.get_caller_identity().get('Account')
 
     return account_id, region
 
@@ -2435,6 +2437,7 @@ def setup_logging(log_to_console=False):
     Args:
     log_to_console (bool): If True, logs to the console. Default is False.
     """
+    import pytz
     # Get the calling script's name
     caller_name = inspect.stack()[1].filename
     script_name = os.path.basename(caller_name).split('.')[0]
@@ -2464,6 +2467,8 @@ def setup_logging(log_to_console=False):
 
     # Log AWS account and region info only once at the start
     logging.info(f"Logging started for {script_name}. AWS Account ID: {account_id}, Region: {region}")
+    if aws_instrumentation.is_enabled():
+        logging.info("AWS API instrumentation is enabled, the call summary is logged at exit")
     return log_file 
 
 # Wrapper functions for various log levels
@@ -2493,65 +2498,68 @@ def get_cloudability_secrets_by_view(view_name="GBS_ALL"):
     tuple: A tuple containing the public key and secret key for the specified view.
     """
     cloudability_secrets = "./config/cloudability_secrets.json"
-    if not os.path.exists(cloudability_secrets):
+    try:
+        # Parsed once per process and reloaded when the file changes, see config_registry
+        secrets_data = config_registry.get_config(cloudability_secrets)
+    except FileNotFoundError:
         log_error(f"account contact file not found: {cloudability_secrets}")
         return ""
-    
-    with open(cloudability_secrets, 'r') as file:
-        try:
-            secrets_data = json.load(file)
-            sec_json = secrets_data.get(view_name, {})
-            if sec_json:
-                pub_key = sec_json.get('FD_API_PUBLIC_KEY', "")
-                sec_key = sec_json.get('FD_API_SECRET_KEY', "")
-
-                return pub_key, sec_key
-        except json.JSONDecodeError as e:
-            log_exception(e)
-            return "",""
+    except json.JSONDecodeError as e:
+        log_exception(e)
+        return "",""
+
+    sec_json = secrets_data.get(view_name, {})
+    if sec_json:
+        pub_key = sec_json.get('FD_API_PUBLIC_KEY', "")
+        sec_key = sec_json.get('FD_API_SECRET_KEY', "")
+
+        return pub_key, sec_key
+
+def _get_gbs_org_accounts(accounts_data):
+    """Builds the config_registry index of all accounts of the GBS org, in chris direct order."""
+    accounts_list = []
+    for chris_direct in list(accounts_data.keys()):
+        cd_json = accounts_data.get(chris_direct, {})
+        if cd_json:
+            accounts = cd_json.get('accounts', "")
+            if accounts:
+                accounts_list.extend(accounts)
+    return accounts_list
 
 def get_accounts_for_gbs_org(detail_type="all",chris_direct_name=""):    
     """Retrieves the AWS accounts for the GBS organization from a JSON file."""
 
     gbs_accounts_file = "./config/monthly_report_mapings.json"
-    if not os.path.exists(gbs_accounts_file):
+    try:
+        # Parsed once per process and reloaded when the file changes, see config_registry
+        accounts_data = config_registry.get_config(gbs_accounts_file)
+        if detail_type == "all":
+            return accounts_data
+        elif detail_type == "chris_directs":
+            return list(accounts_data.keys())
+        elif detail_type == "accounts":
+            return list(config_registry.get_index(gbs_accounts_file, 'accounts', _get_gbs_org_accounts))
+        elif detail_type == "chris_direct_accounts" and chris_direct_name:
+            accounts_list = []
+            cd_json = accounts_data.get(chris_direct_name, {})
+            if cd_json:
+                accounts = cd_json.get('accounts', "")
+                if accounts:
+                    accounts_list.extend(accounts)
+            return accounts_list
+        elif detail_type == "report_data_keys":
+            report_data_keys = accounts_data.get('pradeep.pai@Fiserv.com', {}).get('report_data_keys', [])
+            return report_data_keys
+            
+        else:
+            log_error(f"Invalid detail_type: {detail_type}. Expected 'all' or 'account_ids'.")
+            return []
+    except FileNotFoundError:
         log_error(f"GBS accounts file not found: {gbs_accounts_file}")
         return []
-    
-    accounts_list = []
-    with open(gbs_accounts_file, 'r') as file:
-        try:
-            accounts_data = json.load(file)
-            if detail_type == "all":
-                return accounts_data
-            elif detail_type == "chris_directs":
-                return list(accounts_data.keys())
-            elif detail_type == "accounts":
-                for chris_direct in list(accounts_data.keys()):
-                    cd_json = accounts_data.get(chris_direct, {})
-                    if cd_json:
-                        accounts = cd_json.get('accounts', "")
-                        if accounts:
-                            accounts_list.extend(accounts)
-                return accounts_list
-            elif detail_type == "chris_direct_accounts" and chris_direct_name:
-                
-                cd_json = accounts_data.get(chris_direct_name, {})
-                if cd_json:
-                    accounts = cd_json.get('accounts', "")
-                    if accounts:
-                        accounts_list.extend(accounts)
-                return accounts_list
-            elif detail_type == "report_data_keys":
-                report_data_keys = accounts_data.get('pradeep.pai@Fiserv.com', {}).get('report_data_keys', [])
-                return report_data_keys
-                
-            else:
-                log_error(f"Invalid detail_type: {detail_type}. Expected 'all' or 'account_ids'.")
-                return []
-        except json.JSONDecodeError as e:
-            log_exception(e)
-            return []
+    except json.JSONDecodeError as e:
+        log_exception(e)
+        return []
 
 def get_account_conatct_details(account_id):
     """
@@ -2564,22 +2572,22 @@ def get_account_conatct_details(account_id):
     string: A string containing the contacts with , separated values for the specified account ID.
     """
     account_contacts_file = "./config/account_contacts.json"
-    if not os.path.exists(account_contacts_file):
+    try:
+        # Parsed once per process and reloaded when the file changes, see config_registry
+        accounts_data = config_registry.get_config(account_contacts_file)
+    except FileNotFoundError:
         log_error(f"account contact file not found: {account_contacts_file}")
         return ""
-    
-    with open(account_contacts_file, 'r') as file:
-        try:
-            accounts_data = json.load(file)
-            cont_json = accounts_data.get(account_id, {})
-            if cont_json:
-                contacts = cont_json.get('contacts', "")
-                CCList = cont_json.get('CCList', "")
-
-                return contacts, CCList
-        except json.JSONDecodeError as e:
-            log_exception(e)
-            return "",""
+    except json.JSONDecodeError as e:
+        log_exception(e)
+        return "",""
+
+    cont_json = accounts_data.get(account_id, {})
+    if cont_json:
+        contacts = cont_json.get('contacts', "")
+        CCList = cont_json.get('CCList', "")
+
+        return contacts, CCList
 
 def get_splunk_destination_arn_region(region_name):
     """
@@ -2591,148 +2599,99 @@ def get_splunk_destination_arn_region(region_name):
     """
     splunk_sub_fil_arns_file = "./config/splunk_subscription_filter_arns.json"
     destination_arn = ""
-    if not os.path.exists(splunk_sub_fil_arns_file):
+    try:
+        # Parsed once per process and reloaded when the file changes, see config_registry
+        arn_data = config_registry.get_config(splunk_sub_fil_arns_file)
+    except FileNotFoundError:
         log_error(f"splunk subscription filter arns file not found: {splunk_sub_fil_arns_file}")
         return ""
-    with open(splunk_sub_fil_arns_file, 'r') as file:
-        try:
-            arn_data = json.load(file)
-            destination_arn_json = arn_data.get(region_name, None)
-            if destination_arn_json:
-                destination_arn = destination_arn_json.get("destination_arn", None)
-                return destination_arn
-            else:   
-                log_error(f"Region {region_name} not found in splunk subscription filter arns file.")
-                return ""
-        except json.JSONDecodeError as e:
-            log_exception(e)
-            return ""
+    except json.JSONDecodeError as e:
+        log_exception(e)
+        return ""
+
+    destination_arn_json = arn_data.get(region_name, None)
+    if destination_arn_json:
+        destination_arn = destination_arn_json.get("destination_arn", None)
+        return destination_arn
+    else:   
+        log_error(f"Region {region_name} not found in splunk subscription filter arns file.")
+        return ""
 
 
 def check_subscription_filter(log_group_name, destination_arn=""):
-    # Create a CloudWatch Logs client
-    client = boto3.client('logs')
-    arn_found = 'N'
-    # Retrieve the subscription filters for the specified log group
-    response = client.describe_subscription_filters(
-        logGroupName=log_group_name
-    )
-    
-    # Check if there are any subscription filters attached
-    if response['subscriptionFilters']: 
-        for filter in response['subscriptionFilters']:
-            if filter['destinationArn'] == destination_arn:
-                #print(f"Subscription filter found for log group '{log_group_name}' with ARN: {filter['destinationArn']}")
-                arn_found = 'Y' 
-    else:
-        arn_found = 'N'
-    
-    return arn_found
+    """
+    Checks if a log group has a subscription filter to the given destination. The filters of a log group are
+    described once per run and cached in log_group_inventory.
+    Returns:
+    str: 'Y' if the subscription filter is found, otherwise 'N'.
+    """
+    return log_group_inventory.get_subscription_status([log_group_name], destination_arn)[log_group_name]
 
 
 def get_log_groups_with_retention(retention_days=7):
     """
-    Retrieves all CloudWatch log groups with a retention period greater than or equal to the specified number of days.
+    Retrieves all CloudWatch log groups with a retention period greater than the specified number of days, or that never expire.
+    The log groups come from the log_group_inventory snapshot (one scan per run) and the splunk subscription filter status
+    is only described for the matching log groups, concurrently.
     Args:
-    retention_days (int): The minimum retention period in days to filter log groups. Default is 1 day.
+    retention_days (int): The minimum retention period in days to filter log groups. Default is 7 days.
     Returns:
     list: A list of log group names with their retention periods that match the specified criteria.
     """
-    # Create a CloudWatch Logs client
-    client = boto3.client('logs')
-
     # Initialize variables
     acct_no, region = get_aws_account_id_and_region()
     sp_sub_fltr_arn = get_splunk_destination_arn_region(region)
-    next_token = None
-    list_of_log_groups_with_retention_detail_and_sub_fltr_stat = []
+    log_groups = log_group_inventory.get_log_groups_with_retention_over(retention_days)
+    # Check if log groups are already having required splunk subscription filter or not
+    sp_sub_fltr_status = log_group_inventory.get_subscription_status([log_group['logGroupName'] for log_group in log_groups], sp_sub_fltr_arn)
 
-    # Loop to handle pagination
-    while True:
-        # Build the parameters for the describe_log_groups call
-        params = {}
-        if next_token:
-            params['nextToken'] = next_token
-
-        # Retrieve log groups
-        response = client.describe_log_groups(**params)
-
-        # Process each log group
-        for log_group in response.get('logGroups', []):
-            # Check if log group is already having required splunk subscription filter or not
-            sp_sub_fltr_found = check_subscription_filter(log_group['logGroupName'], sp_sub_fltr_arn)
-            # Get the retention period for the log group
-            retention_in_days = log_group.get('retentionInDays')
-
-            # Check if the log group's retention period matches the specified period
-            if retention_in_days and retention_in_days > retention_days:
-                gr_name_n_ret_days_sub_ft_stat = log_group['logGroupName'] + ":" + str(retention_in_days) + ":" + sp_sub_fltr_found
-                list_of_log_groups_with_retention_detail_and_sub_fltr_stat.append(gr_name_n_ret_days_sub_ft_stat)
-            elif not retention_in_days:  
-                # If retentionInDays is None, it means the log group never expires
-                gr_name_n_ret_days_sub_ft_stat = log_group['logGroupName'] + ":Never expire" + ":" + sp_sub_fltr_found
-                list_of_log_groups_with_retention_detail_and_sub_fltr_stat.append(gr_name_n_ret_days_sub_ft_stat)
-        # Check if there is a next token
-        next_token = response.get('nextToken')
-        if not next_token:
-            break
+    list_of_log_groups_with_retention_detail_and_sub_fltr_stat = []
+    for log_group in log_groups:
+        # If retentionInDays is None, it means the log group never expires
+        retention_in_days = log_group.get('retentionInDays')
+        retention = str(retention_in_days) if retention_in_days else "Never expire"
+        list_of_log_groups_with_retention_detail_and_sub_fltr_stat.append(
+            log_group['logGroupName'] + ":" + retention + ":" + sp_sub_fltr_status[log_group['logGroupName']])
 
     return list_of_log_groups_with_retention_detail_and_sub_fltr_stat
 
 def get_given_log_groups_with_retention(log_groups,retention_days=1):
     """
-    Retrieves all CloudWatch log groups with a retention period greater than or equal to the specified number of days.
+    Retrieves the given CloudWatch log groups with their retention period and splunk subscription filter status.
+    The patterns are compiled once (see log_group_matcher): a pattern matches the log groups whose name contains it,
+    a '^' prefixed pattern the log groups whose name starts with it. When all patterns are prefixes only the matching
+    log groups are listed, with the server side logGroupNamePrefix filter.
     Args:
+    log_groups (list): Input lines, the first comma separated field is the log group pattern.
     retention_days (int): The minimum retention period in days to filter log groups. Default is 1 day.
     Returns:
     list: A list of log group names with their retention periods that match the specified criteria.
     """
-    # Create a CloudWatch Logs client
-    client = boto3.client('logs')
+    matcher = log_group_matcher.compile_log_group_patterns(log_groups)
+    if not matcher:
+        return []
 
     # Initialize variables
     acct_no, region = get_aws_account_id_and_region()
     sp_sub_fltr_arn = get_splunk_destination_arn_region(region)
-    next_token = None
-    list_of_log_groups_with_retention_detail_and_sub_fltr_stat = []
+    matching_log_groups = log_group_inventory.get_log_groups_matching(matcher)
+    # Check if log groups are already having required splunk subscription filter or not
+    sp_sub_fltr_status = log_group_inventory.get_subscription_status([log_group['logGroupName'] for log_group in matching_log_groups], sp_sub_fltr_arn)
 
-    # Loop to handle pagination
-    while True:
-        # Build the parameters for the describe_log_groups call
-        params = {}
-        if next_token:
-            params['nextToken'] = next_token
-
-        # Retrieve log groups
-        response = client.describe_log_groups(**params)
-
-        # Process each log group
-        for log_group in response.get('logGroups', []):
-            if log_groups:
-                for lg in log_groups:
-                    if lg.split(',')[0].strip().replace('\n','') not in log_group['logGroupName']:
-                        continue 
-                    else:
-                        print(f"Log group found: {log_group['logGroupName']}")
-                        # Check if log group is already having required splunk subscription filter or not
-                        sp_sub_fltr_found = check_subscription_filter(log_group['logGroupName'], sp_sub_fltr_arn)
-                        # Get the retention period for the log group
-                        retention_in_days = log_group.get('retentionInDays')
-
-                        # Check if the log group's retention period matches the specified period
-                        if retention_in_days and retention_in_days >= retention_days:
-                            gr_name_n_ret_days_sub_ft_stat = log_group['logGroupName'] + ":" + str(retention_in_days) + ":" + sp_sub_fltr_found
-                            list_of_log_groups_with_retention_detail_and_sub_fltr_stat.append(gr_name_n_ret_days_sub_ft_stat)
-                        else:
-                            gr_name_n_ret_days_sub_ft_stat = log_group['logGroupName'] + ":Never expire" + ":" + sp_sub_fltr_found
-                            list_of_log_groups_with_retention_detail_and_sub_fltr_stat.append(gr_name_n_ret_days_sub_ft_stat)
-                continue
-            
-
-        # Check if there is a next token
-        next_token = response.get('nextToken')
-        if not next_token:
-            break
+    list_of_log_groups_with_retention_detail_and_sub_fltr_stat = []
+    for log_group in matching_log_groups:
+        print(f"Log group found: {log_group['logGroupName']}")
+        sp_sub_fltr_found = sp_sub_fltr_status[log_group['logGroupName']]
+        # Get the retention period for the log group
+        retention_in_days = log_group.get('retentionInDays')
+
+        # Check if the log group's retention period matches the specified period
+        if retention_in_days and retention_in_days >= retention_days:
+            gr_name_n_ret_days_sub_ft_stat = log_group['logGroupName'] + ":" + str(retention_in_days) + ":" + sp_sub_fltr_found
+            list_of_log_groups_with_retention_detail_and_sub_fltr_stat.append(gr_name_n_ret_days_sub_ft_stat)
+        else:
+            gr_name_n_ret_days_sub_ft_stat = log_group['logGroupName'] + ":Never expire" + ":" + sp_sub_fltr_found
+            list_of_log_groups_with_retention_detail_and_sub_fltr_stat.append(gr_name_n_ret_days_sub_ft_stat)
     return list_of_log_groups_with_retention_detail_and_sub_fltr_stat
 
 
@@ -2749,12 +2708,9 @@ def add_subscription_filter_to_log_group(log_group_name, filter_name="Splunk",fi
     Returns:
     dict: Response from the AWS API call.
     """
-    client = boto3.client('logs')
-    
     AWS_REGION = os.getenv('AWS_REGION')
     if not AWS_REGION:
-        session = boto3.Session()
-        AWS_REGION = session.region_name
+        AWS_REGION = aws_clients.get_session().region_name
 
     destination_arn = get_splunk_destination_arn_region(AWS_REGION)
     if not destination_arn:
@@ -2766,12 +2722,8 @@ def add_subscription_filter_to_log_group(log_group_name, filter_name="Splunk",fi
         return {"Message": f"Subscription filter already exists for log group '{log_group_name}' with ARN: {destination_arn}"}
     
     try:
-        response = client.put_subscription_filter(
-        logGroupName=log_group_name,
-        filterName=filter_name,
-        filterPattern=filter_pattern,
-        destinationArn=destination_arn
-        )
+        # Rate limited put, shared with the bulk updates of log_group_updater
+        response = log_group_updater.put_subscription_filter(log_group_name, destination_arn, filter_name, filter_pattern)
         
         return response
     except Exception as e:
@@ -2789,24 +2741,72 @@ def get_aws_account_name_by_id(account_id):
     str: The name of the AWS account, or an error message if not found.
     """
     jetbridge_accounts_file = "./config/jetbridge_accounts.json"
-    if not os.path.exists(jetbridge_accounts_file):
+    try:
+        # Parsed once per process and reloaded when the file changes, see config_registry
+        accounts_data = config_registry.get_config(jetbridge_accounts_file)
+    except FileNotFoundError:
         log_error(f"Jetbridge accounts file not found: {jetbridge_accounts_file}")
         return "Jetbridge accounts file not found."
-    with open(jetbridge_accounts_file, 'r') as file:
-        try:
-            accounts_data = json.load(file)
-            account_name = accounts_data.get(account_id, {}).get('name', None)
-            if account_name:
-                return account_name
-            else:
-                log_error(f"Account ID {account_id} not found in jetbridge-accounts.json.")
-                return f"Account ID {account_id} not found in jetbridge-accounts.json." 
-        except json.JSONDecodeError as e:
-            log_exception(e)
-            return "Error decoding JSON from jetbridge-accounts.json file."
+    except json.JSONDecodeError as e:
+        log_exception(e)
+        return "Error decoding JSON from jetbridge-accounts.json file."
+
+    account_name = accounts_data.get(account_id, {}).get('name', None)
+    if account_name:
+        return account_name
+    else:
+        log_error(f"Account ID {account_id} not found in jetbridge-accounts.json.")
+        return f"Account ID {account_id} not found in jetbridge-accounts.json." 
+
+
+def build_raw_email(sender, to_addresses, cc_addresses, subject, body_html, attachments=None, reply_to=None):
+    """
+    Builds a MIME email with an HTML body and file attachments, as the raw message of SES send_raw_email.
+    The message is generated once into one buffer, without intermediate string and base64 copies of it.
+    
+    Args:
+    sender (str): From address.
+    to_addresses (list): To addresses.
+    cc_addresses (list): CC addresses.
+    subject (str): Subject of the email.
+    body_html (str): HTML body of the email.
+    attachments (list): File paths to attach. Default is None.
+    reply_to (str): Reply-To address. Default is None.
+    
+    Returns:
+    bytes: Raw MIME message.
+    
+    Raises:
+    ValueError: If the message is larger than SES_MAX_MESSAGE_BYTES.
+    """
+    from email.generator import BytesGenerator
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    from email.mime.application import MIMEApplication
+
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    msg['To'] = ", ".join(to_addresses)
+    if cc_addresses:
+        msg['Cc'] = ", ".join(cc_addresses)
+    if reply_to:
+        msg['Reply-To'] = reply_to
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body_html, 'html', 'utf-8'))
 
+    for file_path in attachments or []:
+        with open(file_path, 'rb') as attachment:
+            part = MIMEApplication(attachment.read(), _subtype="gzip" if file_path.endswith('.gz') else "octet-stream")
+        part.add_header("Content-Disposition", "attachment", filename=os.path.basename(file_path))
+        msg.attach(part)
 
-def send_email(menv="", email_type="FinOps-Automation-Report", sender_list="mukesh.kumar4@fiserv.com",cc_list="gurminder.sidhu@fiserv.com",email_body="",test="N",file_name=""):
+    buffer = io.BytesIO()
+    BytesGenerator(buffer, mangle_from_=False).flatten(msg)
+    if buffer.tell() > SES_MAX_MESSAGE_BYTES:
+        raise ValueError(f"Email of {buffer.tell()} bytes is over the SES limit of {SES_MAX_MESSAGE_BYTES} bytes")
+    return buffer.getvalue()
+
+def send_email(menv="", email_type="FinOps-Automation-Report", sender_list="mukesh.kumar4@fiserv.com",cc_list="gurminder.sidhu@fiserv.com",email_body="",test="N",file_name="",attachments=None):
     """
     Sends an email notification with the specified parameters.
     
@@ -2816,6 +2816,7 @@ def send_email(menv="", email_type="FinOps-Automation-Report", sender_list="muke
     sender_list (str): Comma-separated list of email addresses to send the notification to.
     cc_list (str): Comma-separated list of email addresses to CC. Default is "  
     email_body (str): The body of the email to be sent. 
+    attachments (list): File paths to attach, e.g. the report CSV of get_report_table_html (deleted once sent). Default is None.
    
     Returns:
     None
@@ -2877,8 +2878,25 @@ def send_email(menv="", email_type="FinOps-Automation-Report", sender_list="muke
         # The character encoding for the email.
         CHARSET = "UTF-8"
 
-        ses = boto3.client("ses", region_name=AWS_REGION)
+        ses = aws_clients.get_client("ses", region_name=AWS_REGION)
         
+        if attachments:
+            # Sent as a raw MIME message, the attachments are not part of the SES send_email API
+            try:
+                raw_message = build_raw_email(SENDER, RECIPIENT, [address for address in CCADDRESSES if address.strip()],
+                                              SUBJECT, BODY_HTML, attachments, reply_to='mukesh.kumar4@fiserv.com')
+                response = ses.send_raw_email(Source=SENDER, Destinations=[address for address in RECIPIENT + CCADDRESSES if address.strip()],
+                                              RawMessage={'Data': raw_message})
+            except Exception as e:
+                log_exception(e)
+                print(f"Error sending email: {e}")
+                return {"Error": str(e)}
+            finally:
+                for file_path in attachments:
+                    remove_report_attachment(file_path)
+            print(f"Email sent with {len(attachments)} attachment(s)! Message ID: {response['MessageId']}")
+            return response
+
         # Try to send the email.
         try:
             response = ses.send_email(
@@ -2933,61 +2951,36 @@ def send_email_with_attachment(menv="Test", email_type="FinOps-Monthly-Cost-Savi
     sender_list (str): Comma-separated list of email addresses to send the notification to.
     cc_list (str): Comma-separated list of email addresses to CC. Default is "  
     email_body (str): The body of the email to be sent. 
+    filename (str): Path of the file to attach, or a list of paths.
    
     Returns:
     None
     """
     # Email configuration
     sender_email = "finops-automations@mail.fiserv.com"
-    RECIPIENT = sender_email.split(",")
-    receiver_email = sender_list
-    RECIPIENT = receiver_email.split(",")
-    CCADDRESSES = ["mukesh.kumar4@fiserv.com"]
-    subject = 'Test Email with Attachment'
+    RECIPIENT = sender_list.split(",")
+    subject = email_type + "(" + menv + ")"
     body_html = """
     <html>
     <head></head>
     <body>
-        <h1>This is Test Email</h1>
-        <p>FinOps Cost Saving Report</p>
+    """ + email_body + """
     </body>
     </html>
     """
-
-    # Create a multipart message
-    msg = MIMEMultipart()
-    msg['From'] = sender_email
-    msg['To'] = receiver_email
-    msg['Subject'] = subject
-
-    # Add body to email
-    body = MIMEText(body_html, 'html')
-    msg.attach(body)
-
-    # Attach the file
-    with open(filename, 'rb') as attachment:
-        part = MIMEApplication(attachment.read())
-        part.add_header(
-            "Content-Disposition",
-            f"attachment; filename= {os.path.basename(filename)}",
-        )
-        msg.attach(part)
-
-    # Convert message to string
-    raw_msg = msg.as_string()
-    print(os.path.basename(filename))
-    # Encode the message in base64
-    raw_msg_bytes = raw_msg.encode('utf-8')
-    raw_msg_base64 = base64.b64encode(raw_msg_bytes).decode('utf-8')
+    filenames = filename if isinstance(filename, list) else [filename]
+    # SES base64 encodes the raw message itself, the bytes are passed as they are
+    raw_msg = build_raw_email(sender_email, RECIPIENT, [], subject, body_html, filenames)
+    print(", ".join(os.path.basename(name) for name in filenames))
 
     # Initialize Boto3 SES client
-    ses_client = boto3.client('ses')
+    ses_client = aws_clients.get_client('ses')
 
     # Send email
     try:
         response = ses_client.send_raw_email(
             RawMessage={
-                'Data': raw_msg_base64
+                'Data': raw_msg
             },
             Source=sender_email,
             Destinations=RECIPIENT
@@ -3058,7 +3051,7 @@ def send_monthly_finops_report_email(menv="", email_type="FinOps-Automation-Repo
         # The character encoding for the email.
         CHARSET = "UTF-8"
 
-        ses = boto3.client("ses", region_name=AWS_REGION)
+        ses = aws_clients.get_client("ses", region_name=AWS_REGION)
         
         # Try to send the email.
         try:
@@ -3214,10 +3207,16 @@ import logging
 from datetime import datetime
 from botocore.exceptions import ClientError
 import modules.utils as mu
-
-rds_client = boto3.client('rds')
+import aws_clients
+import execution_journal
+import rds_executor
+import rds_inventory
+import rds_snapshots
+import rds_state_poller
+
+# Created on first use, importing this module makes no AWS call
+rds_client = aws_clients.LazyClient('rds')
 AWS_REGION = boto3.session.Session().region_name
-account_no, _ = mu.get_aws_account_id_and_region()
 
 
 def resize_rds_instance(db_instance_identifier, target_instance_class):
@@ -3236,6 +3235,8 @@ def resize_rds_instance(db_instance_identifier, target_instance_class):
             DBInstanceClass=target_instance_class,
             ApplyImmediately=True
         )
+        # The instance changed, the inventory snapshot is read again on next lookup
+        rds_inventory.invalidate_rds_inventory(rds_client)
         mu.log_info(f"Successfully initiated resize of {db_instance_identifier} to {target_instance_class}.")
         mu.log_debug(f"Modify response: {response}")
 
@@ -3260,6 +3261,8 @@ def delete_rds_instance(db_instance_identifier):
             SkipFinalSnapshot=True,
             DeleteAutomatedBackups=True
         )
+        # The instance changed, the inventory snapshot is read again on next lookup
+        rds_inventory.invalidate_rds_inventory(rds_client)
         mu.log_info(f"Successfully initiated deletion of RDS instance {db_instance_identifier}.")
         mu.log_debug(f"Response: {response}")
         return True, db_cluster_id
@@ -3268,56 +3271,17 @@ def delete_rds_instance(db_instance_identifier):
         mu.log_error(f"Error deleting RDS instance {db_instance_identifier}: {e}")
         return False, db_cluster_id
 
-def wait_for_instance_available(db_instance_identifier):
-    try:
-        mu.log_info(f"Waiting for instance {db_instance_identifier} to be in 'available' state...")
-        waiter = rds_client.get_waiter('db_instance_available')
-        waiter.wait(DBInstanceIdentifier=db_instance_identifier)
+def wait_for_instance_available(db_instance_identifier, max_wait=1800):
+    """
+    Waits until the RDS instance is in 'available' state. Instances waited on from several threads are polled
+    together with batched describe calls by the shared rds_state_poller.
+    """
+    mu.log_info(f"Waiting for instance {db_instance_identifier} to be in 'available' state...")
+    available = rds_state_poller.wait_for_instances([db_instance_identifier], timeout=max_wait, rds_client=rds_client)[db_instance_identifier]
+    if available:
         mu.log_info(f"Instance {db_instance_identifier} is now available.")
-    except ClientError as e:
-        mu.log_error(f"Error while waiting for instance {db_instance_identifier} to become available: {e}")
-
-def create_final_snapshot(db_instance_identifier, processed_clusters):
-    try:
-        response = rds_client.describe_db_instances(DBInstanceIdentifier=db_instance_identifier)
-        db_instance = response['DBInstances'][0]
-        db_cluster_id = db_instance.get('DBClusterIdentifier')
-        date_tag = datetime.now().strftime('%Y-%m-%d')
-
-        if db_cluster_id:
-            snapshot_id = f"finops-automation-{db_cluster_id}-snapshot-{date_tag}"
-            if db_cluster_id in processed_clusters:
-                mu.log_info(f"Cluster snapshot already created for {db_cluster_id}. Skipping...")
-                return True, snapshot_id, db_cluster_id
-
-            mu.log_info(f"Creating cluster snapshot {snapshot_id} for cluster {db_cluster_id}...")
-            rds_client.create_db_cluster_snapshot(
-                DBClusterSnapshotIdentifier=snapshot_id,
-                DBClusterIdentifier=db_cluster_id,
-                Tags=[{'Key': 'Name', 'Value': snapshot_id}]
-            )
-            waiter = rds_client.get_waiter('db_cluster_snapshot_available')
-            waiter.wait(DBClusterSnapshotIdentifier=snapshot_id)
-            mu.log_info(f"Snapshot {snapshot_id} created successfully.")
-            processed_clusters.add(db_cluster_id)
-            return True, snapshot_id, db_cluster_id
+    return available
 
-        else:
-            snapshot_id = f"finops-automation-{db_instance_identifier}-snapshot-{date_tag}"
-            mu.log_info(f"Creating DB snapshot {snapshot_id} for instance {db_instance_identifier}...")
-            rds_client.create_db_snapshot(
-                DBInstanceIdentifier=db_instance_identifier,
-                DBSnapshotIdentifier=snapshot_id,
-                Tags=[{'Key': 'Name', 'Value': snapshot_id}]
-            )
-            waiter = rds_client.get_waiter('db_snapshot_available')
-            waiter.wait(DBSnapshotIdentifier=snapshot_id)
-            mu.log_info(f"Snapshot {snapshot_id} created successfully.")
-            return True, snapshot_id, None
-
-    except ClientError as e:
-        mu.log_error(f"Snapshot creation failed for {db_instance_identifier}: {e}")
-        return False, None, None
 
 def get_instance_details(db_instance_identifier):
     try:
@@ -3339,13 +3303,55 @@ def get_instance_details(db_instance_identifier):
         mu.log_error(f"Error fetching details for instance {db_instance_identifier}: {e}")
         return None, None, None, None, None, None
 
-def process_rds_actions(input_file, action, test='Y'):
+def process_rds_instance_action(db_instance_id, action_type, snapshots, journal):
+    """
+    Executes the approved action of one RDS instance.
+
+    :param db_instance_id: RDS instance identifier.
+    :param action_type: Approved action, e.g. 'TWB' for terminate with backup, anything else deletes without snapshot.
+    :param snapshots: Final snapshots started up front, as returned by rds_snapshots.start_final_snapshots.
+    :param journal: Execution journal the completed steps are recorded in.
+    :return: summary_data row [Instance ID, Cluster ID, Snapshot Status, Delete Status, Snapshot ID].
+    """
+    snapshot_status = "-"
+    delete_status = "-"
+    snapshot_id = "-"
+    db_cluster_id = "-"
+
+    if action_type in ['TWB', 'TERMINATE W/ BACKUP']:
+        mu.log_info(f"Snapshot + delete for instance {db_instance_id}")
+        success, snapshot_id, db_cluster_id = rds_snapshots.wait_for_final_snapshot(snapshots, db_instance_id)
+        snapshot_status = "✅ Success" if success else "❌ Failed"
+
+        if success:
+            journal.record(db_instance_id, execution_journal.STEP_SNAPSHOT_DONE)
+            wait_for_instance_available(db_instance_id)
+            deleted, _ = delete_rds_instance(db_instance_id)
+            delete_status = "✅ Deleted" if deleted else "❌ Delete Failed"
+        else:
+            mu.log_warning(f"Skipping deletion of {db_instance_id} due to snapshot failure.")
+            deleted = False
+
+    else:
+        mu.log_info(f"Deleting instance {db_instance_id} without snapshot (action: {action_type})")
+        deleted, db_cluster_id = delete_rds_instance(db_instance_id)
+        delete_status = "✅ Deleted" if deleted else "❌ Delete Failed"
+
+    if deleted:
+        journal.record(db_instance_id, execution_journal.STEP_DELETED)
+
+    return [db_instance_id, db_cluster_id or "Standalone", snapshot_status, delete_status, snapshot_id]
+
+def process_rds_actions(input_file, action, test='Y', max_workers=rds_executor.DEFAULT_MAX_WORKERS):
     try:
         with open(input_file, 'r') as file:
             lines = file.readlines()
 
-        processed_clusters = set()
-        summary_data = []
+        # Steps completed by an earlier run of this month's execution are not repeated
+        account_no, _ = mu.get_aws_account_id_and_region()
+        journal = execution_journal.open_journal(f"{account_no}:{AWS_REGION}RDS_FINAL_SNAPSHOT_DELETE_{mu.get_current_month()}")
+        actions = []
+        resumed_data = []
 
         for line in lines:
             if not line.strip():
@@ -3359,33 +3365,42 @@ def process_rds_actions(input_file, action, test='Y'):
             db_instance_id = parts[0].strip()
             action_type = parts[1].strip().upper()
 
-            snapshot_status = "-"
-            delete_status = "-"
-            snapshot_id = "-"
-            db_cluster_id = "-"
-
             if action_type in ['NO ACTION', 'N/A']:
                 mu.log_info(f"Skipping instance {db_instance_id} due to comment: {action_type}")
                 continue
 
-            elif action_type in ['TWB', 'TERMINATE W/ BACKUP']:
-                mu.log_info(f"Snapshot + delete for instance {db_instance_id}")
-                success, snapshot_id, db_cluster_id = create_final_snapshot(db_instance_id, processed_clusters)
-                snapshot_status = "✅ Success" if success else "❌ Failed"
-
-                if success:
-                    wait_for_instance_available(db_instance_id)
-                    deleted, _ = delete_rds_instance(db_instance_id)
-                    delete_status = "✅ Deleted" if deleted else "❌ Delete Failed"
-                else:
-                    mu.log_warning(f"Skipping deletion of {db_instance_id} due to snapshot failure.")
+            entry = journal.get(db_instance_id)
+            if entry and entry['step'] == execution_journal.STEP_DELETED:
+                mu.log_info(f"Instance {db_instance_id} was already deleted by an earlier run. Skipping.")
+                snapshot_id = entry['detail'].get('snapshot_id')
+                resumed_data.append([db_instance_id, entry['detail'].get('db_cluster_id') or "Standalone",
+                                     "✅ Success" if snapshot_id else "-", "✅ Deleted", snapshot_id or "-"])
+                continue
 
-            else:
-                mu.log_info(f"Deleting instance {db_instance_id} without snapshot (action: {action_type})")
-                deleted, db_cluster_id = delete_rds_instance(db_instance_id)
-                delete_status = "✅ Deleted" if deleted else "❌ Delete Failed"
+            journal.record(db_instance_id, execution_journal.STEP_PLANNED, resource_type="rds")
+            actions.append((db_instance_id, action_type))
 
-            summary_data.append([db_instance_id, db_cluster_id or "Standalone", snapshot_status, delete_status, snapshot_id])
+        # All final snapshots are started before any deletion, each instance is deleted once its own snapshot is available
+        twb_instance_ids = [db_instance_id for db_instance_id, action_type in actions if action_type in ['TWB', 'TERMINATE W/ BACKUP']]
+        snapshots = rds_snapshots.start_final_snapshots(
+            twb_instance_ids,
+            rds_client,
+            name_format="finops-automation-{resource_id}-snapshot-{date_tag}",
+            known_snapshots=rds_snapshots.get_journal_snapshots(journal, twb_instance_ids)
+        )
+        rds_snapshots.record_started_snapshots(journal, snapshots)
+
+        # Independent instances run in parallel, instances of the same cluster one after another
+        results = rds_executor.run_serialized_by_group(
+            actions,
+            worker=lambda item: process_rds_instance_action(item[0], item[1], snapshots, journal),
+            group_key=lambda item: rds_executor.get_cluster_group_key(item[0], rds_client),
+            max_workers=max_workers
+        )
+        summary_data = resumed_data + [
+            result if result else [db_instance_id, "-", "❌ Failed", "❌ Failed", "-"]
+            for (db_instance_id, _), result in zip(actions, results)
+        ]
 
         if summary_data:
             headers = ["Instance ID", "Cluster ID", "Snapshot Status", "Delete Status", "Snapshot ID"]
@@ -0,0 +1,74 @@
+"""
+Desc: importable execution engine for approved RDS actions - runs independent instances in parallel on a bounded
+worker pool while operations on instances of the same Aurora cluster stay serialized, in their input order.
+
+Usage Ex:
+    import rds_executor
+    results = rds_executor.run_serialized_by_group(
+        items,                                   # e.g. [(db_instance_id, action_type), ...]
+        worker=lambda item: process_rds_instance_action(*item),
+        group_key=lambda item: rds_executor.get_cluster_group_key(item[0]),
+        max_workers=8)
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import rds_inventory
+
+DEFAULT_MAX_WORKERS = 8
+
+
+def get_cluster_group_key(db_instance_identifier, rds_client=None):
+    """
+    Returns the serialization key of an instance: its DBClusterIdentifier for Aurora cluster members,
+    its own identifier otherwise. Read from the inventory snapshot, without a describe call per instance.
+
+    Args:
+    db_instance_identifier (str): RDS instance identifier.
+    rds_client: Boto3 RDS client used for the inventory snapshot.
+
+    Returns:
+    str: Group key.
+    """
+    db_instance = rds_inventory.get_db_instance(db_instance_identifier, rds_client) or {}
+    return db_instance.get('DBClusterIdentifier') or db_instance_identifier
+
+
+def run_serialized_by_group(items, worker, group_key, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Runs worker(item) for every item on a bounded thread pool. Items with the same group_key(item) run one after
+    another in input order in the same worker thread; different groups run in parallel.
+
+    Args:
+    items (list): Work items, e.g. (db_instance_id, action_type) tuples.
+    worker (callable): Called with one item, returns its result (e.g. a summary_data row).
+    group_key (callable): Called with one item, returns its serialization key (e.g. get_cluster_group_key).
+    max_workers (int): Maximum number of groups processed at the same time. Default is DEFAULT_MAX_WORKERS.
+
+    Returns:
+    list: worker results in input order; None for an item whose worker raised an exception (the error is logged).
+    """
+    groups = {}
+    for index, item in enumerate(items):
+        groups.setdefault(group_key(item), []).append(index)
+
+    results = [None] * len(items)
+    results_lock = threading.Lock()
+
+    def run_group(key, indexes):
+        for index in indexes:
+            try:
+                result = worker(items[index])
+            except Exception as e:
+                logging.error(f"Execution failed for {items[index]} (group {key}): {e}")
+                result = None
+            with results_lock:
+                results[index] = result
+
+    workers = max(1, min(max_workers, len(groups)))
+    logging.info(f"Executing {len(items)} items in {len(groups)} groups with {workers} workers")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rds-exec") as executor:
+        futures = [executor.submit(run_group, key, indexes) for key, indexes in groups.items()]
+        for future in futures:
+            future.result()
+    return results
@@ -0,0 +1,135 @@
+"""
+Desc: importable RDS fleet inventory - one paginated describe_db_instances snapshot per run,
+shared by every report/execution function instead of each one calling describe_db_instances() itself.
+
+The snapshot is indexed by DBInstanceIdentifier, DBInstanceArn and DBClusterIdentifier and is
+cached per credential set and region (aws_clients.get_client_key) for INVENTORY_TTL_SECONDS.
+
+Usage Ex:
+    import rds_inventory
+    db_instances = rds_inventory.get_db_instances(rds_client)
+    db_instance = rds_inventory.get_db_instance("database-1-instance-1")
+"""
+import logging
+import time
+import boto3
+import aws_clients
+
+# Inventory snapshot is reused for 15 minutes, which covers a full report run
+INVENTORY_TTL_SECONDS = 900
+
+# aws_clients.get_client_key (access key id, region name) -> inventory snapshot
+_inventory_cache = {}
+
+
+def _build_inventory(db_instances):
+    """
+    Builds the inventory snapshot with its lookup indexes.
+
+    Args:
+    db_instances (list): DBInstances as returned by describe_db_instances.
+
+    Returns:
+    dict: Inventory snapshot with 'instances', 'by_id', 'by_arn', 'by_cluster' and 'fetched_at' keys.
+    """
+    by_id = {}
+    by_arn = {}
+    by_cluster = {}
+    for db_instance in db_instances:
+        by_id[db_instance['DBInstanceIdentifier']] = db_instance
+        by_arn[db_instance['DBInstanceArn']] = db_instance
+        db_cluster_id = db_instance.get('DBClusterIdentifier')
+        if db_cluster_id:
+            by_cluster.setdefault(db_cluster_id, []).append(db_instance)
+
+    return {
+        'instances': db_instances,
+        'by_id': by_id,
+        'by_arn': by_arn,
+        'by_cluster': by_cluster,
+        'fetched_at': time.time()
+    }
+
+
+def _describe_all_db_instances(rds_client):
+    """
+    Reads every page of describe_db_instances.
+
+    Args:
+    rds_client: Boto3 RDS client.
+
+    Returns:
+    list: All DBInstances in the client region.
+    """
+    db_instances = []
+    paginator = rds_client.get_paginator('describe_db_instances')
+    for page in paginator.paginate():
+        db_instances.extend(page.get('DBInstances', []))
+    return db_instances
+
+
+def get_rds_inventory(rds_client=None, ttl=INVENTORY_TTL_SECONDS, refresh=False):
+    """
+    Returns the RDS inventory snapshot for the client region, fetching it only when it is
+    missing, older than ttl seconds or refresh is requested.
+
+    Args:
+    rds_client: Boto3 RDS client. Default client is created when not passed.
+    ttl (int): Maximum age of the cached snapshot in seconds. Default is INVENTORY_TTL_SECONDS.
+    refresh (bool): If True, ignores the cached snapshot. Default is False.
+
+    Returns:
+    dict: Inventory snapshot with 'instances', 'by_id', 'by_arn', 'by_cluster' and 'fetched_at' keys.
+    """
+    if rds_client is None:
+        rds_client = boto3.client('rds')
+    key = aws_clients.get_client_key(rds_client)
+
+    inventory = _inventory_cache.get(key)
+    if inventory and not refresh and (time.time() - inventory['fetched_at']) < ttl:
+        return inventory
+
+    db_instances = _describe_all_db_instances(rds_client)
+    inventory = _build_inventory(db_instances)
+    _inventory_cache[key] = inventory
+    logging.info(f"RDS inventory loaded for region {key[1]}: {len(db_instances)} DB instances")
+    return inventory
+
+
+def invalidate_rds_inventory(rds_client=None):
+    """
+    Drops the cached inventory snapshot so that next read fetches it again,
+    e.g. after instances are deleted or modified.
+
+    Args:
+    rds_client: Boto3 RDS client whose snapshot (credentials and region) is dropped. All snapshots are dropped when not passed.
+    """
+    if rds_client is not None:
+        _inventory_cache.pop(aws_clients.get_client_key(rds_client), None)
+    else:
+        _inventory_cache.clear()
+
+
+def get_db_instances(rds_client=None):
+    """Returns all DBInstances from the inventory snapshot."""
+    return get_rds_inventory(rds_client)['instances']
+
+
+def get_db_instance_count(rds_client=None):
+    """Returns the count of DB instances from the inventory snapshot."""
+    return len(get_rds_inventory(rds_client)['instances'])
+
+
+def get_db_instance(db_instance_identifier, rds_client=None):
+    """Returns the DBInstance for given DBInstanceIdentifier, or None if it is not in the inventory."""
+    return get_rds_inventory(rds_client)['by_id'].get(db_instance_identifier)
+
+
+def get_db_instance_by_arn(db_instance_arn, rds_client=None):
+    """Returns the DBInstance for given DBInstanceArn, or None if it is not in the inventory."""
+    return get_rds_inventory(rds_client)['by_arn'].get(db_instance_arn)
+
+
+def get_cluster_members(db_cluster_identifier, rds_client=None):
+    """Returns the list of DBInstances belonging to given DBClusterIdentifier."""
+    return get_rds_inventory(rds_client)['by_cluster'].get(db_cluster_identifier, [])
@@ -0,0 +1,194 @@
+"""
+Desc: importable offline execution planner for approved RDS actions - builds the complete ordered plan of an execution
+from one inventory snapshot (rds_inventory, plus one describe_db_clusters pass for the Aurora writers) and the approved
+ExecutableData, so the executor needs no describe call per instance.
+
+The plan covers cluster grouping, reader-before-writer ordering, final-snapshot requirements (one cluster snapshot per
+Aurora cluster) and the reason of every skipped instance, and is saved as JSON for review.
+
+Usage Ex:
+    import rds_planner
+    plan = rds_planner.build_rds_plan([["database-1-instance-1"], ["database-2"]], {"database-2": "TWB"}, rds_client=rds_client)
+    rds_planner.save_plan(plan, "./cache/rds_plan.json")
+    for step in rds_planner.get_executable_steps(plan):
+        print(step['db_instance_id'], step['action'], step['group'])
+"""
+import json
+import logging
+import os
+from datetime import datetime
+import boto3
+import rds_inventory
+
+# Plan step actions
+ACTION_TERMINATE = "TERMINATE"
+ACTION_TERMINATE_WITH_BACKUP = "TWB"
+ACTION_EXEMPT = "EXEMPT"
+ACTION_SKIP = "SKIP"
+EXECUTABLE_ACTIONS = [ACTION_TERMINATE, ACTION_TERMINATE_WITH_BACKUP]
+
+# App Owner exception actions
+TWB_EXCEPTION_ACTIONS = ["TWB", "TERMINATE W/ BACKUP"]
+EXEMPT_EXCEPTION_ACTIONS = ["NA", "N/A", "NO ACTION"]
+# Instance states that can still reach 'available' before deletion
+DELETABLE_STATES = ['available', 'backing-up', 'modifying', 'configuring-enhanced-monitoring', 'storage-optimization']
+
+
+def get_cluster_writers(rds_client=None):
+    """
+    Returns the writer instance of every Aurora cluster with one paginated describe_db_clusters pass.
+
+    Args:
+    rds_client: Boto3 RDS client. Default client is created when not passed.
+
+    Returns:
+    set: DBInstanceIdentifier of every cluster writer.
+    """
+    rds_client = rds_client or boto3.client('rds')
+    writers = set()
+    for page in rds_client.get_paginator('describe_db_clusters').paginate():
+        for db_cluster in page['DBClusters']:
+            for member in db_cluster.get('DBClusterMembers', []):
+                if member.get('IsClusterWriter'):
+                    writers.add(member['DBInstanceIdentifier'])
+    return writers
+
+
+def _get_action(db_instance_id, exceptions):
+    """Maps the App Owner exception of an instance to the plan action."""
+    ex_action = exceptions.get(db_instance_id, "").strip().upper()
+    if ex_action in EXEMPT_EXCEPTION_ACTIONS:
+        return ACTION_EXEMPT, ex_action
+    if ex_action in TWB_EXCEPTION_ACTIONS:
+        return ACTION_TERMINATE_WITH_BACKUP, ex_action
+    return ACTION_TERMINATE, ex_action
+
+
+def build_rds_plan(executable_instance_list, exceptions=None, action="TERMINATE", rds_client=None, cluster_writers=None):
+    """
+    Builds the ordered execution plan of approved RDS instances.
+
+    Args:
+    executable_instance_list (list): ExecutableData rows, instance id first.
+    exceptions (dict): Exception action per instance id, as provided by App Owner (e.g. 'TWB', 'NA').
+    action (str): Approved action. Only TERMINATE is planned, other actions skip every instance.
+    rds_client: Boto3 RDS client used for the inventory snapshot. Default client is created when not passed.
+    cluster_writers (set): Aurora cluster writer instance ids. Read with get_cluster_writers when not passed
+                           and any planned instance belongs to a cluster.
+
+    Returns:
+    dict: Plan with keys
+        'generated_at' (str), 'action' (str), 'region' (str),
+        'steps' (list): one dict per ExecutableData instance, executable steps first in execution order, with
+            'order', 'db_instance_id', 'db_cluster_id', 'group', 'is_writer', 'instance_state', 'action',
+            'exception_action', 'snapshot' ({'resource_type', 'source_id'} or None) and 'skip_reason'.
+        'snapshots' (list): final snapshots to start, one per cluster or standalone instance,
+            {'resource_type', 'source_id', 'db_instance_ids'}, as consumed by rds_snapshots.start_plan_snapshots.
+        'summary' (dict): number of steps per action.
+    """
+    rds_client = rds_client or boto3.client('rds')
+    exceptions = exceptions or {}
+    inventory = rds_inventory.get_rds_inventory(rds_client)
+
+    seen = set()
+    steps = []
+    for ins_det in executable_instance_list:
+        db_instance_id = ins_det[0].strip()
+        db_instance = inventory['by_id'].get(db_instance_id)
+        plan_action, ex_action = _get_action(db_instance_id, exceptions)
+        step = {
+            'db_instance_id': db_instance_id,
+            'db_cluster_id': (db_instance or {}).get('DBClusterIdentifier'),
+            'group': db_instance_id,
+            'is_writer': True,
+            'instance_state': (db_instance or {}).get('DBInstanceStatus'),
+            'action': plan_action,
+            'exception_action': ex_action,
+            'snapshot': None,
+            'skip_reason': None
+        }
+
+        if db_instance_id in seen:
+            step.update(action=ACTION_SKIP, skip_reason="Duplicate instance in ExecutableData")
+        elif action != "TERMINATE":
+            step.update(action=ACTION_SKIP, skip_reason=f"Action {action} is not executed by the planner")
+        elif db_instance is None:
+            step.update(action=ACTION_SKIP, skip_reason="Instance not found")
+        elif plan_action == ACTION_EXEMPT:
+            step['skip_reason'] = f"Exempted by App Owner ({ex_action})"
+        elif step['instance_state'] not in DELETABLE_STATES:
+            step.update(action=ACTION_SKIP, skip_reason=f"Instance not in a deletable state ({step['instance_state']})")
+        seen.add(db_instance_id)
+        steps.append((step, db_instance))
+
+    planned = [(step, db_instance) for step, db_instance in steps if step['action'] in EXECUTABLE_ACTIONS]
+    if cluster_writers is None:
+        cluster_writers = get_cluster_writers(rds_client) if any(step['db_cluster_id'] for step, _ in planned) else set()
+
+    snapshots = {}
+    for step, db_instance in planned:
+        if step['db_cluster_id']:
+            step['group'] = step['db_cluster_id']
+            step['is_writer'] = step['db_instance_id'] in cluster_writers
+        else:
+            # A read replica is deleted in the same group as, and before, its source instance
+            source_id = db_instance.get('ReadReplicaSourceDBInstanceIdentifier')
+            step['group'] = source_id or step['db_instance_id']
+            step['is_writer'] = not source_id
+
+        if step['action'] == ACTION_TERMINATE_WITH_BACKUP:
+            resource_type = 'cluster' if step['db_cluster_id'] else 'instance'
+            source_id = step['db_cluster_id'] or step['db_instance_id']
+            step['snapshot'] = {'resource_type': resource_type, 'source_id': source_id}
+            snapshot = snapshots.setdefault((resource_type, source_id), {
+                'resource_type': resource_type, 'source_id': source_id, 'db_instance_ids': []})
+            snapshot['db_instance_ids'].append(step['db_instance_id'])
+
+    # Groups keep their ExecutableData order, readers run before the writer within a group
+    group_order = {}
+    for step, _ in planned:
+        group_order.setdefault(step['group'], len(group_order))
+    planned.sort(key=lambda item: (group_order[item[0]['group']], item[0]['is_writer']))
+    ordered_steps = [step for step, _ in planned] + [step for step, _ in steps if step['action'] not in EXECUTABLE_ACTIONS]
+    for order, step in enumerate(ordered_steps, start=1):
+        step['order'] = order
+
+    summary = {}
+    for step in ordered_steps:
+        summary[step['action']] = summary.get(step['action'], 0) + 1
+
+    logging.info(f"RDS plan built for {len(ordered_steps)} instances: {summary}")
+    return {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'action': action,
+        'region': rds_client.meta.region_name,
+        'steps': ordered_steps,
+        'snapshots': list(snapshots.values()),
+        'summary': summary
+    }
+
+
+def get_executable_steps(plan):
+    """Returns the TERMINATE / TWB steps of a plan in execution order."""
+    return [step for step in plan['steps'] if step['action'] in EXECUTABLE_ACTIONS]
+
+
+def save_plan(plan, file_path):
+    """
+    Saves a plan as JSON.
+
+    Args:
+    plan (dict): Plan as returned by build_rds_plan.
+    file_path (str): Target JSON file, its directory is created when missing.
+    """
+    if os.path.dirname(file_path):
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, 'w') as file:
+        json.dump(plan, file, indent=2)
+    logging.info(f"RDS plan saved to {file_path}")
+
+
+def load_plan(file_path):
+    """Loads a plan saved with save_plan."""
+    with open(file_path, 'r') as file:
+        return json.load(file)
@@ -0,0 +1,255 @@
+"""
+Desc: importable final-snapshot stage for RDS "terminate with backup" (TWB) executions - starts the final snapshots of
+all instances up front (one cluster snapshot per Aurora cluster, however many of its members are terminated), tracks
+their completion with batched describe_db_snapshots / describe_db_cluster_snapshots calls through rds_state_poller and
+hands every instance over to deletion as soon as its own snapshot is available.
+
+Usage Ex:
+    import rds_snapshots
+    snapshots = rds_snapshots.start_final_snapshots(["database-1-instance-1", "database-2"], rds_client)
+    success, snapshot_id, db_cluster_id = rds_snapshots.wait_for_final_snapshot(snapshots, "database-2")
+
+    # Start the snapshots of an RDS plan, without describing the instances again
+    plan = rds_planner.build_rds_plan(executable_instances, exceptions, rds_client=rds_client)
+    snapshots = rds_snapshots.start_plan_snapshots(plan['snapshots'], rds_client)
+
+    # Resume snapshots started by an earlier run, without describing the instances again
+    journal = execution_journal.open_journal(run_id)
+    known_snapshots = rds_snapshots.get_journal_snapshots(journal, ["database-2"])
+    snapshots = rds_snapshots.start_plan_snapshots(plan['snapshots'], rds_client, known_snapshots=known_snapshots)
+    rds_snapshots.record_started_snapshots(journal, snapshots)
+"""
+import logging
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import datetime
+import boto3
+from botocore.exceptions import ClientError
+import execution_journal
+import rds_inventory
+import rds_state_poller
+
+SNAPSHOT_NAME_FORMAT = "finops-automation-{resource_id}-final-snapshot-{date_tag}"
+SNAPSHOT_TIMEOUT = 7200
+# Error codes of a snapshot that was already started, e.g. by an earlier run of the same day
+ALREADY_EXISTS_CODES = {'DBSnapshotAlreadyExists', 'DBClusterSnapshotAlreadyExistsFault'}
+# Snapshot states that fail the wait, a missing snapshot is pending (see _watch_snapshot)
+SNAPSHOT_FAILURE_STATES = {'failed'}
+
+
+def _failed_future(error):
+    future = Future()
+    future.set_exception(error)
+    return future
+
+
+def _done_future(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def _start_snapshot(db_instance_identifier, db_cluster_id, snapshot_id, rds_client):
+    """Starts the cluster snapshot of a cluster member, the DB snapshot of a standalone instance otherwise."""
+    tags = [{'Key': 'Name', 'Value': snapshot_id}]
+    try:
+        if db_cluster_id:
+            logging.info(f"Creating cluster snapshot {snapshot_id} for cluster {db_cluster_id}...")
+            rds_client.create_db_cluster_snapshot(DBClusterSnapshotIdentifier=snapshot_id,
+                                                  DBClusterIdentifier=db_cluster_id, Tags=tags)
+        else:
+            logging.info(f"Creating DB snapshot {snapshot_id} for instance {db_instance_identifier}...")
+            rds_client.create_db_snapshot(DBSnapshotIdentifier=snapshot_id,
+                                          DBInstanceIdentifier=db_instance_identifier, Tags=tags)
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ALREADY_EXISTS_CODES:
+            raise
+        logging.info(f"Snapshot {snapshot_id} already exists, waiting for it to be available")
+
+
+def _watch_snapshot(poller, snapshot_id, resource_type, timeout):
+    """
+    Watches a snapshot until it is available. Only 'failed' fails it: a snapshot that is not returned by describe yet,
+    right after its creation, is pending until the timeout instead of 'deleted'.
+    """
+    return poller.watch(snapshot_id, target_states=['available'], timeout=timeout, failure_states=SNAPSHOT_FAILURE_STATES,
+                        resource_type=resource_type, pending_while_missing=True)
+
+
+def start_plan_snapshots(plan_snapshots, rds_client=None, db_instance_identifiers=None, name_format=SNAPSHOT_NAME_FORMAT,
+                         timeout=SNAPSHOT_TIMEOUT, known_snapshots=None):
+    """
+    Starts the final snapshots of an RDS plan without waiting for them and without describing the instances again:
+    one cluster snapshot per Aurora cluster, one DB snapshot per standalone instance.
+
+    Args:
+    plan_snapshots (list): Snapshot requirements {'resource_type', 'source_id', 'db_instance_ids'}, as in the
+                           'snapshots' of rds_planner.build_rds_plan.
+    rds_client: Boto3 RDS client. Default client is created when not passed.
+    db_instance_identifiers (list): RDS instance identifiers still to execute, e.g. without the instances an earlier
+                                    run already deleted. Default is all instances of plan_snapshots.
+    name_format (str): Snapshot identifier format with {resource_id} (cluster or instance id) and {date_tag}.
+                       Default is SNAPSHOT_NAME_FORMAT.
+    timeout (int): Seconds to wait for a snapshot to become available. Default is SNAPSHOT_TIMEOUT.
+    known_snapshots (dict): RDS instance identifier to {'snapshot_id', 'db_cluster_id', 'done'} of snapshots
+                            started by an earlier run (e.g. from execution_journal); these are only waited on.
+
+    Returns:
+    dict: RDS instance identifier to {'snapshot_id', 'db_cluster_id', 'future', 'deadline'}; the future resolves once
+          the snapshot is available, or fails with the ClientError / RdsStateError of the snapshot.
+    """
+    rds_client = rds_client or boto3.client('rds')
+    poller = rds_state_poller.get_rds_state_poller(rds_client)
+    date_tag = datetime.now().strftime('%Y-%m-%d')
+    deadline = time.time() + timeout
+    wanted = set(db_instance_identifiers) if db_instance_identifiers is not None else None
+
+    known_snapshots = known_snapshots or {}
+    snapshots = {}
+    started = 0
+    for requirement in plan_snapshots:
+        instance_ids = [db_instance_identifier for db_instance_identifier in requirement['db_instance_ids']
+                        if wanted is None or db_instance_identifier in wanted]
+        if not instance_ids:
+            continue
+
+        db_cluster_id = requirement['source_id'] if requirement['resource_type'] == 'cluster' else None
+        resource_type = rds_state_poller.DB_CLUSTER_SNAPSHOT if db_cluster_id else rds_state_poller.DB_SNAPSHOT
+        known = [known_snapshots[db_instance_identifier] for db_instance_identifier in instance_ids
+                 if db_instance_identifier in known_snapshots]
+        if known:
+            snapshot_id = known[0]['snapshot_id']
+            if any(snapshot.get('done') for snapshot in known):
+                future = _done_future('available')
+            else:
+                future = _watch_snapshot(poller, snapshot_id, resource_type, timeout)
+        else:
+            snapshot_id = name_format.format(resource_id=requirement['source_id'], date_tag=date_tag)
+            try:
+                _start_snapshot(instance_ids[0], db_cluster_id, snapshot_id, rds_client)
+                started += 1
+                future = _watch_snapshot(poller, snapshot_id, resource_type, timeout)
+            except ClientError as e:
+                future = _failed_future(e)
+
+        for db_instance_identifier in instance_ids:
+            snapshots[db_instance_identifier] = {'snapshot_id': snapshot_id, 'db_cluster_id': db_cluster_id,
+                                                 'future': future, 'deadline': deadline}
+
+    logging.info(f"{started} final snapshots started for {len(snapshots)} RDS instances")
+    return snapshots
+
+
+def start_final_snapshots(db_instance_identifiers, rds_client=None, name_format=SNAPSHOT_NAME_FORMAT,
+                          timeout=SNAPSHOT_TIMEOUT, known_snapshots=None):
+    """
+    Starts the final snapshots of given RDS instances without waiting for them. The snapshot requirements are read
+    from the inventory, members of the same Aurora cluster share one cluster snapshot. Executions with an RDS plan use
+    start_plan_snapshots instead.
+
+    Args:
+    db_instance_identifiers (list): RDS instance identifiers.
+    rds_client: Boto3 RDS client. Default client is created when not passed.
+    name_format (str): Snapshot identifier format with {resource_id} (cluster or instance id) and {date_tag}.
+                       Default is SNAPSHOT_NAME_FORMAT.
+    timeout (int): Seconds to wait for a snapshot to become available. Default is SNAPSHOT_TIMEOUT.
+    known_snapshots (dict): RDS instance identifier to {'snapshot_id', 'db_cluster_id', 'done'} of snapshots
+                            started by an earlier run (e.g. from execution_journal); these are only waited on.
+
+    Returns:
+    dict: Same as start_plan_snapshots.
+    """
+    rds_client = rds_client or boto3.client('rds')
+    known_snapshots = known_snapshots or {}
+    snapshots = {}
+    requirements = {}
+    for db_instance_identifier in db_instance_identifiers:
+        known = known_snapshots.get(db_instance_identifier)
+        if known:
+            db_cluster_id = known.get('db_cluster_id')
+        else:
+            db_instance = rds_inventory.get_db_instance(db_instance_identifier, rds_client)
+            if not db_instance:
+                snapshots[db_instance_identifier] = {
+                    'snapshot_id': None, 'db_cluster_id': None,
+                    'future': _failed_future(LookupError(f"Instance {db_instance_identifier} not found")),
+                    'deadline': time.time() + timeout
+                }
+                continue
+            db_cluster_id = db_instance.get('DBClusterIdentifier')
+
+        key = ('cluster', db_cluster_id) if db_cluster_id else ('instance', db_instance_identifier)
+        requirement = requirements.setdefault(key, {'resource_type': key[0], 'source_id': key[1], 'db_instance_ids': []})
+        requirement['db_instance_ids'].append(db_instance_identifier)
+
+    snapshots.update(start_plan_snapshots(list(requirements.values()), rds_client, name_format=name_format,
+                                          timeout=timeout, known_snapshots=known_snapshots))
+    return snapshots
+
+
+def wait_for_final_snapshot(snapshots, db_instance_identifier):
+    """
+    Waits until the final snapshot of one RDS instance is available.
+
+    Args:
+    snapshots (dict): Snapshots as returned by start_plan_snapshots / start_final_snapshots.
+    db_instance_identifier (str): RDS instance identifier.
+
+    Returns:
+    tuple: (success, snapshot_id, db_cluster_id), same as create_final_snapshot.
+    """
+    snapshot = snapshots.get(db_instance_identifier)
+    if not snapshot:
+        logging.error(f"No final snapshot was started for {db_instance_identifier}")
+        return False, None, None
+
+    try:
+        error = snapshot['future'].exception(timeout=rds_state_poller.get_wait_timeout(snapshot['deadline']))
+    except FutureTimeoutError:
+        error = rds_state_poller.RdsStateError(f"Timeout: no state received for snapshot {snapshot['snapshot_id']}")
+    if error:
+        logging.error(f"Snapshot creation failed for {db_instance_identifier}: {error}")
+        return False, None, None
+
+    logging.info(f"Snapshot {snapshot['snapshot_id']} created successfully.")
+    return True, snapshot['snapshot_id'], snapshot['db_cluster_id']
+
+
+def get_journal_snapshots(journal, db_instance_identifiers):
+    """
+    Returns the final snapshots an earlier run of the same execution already started, as known_snapshots
+    for start_plan_snapshots / start_final_snapshots.
+
+    Args:
+    journal (execution_journal.ExecutionJournal): Journal of the execution run.
+    db_instance_identifiers (list): RDS instance identifiers.
+
+    Returns:
+    dict: RDS instance identifier to {'snapshot_id', 'db_cluster_id', 'done'}.
+    """
+    known_snapshots = {}
+    for db_instance_identifier in db_instance_identifiers:
+        entry = journal.get(db_instance_identifier)
+        if entry and entry['detail'].get('snapshot_id'):
+            known_snapshots[db_instance_identifier] = {
+                'snapshot_id': entry['detail']['snapshot_id'],
+                'db_cluster_id': entry['detail'].get('db_cluster_id'),
+                'done': journal.is_done(db_instance_identifier, execution_journal.STEP_SNAPSHOT_DONE)
+            }
+    return known_snapshots
+
+
+def record_started_snapshots(journal, snapshots):
+    """
+    Records the successfully started final snapshots in the execution journal.
+
+    Args:
+    journal (execution_journal.ExecutionJournal): Journal of the execution run.
+    snapshots (dict): Snapshots as returned by start_plan_snapshots / start_final_snapshots.
+    """
+    for db_instance_identifier, snapshot in snapshots.items():
+        future = snapshot['future']
+        if future.done() and future.exception():
+            continue
+        journal.record(db_instance_identifier, execution_journal.STEP_SNAPSHOT_STARTED, resource_type="rds",
+                       snapshot_id=snapshot['snapshot_id'], db_cluster_id=snapshot['db_cluster_id'])
@@ -0,0 +1,314 @@
+"""
+Desc: importable multiplexed RDS state poller - one background thread polls all pending RDS instances, DB snapshots
+and DB cluster snapshots with batched describe calls (identifier filter) instead of one sleep loop or waiter per
+resource, and resolves a future per resource as soon as it reaches its target state.
+
+The poll interval adapts: it starts at MIN_POLL_INTERVAL, doubles up to MAX_POLL_INTERVAL while nothing changes
+and drops back to MIN_POLL_INTERVAL when a resource changes state or a new resource is watched.
+
+Usage Ex:
+    import rds_state_poller
+    poller = rds_state_poller.get_rds_state_poller(rds_client)
+    future = poller.watch("database-1-instance-1", target_states=["available"])
+    future.add_done_callback(lambda f: print(f.result()))
+    snapshot_future = poller.watch("finops-automation-database-2-final-snapshot-2025-06-01", resource_type=rds_state_poller.DB_SNAPSHOT)
+    print(rds_state_poller.wait_for_instances(["database-1-instance-1", "database-2"], rds_client=rds_client))
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future, wait
+import boto3
+import aws_clients
+
+MIN_POLL_INTERVAL = 5
+MAX_POLL_INTERVAL = 60
+DEFAULT_TIMEOUT = 1800
+# Seconds a waiter keeps waiting after the deadline of a watch, before giving up on its future
+WAIT_GRACE_PERIOD = 2 * MAX_POLL_INTERVAL
+# Maximum number of values of one describe filter
+FILTER_BATCH_SIZE = 100
+
+DB_INSTANCE = 'db-instance'
+DB_SNAPSHOT = 'db-snapshot'
+DB_CLUSTER_SNAPSHOT = 'db-cluster-snapshot'
+# resource type -> (describe operation, filter name, response list key, identifier key, status key)
+RESOURCE_TYPES = {
+    DB_INSTANCE: ('describe_db_instances', 'db-instance-id', 'DBInstances', 'DBInstanceIdentifier', 'DBInstanceStatus'),
+    DB_SNAPSHOT: ('describe_db_snapshots', 'db-snapshot-id', 'DBSnapshots', 'DBSnapshotIdentifier', 'Status'),
+    DB_CLUSTER_SNAPSHOT: ('describe_db_cluster_snapshots', 'db-cluster-snapshot-id', 'DBClusterSnapshots',
+                          'DBClusterSnapshotIdentifier', 'Status'),
+}
+# States an instance cannot leave towards 'available', same as the db_instance_available waiter
+DEFAULT_FAILURE_STATES = {'deleting', 'deleted', 'failed', 'incompatible-restore', 'incompatible-parameters'}
+# Status reported for watched resources the describe call no longer returns
+DELETED_STATE = 'deleted'
+
+# aws_clients.get_client_key (access key id, region name) -> RdsStatePoller
+_pollers = {}
+_pollers_lock = threading.Lock()
+
+
+class RdsStateError(Exception):
+    """Raised through a watch future when the resource reaches a failure state or the watch times out."""
+
+
+def _settle(resolved):
+    """
+    Resolves (future, state, error) entries. Called without the poller lock held: the done callbacks run here and may
+    watch other resources.
+    """
+    for future, state, error in resolved:
+        if error is None:
+            future.set_result(state)
+        else:
+            future.set_exception(error)
+
+
+class RdsStatePoller:
+    """
+    Polls the state of every watched RDS instance and snapshot of one account and region from a single background thread.
+    """
+
+    def __init__(self, rds_client=None, min_interval=MIN_POLL_INTERVAL, max_interval=MAX_POLL_INTERVAL):
+        """
+        Args:
+        rds_client: Boto3 RDS client. Default client is created when not passed.
+        min_interval (int): Shortest poll interval in seconds. Default is MIN_POLL_INTERVAL.
+        max_interval (int): Longest poll interval in seconds. Default is MAX_POLL_INTERVAL.
+        """
+        self.rds_client = rds_client or boto3.client('rds')
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._watches = {}  # (resource type, identifier) -> list of watch dicts
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def watch(self, identifier, target_states=('available',), timeout=DEFAULT_TIMEOUT,
+              failure_states=None, callback=None, resource_type=DB_INSTANCE, pending_while_missing=False):
+        """
+        Starts watching an RDS instance or snapshot.
+
+        Args:
+        identifier (str): RDS instance, DB snapshot or DB cluster snapshot identifier.
+        target_states (list): States that resolve the future, e.g. ['available'] or ['stopped'].
+                              Use 'deleted' to wait for a resource to disappear. Default is ['available'].
+        timeout (int): Seconds after which the future fails with RdsStateError. Default is DEFAULT_TIMEOUT.
+        failure_states (set): States that fail the future. Default is DEFAULT_FAILURE_STATES minus target_states.
+        callback (callable): Called with the future once it is resolved.
+        resource_type (str): DB_INSTANCE, DB_SNAPSHOT or DB_CLUSTER_SNAPSHOT. Default is DB_INSTANCE.
+        pending_while_missing (bool): If True, a resource the describe call does not return is still pending until the
+                                      timeout, e.g. a snapshot that is not visible yet right after its creation.
+                                      Default is False, it is DELETED_STATE.
+
+        Returns:
+        concurrent.futures.Future: Resolves to the reached state, or fails with RdsStateError.
+        """
+        target_states = set(target_states)
+        future = Future()
+        if callback:
+            future.add_done_callback(callback)
+        watch = {
+            'future': future,
+            'target_states': target_states,
+            'failure_states': set(failure_states if failure_states is not None else DEFAULT_FAILURE_STATES) - target_states,
+            'deadline': time.time() + timeout,
+            'pending_while_missing': pending_while_missing,
+            'state': None
+        }
+        with self._lock:
+            self._watches.setdefault((resource_type, identifier), []).append(watch)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rds-state-poller", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return future
+
+    def _describe_states(self, keys):
+        """
+        Returns the status of given (resource type, identifier) keys with one describe call per resource type and
+        FILTER_BATCH_SIZE identifiers; resources not returned are DELETED_STATE.
+        """
+        states = {}
+        for resource_type, (operation, filter_name, list_key, id_key, status_key) in RESOURCE_TYPES.items():
+            identifiers = [identifier for key_type, identifier in keys if key_type == resource_type]
+            paginator = self.rds_client.get_paginator(operation)
+            for i in range(0, len(identifiers), FILTER_BATCH_SIZE):
+                batch = identifiers[i:i + FILTER_BATCH_SIZE]
+                for page in paginator.paginate(Filters=[{'Name': filter_name, 'Values': batch}]):
+                    for resource in page[list_key]:
+                        states[(resource_type, resource[id_key])] = resource[status_key]
+        return {key: states.get(key, DELETED_STATE) for key in keys}
+
+    def _resolve(self, states):
+        """
+        Resolves the watches whose resource reached a target or failure state, or timed out.
+
+        Returns:
+        bool: True if any watched resource changed state.
+        """
+        changed = False
+        resolved = []
+        now = time.time()
+        with self._lock:
+            for key, state in states.items():
+                resource_type, identifier = key
+                remaining = []
+                for watch in self._watches.get(key, []):
+                    if watch['state'] != state:
+                        if watch['state'] is not None:
+                            logging.info(f"{resource_type} {identifier} state: {watch['state']} -> {state}")
+                        watch['state'] = state
+                        changed = True
+                    if state in watch['target_states']:
+                        resolved.append((watch['future'], state, None))
+                    elif state == DELETED_STATE and watch['pending_while_missing']:
+                        if now >= watch['deadline']:
+                            resolved.append((watch['future'], None,
+                                             RdsStateError(f"Timeout: {resource_type} {identifier} not found")))
+                        else:
+                            remaining.append(watch)
+                    elif state in watch['failure_states']:
+                        resolved.append((watch['future'], None,
+                                         RdsStateError(f"{resource_type} {identifier} reached state {state}")))
+                    elif now >= watch['deadline']:
+                        resolved.append((watch['future'], None,
+                                         RdsStateError(f"Timeout: {resource_type} {identifier} still in state {state}")))
+                    else:
+                        remaining.append(watch)
+                if remaining:
+                    self._watches[key] = remaining
+                else:
+                    self._watches.pop(key, None)
+        _settle(resolved)
+        return changed
+
+    def _expire(self):
+        """Fails the watches whose deadline passed, used while the describe calls fail."""
+        resolved = []
+        now = time.time()
+        with self._lock:
+            for key in list(self._watches):
+                resource_type, identifier = key
+                remaining = []
+                for watch in self._watches[key]:
+                    if now >= watch['deadline']:
+                        resolved.append((watch['future'], None, RdsStateError(
+                            f"Timeout: {resource_type} {identifier} still in state {watch['state']}")))
+                    else:
+                        remaining.append(watch)
+                if remaining:
+                    self._watches[key] = remaining
+                else:
+                    self._watches.pop(key)
+        _settle(resolved)
+
+    def _poll(self):
+        """Poll loop, returns once nothing is watched anymore."""
+        interval = self.min_interval
+        while True:
+            self._wakeup.clear()
+            with self._lock:
+                keys = list(self._watches)
+                if not keys:
+                    self._thread = None
+                    return
+
+            try:
+                changed = self._resolve(self._describe_states(keys))
+                interval = self.min_interval if changed else min(interval * 2, self.max_interval)
+            except Exception as e:
+                # e.g. ClientError, EndpointConnectionError, ReadTimeoutError or NoCredentialsError - the deadlines
+                # still apply while the calls keep failing
+                logging.warning(f"Polling {len(keys)} RDS resources failed, retrying: {e}")
+                self._expire()
+                interval = min(interval * 2, self.max_interval)
+
+            if self._wakeup.wait(interval):
+                # A new resource is watched - poll it right away
+                interval = self.min_interval
+
+    def _run(self):
+        """Thread target, fails the outstanding watches if the poll loop stops abnormally."""
+        completed = False
+        try:
+            self._poll()
+            completed = True
+        except BaseException:
+            logging.exception("RDS state poller stopped")
+            raise
+        finally:
+            resolved = []
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+                if not completed:
+                    for (resource_type, identifier), watches in self._watches.items():
+                        for watch in watches:
+                            resolved.append((watch['future'], None,
+                                             RdsStateError(f"{resource_type} {identifier}: RDS state poller stopped")))
+                    self._watches.clear()
+            _settle(resolved)
+
+
+def get_rds_state_poller(rds_client=None):
+    """
+    Returns the process-wide RdsStatePoller of the client's credentials and region, creating it on first use, so that
+    a client of another credential set (e.g. an assumed role) in the same region gets its own poller.
+
+    Args:
+    rds_client: Boto3 RDS client. Default client is created when not passed.
+
+    Returns:
+    RdsStatePoller: Shared poller.
+    """
+    rds_client = rds_client or boto3.client('rds')
+    key = aws_clients.get_client_key(rds_client)
+    with _pollers_lock:
+        if key not in _pollers:
+            _pollers[key] = RdsStatePoller(rds_client)
+        return _pollers[key]
+
+
+def get_wait_timeout(deadline):
+    """
+    Returns the seconds to wait for a watch future, so that a waiter never blocks forever on a poller that stopped.
+
+    Args:
+    deadline (float): time.time() at which the watch times out.
+
+    Returns:
+    float: Seconds left until the deadline plus WAIT_GRACE_PERIOD.
+    """
+    return max(0, deadline - time.time()) + WAIT_GRACE_PERIOD
+
+
+def wait_for_instances(db_instance_identifiers, target_states=('available',), timeout=DEFAULT_TIMEOUT, rds_client=None):
+    """
+    Waits until all given RDS instances reached one of the target states, polling them together.
+
+    Args:
+    db_instance_identifiers (list): RDS instance identifiers.
+    target_states (list): Target states. Default is ['available'].
+    timeout (int): Seconds to wait per instance. Default is DEFAULT_TIMEOUT.
+    rds_client: Boto3 RDS client. Default client is created when not passed.
+
+    Returns:
+    dict: RDS instance identifier to True if it reached a target state, False otherwise (the reason is logged).
+    """
+    poller = get_rds_state_poller(rds_client)
+    futures = {db_instance_identifier: poller.watch(db_instance_identifier, target_states, timeout)
+               for db_instance_identifier in db_instance_identifiers}
+    wait(futures.values(), timeout=get_wait_timeout(time.time() + timeout))
+
+    results = {}
+    for db_instance_identifier, future in futures.items():
+        if not future.done():
+            error = RdsStateError(f"Timeout: no state received for {DB_INSTANCE} {db_instance_identifier}")
+        else:
+            error = future.exception()
+        if error:
+            logging.error(str(error))
+        results[db_instance_identifier] = error is None
+    return results
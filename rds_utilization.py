@@ -0,0 +1,231 @@
+"""
+Desc: importable RDS utilization profiler - pulls CPUUtilization, FreeableMemory, ReadIOPS, WriteIOPS and
+DatabaseConnections for the whole fleet through bulk get_metric_data requests, keeps them as compact per-instance
+NumPy arrays and computes min/p50/p95/max for all instances at once.
+
+Recommendations received from Compute Optimizer or Cloudability are validated locally against these profiles. Only the
+instances of the caller account have metrics here, report rows of other accounts are not profiled.
+
+Usage Ex:
+    import rds_utilization
+    profiles = rds_utilization.get_utilization_profiles(["database-1-instance-1", "database-2"], days=14)
+    print(rds_utilization.get_instance_profile(profiles, "database-2"))
+    print(rds_utilization.check_idle_candidates(profiles))
+    print(rds_utilization.get_metric_averages(profiles, 'DatabaseConnections'))
+
+    # Cloudability report rows, [DBInstanceIdentifier, ...] + [CPU p95, local check]
+    rds_utilization.extend_with_local_checks(data, local_rows, rds_utilization.check_rightsize_candidates)
+"""
+import logging
+import warnings
+from datetime import datetime, timedelta
+import numpy as np
+import cloudwatch_metrics
+
+UTILIZATION_METRICS = ['CPUUtilization', 'FreeableMemory', 'ReadIOPS', 'WriteIOPS', 'DatabaseConnections']
+UTILIZATION_STATS = ['min', 'p50', 'p95', 'max']
+
+# Local check results
+CHECK_CONFIRMED = "Confirmed"
+CHECK_REVIEW = "Review"
+CHECK_NO_DATA = "No Data"
+
+
+def _get_stats(values_list):
+    """
+    Computes min/p50/p95/max of every per-instance array in one vectorized pass over a NaN padded matrix.
+
+    Args:
+    values_list (list): One NumPy array of data point values per instance.
+
+    Returns:
+    dict: 'min', 'p50', 'p95' and 'max' arrays with one entry per instance, NaN where the instance has no data points.
+    """
+    max_len = max((len(values) for values in values_list), default=0)
+    if max_len == 0:
+        empty = np.full(len(values_list), np.nan)
+        return {'min': empty, 'p50': empty.copy(), 'p95': empty.copy(), 'max': empty.copy()}
+
+    matrix = np.full((len(values_list), max_len), np.nan, dtype=np.float32)
+    for row, values in enumerate(values_list):
+        matrix[row, :len(values)] = values
+
+    # Instances without data points are all-NaN rows, which numpy warns about and returns NaN for
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        p50, p95 = np.nanpercentile(matrix, [50, 95], axis=1)
+        min_values = np.nanmin(matrix, axis=1)
+        max_values = np.nanmax(matrix, axis=1)
+    return {'min': min_values, 'p50': p50, 'p95': p95, 'max': max_values}
+
+
+def get_utilization_profiles(rds_instance_ids, days=14, period=3600, client=None):
+    """
+    Returns the utilization profiles of given RDS instances.
+
+    Args:
+    rds_instance_ids (list): RDS instance identifiers.
+    days (int): Number of days back from now. Default is 14.
+    period (int): Data point period in seconds. Default is 3600 (hourly averages).
+    client: Boto3 CloudWatch client. Default client is created when not passed.
+
+    Returns:
+    dict: Profiles with keys
+        'instance_ids' (list): RDS instance identifiers, in row order.
+        'index' (dict): RDS instance identifier to row.
+        'values' (dict): metric name to list of per-instance float32 arrays.
+        'stats' (dict): metric name to {'min', 'p50', 'p95', 'max'} arrays, one entry per row.
+    """
+    end_time = datetime.now()
+    start_time = end_time - timedelta(days=days)
+
+    metric_queries = []
+    for row, rds_instance_id in enumerate(rds_instance_ids):
+        for metric_index, metric_name in enumerate(UTILIZATION_METRICS):
+            metric_queries.append(cloudwatch_metrics.build_metric_query(
+                f"m{row}_{metric_index}", 'AWS/RDS', metric_name,
+                {'DBInstanceIdentifier': rds_instance_id}, stat="Average", period=period))
+    results = cloudwatch_metrics.get_metric_data_bulk(metric_queries, start_time, end_time, client)
+
+    values = {}
+    stats = {}
+    for metric_index, metric_name in enumerate(UTILIZATION_METRICS):
+        values[metric_name] = [
+            np.asarray(results[f"m{row}_{metric_index}"]['Values'], dtype=np.float32)
+            for row in range(len(rds_instance_ids))
+        ]
+        stats[metric_name] = _get_stats(values[metric_name])
+
+    logging.info(f"Utilization profiles built for {len(rds_instance_ids)} RDS instances over the last {days} days")
+    return {
+        'instance_ids': list(rds_instance_ids),
+        'index': {rds_instance_id: row for row, rds_instance_id in enumerate(rds_instance_ids)},
+        'values': values,
+        'stats': stats
+    }
+
+
+def get_instance_profile(profiles, rds_instance_id):
+    """
+    Returns the min/p50/p95/max of every utilization metric for one RDS instance.
+
+    Args:
+    profiles (dict): Profiles as returned by get_utilization_profiles.
+    rds_instance_id (str): RDS instance identifier.
+
+    Returns:
+    dict: Metric name to {'min', 'p50', 'p95', 'max'} rounded to 2 decimals (None where there is no data),
+          or None if the instance is not profiled.
+    """
+    row = profiles['index'].get(rds_instance_id)
+    if row is None:
+        return None
+
+    instance_profile = {}
+    for metric_name, metric_stats in profiles['stats'].items():
+        instance_profile[metric_name] = {}
+        for stat in UTILIZATION_STATS:
+            value = metric_stats[stat][row]
+            instance_profile[metric_name][stat] = None if np.isnan(value) else round(float(value), 2)
+    return instance_profile
+
+
+def get_metric_averages(profiles, metric_name):
+    """
+    Returns the average of a utilization metric for every profiled RDS instance, e.g. the average DatabaseConnections
+    of a report without a second CloudWatch query.
+
+    Args:
+    profiles (dict): Profiles as returned by get_utilization_profiles.
+    metric_name (str): One of UTILIZATION_METRICS.
+
+    Returns:
+    dict: RDS instance identifier to average rounded to 2 decimals, None when there are no data points.
+    """
+    return {
+        rds_instance_id: round(float(values.mean()), 2) if len(values) else None
+        for rds_instance_id, values in zip(profiles['instance_ids'], profiles['values'][metric_name])
+    }
+
+
+def _to_check_results(profiles, confirmed, has_data):
+    """Maps the confirmed / has_data masks to RDS instance identifier -> local check result."""
+    results = np.where(has_data, np.where(confirmed, CHECK_CONFIRMED, CHECK_REVIEW), CHECK_NO_DATA)
+    return dict(zip(profiles['instance_ids'], results.tolist()))
+
+
+def check_idle_candidates(profiles, cpu_p95_threshold=5.0, max_connections_threshold=0):
+    """
+    Validates idle recommendations - an instance is confirmed idle when its CPU p95 and its maximum
+    connections are within the thresholds.
+
+    Args:
+    profiles (dict): Profiles as returned by get_utilization_profiles.
+    cpu_p95_threshold (float): Highest CPUUtilization p95 (%) of an idle instance. Default is 5.0.
+    max_connections_threshold (float): Highest DatabaseConnections max of an idle instance. Default is 0.
+
+    Returns:
+    dict: RDS instance identifier to CHECK_CONFIRMED, CHECK_REVIEW or CHECK_NO_DATA.
+    """
+    cpu_p95 = profiles['stats']['CPUUtilization']['p95']
+    connections_max = profiles['stats']['DatabaseConnections']['max']
+    has_data = ~np.isnan(cpu_p95) & ~np.isnan(connections_max)
+    with np.errstate(invalid='ignore'):
+        confirmed = (cpu_p95 <= cpu_p95_threshold) & (connections_max <= max_connections_threshold)
+    return _to_check_results(profiles, confirmed, has_data)
+
+
+def check_rightsize_candidates(profiles, cpu_p95_threshold=40.0, min_freeable_memory_mb=1024, iops_p95_threshold=3000):
+    """
+    Validates rightsizing recommendations - an instance is confirmed for one size down when its CPU p95 leaves room
+    for the smaller instance class and it also has memory and IOPS headroom: a memory bound instance (low
+    FreeableMemory) or an I/O bound one is sent to review.
+
+    Args:
+    profiles (dict): Profiles as returned by get_utilization_profiles.
+    cpu_p95_threshold (float): Highest CPUUtilization p95 (%) on the current instance class. Default is 40.0.
+    min_freeable_memory_mb (float): Lowest FreeableMemory minimum (MB) on the current instance class. Default is 1024.
+    iops_p95_threshold (float): Highest ReadIOPS p95 + WriteIOPS p95 on the current instance class. Default is 3000
+                                (gp3 baseline).
+
+    Returns:
+    dict: RDS instance identifier to CHECK_CONFIRMED, CHECK_REVIEW or CHECK_NO_DATA.
+    """
+    stats = profiles['stats']
+    cpu_p95 = stats['CPUUtilization']['p95']
+    freeable_memory_min = stats['FreeableMemory']['min']
+    # Upper bound of the p95 of the total IOPS
+    iops_p95 = stats['ReadIOPS']['p95'] + stats['WriteIOPS']['p95']
+    has_data = ~np.isnan(cpu_p95) & ~np.isnan(freeable_memory_min) & ~np.isnan(iops_p95)
+    with np.errstate(invalid='ignore'):
+        confirmed = ((cpu_p95 <= cpu_p95_threshold)
+                     & (freeable_memory_min >= min_freeable_memory_mb * 1024 * 1024)
+                     & (iops_p95 <= iops_p95_threshold))
+    return _to_check_results(profiles, confirmed, has_data)
+
+
+def extend_with_local_checks(rows, local_rows, check_candidates, days=30, client=None):
+    """
+    Appends the CPUUtilization p95 and the local check result to every report row, profiling only the rows whose
+    instance is in the caller account.
+
+    Args:
+    rows (list): Report rows, each one starting with the RDS instance identifier.
+    local_rows (list): One bool per row, True when the instance is in the caller account.
+    check_candidates (callable): check_idle_candidates or check_rightsize_candidates.
+    days (int): Number of days back from now. Default is 30.
+    client: Boto3 CloudWatch client. Default client is created when not passed.
+
+    Returns:
+    list: rows, extended in place; rows that are not profiled get None and CHECK_NO_DATA.
+    """
+    profiles = get_utilization_profiles([row[0] for row, is_local in zip(rows, local_rows) if is_local],
+                                        days=days, client=client)
+    checks = check_candidates(profiles)
+    for row, is_local in zip(rows, local_rows):
+        instance_profile = get_instance_profile(profiles, row[0]) if is_local else None
+        if instance_profile is None:
+            row.extend([None, CHECK_NO_DATA])
+        else:
+            row.extend([instance_profile['CPUUtilization']['p95'], checks[row[0]]])
+    return rows